@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import time
 
 from dotenv import load_dotenv
 from livekit.agents import (
@@ -8,6 +10,8 @@ from livekit.agents import (
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
+    AgentStateChangedEvent,
+    UserInputTranscribedEvent,
     WorkerOptions,
     cli,
     metrics,
@@ -25,18 +29,59 @@ from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 from todoist_handler import TodoistHandler
 from notion_handler import NotionHandler
-from pregnancy_profile import PregnancyProfile
-from symptom_analyzer import SymptomAnalyzer
+from symptom_analyzer import GENERIC_RESPONSE, SymptomAnalyzer, is_negated
 from nutrition_engine import NutritionEngine
 from conversation_closer import ConversationCloser
+from async_storage import AsyncJournalStore, EventLoopLagMonitor, run_io
+from user_storage import UserShard, acquire_user_shard, release_user_shard, session_user_id
+from reference_data import get_reference_data
+from latency_metrics import LatencyTracker
+from tts_cache import SAMPLE_WIDTH, CachedAudio, TTSAudioCache
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
+# Murf voice settings; also part of the TTS audio cache key
+TTS_VOICE = "anisha"
+TTS_STYLE = "Conversation"
+
+
+async def _cached_audio_frames(audio: CachedAudio, frame_ms: int = 100):
+    """Replay cached PCM as a stream of audio frames for session.say()."""
+    samples_per_frame = audio.sample_rate * frame_ms // 1000
+    frame_bytes = samples_per_frame * audio.num_channels * SAMPLE_WIDTH
+    for offset in range(0, len(audio.pcm), frame_bytes):
+        chunk = audio.pcm[offset:offset + frame_bytes]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=audio.sample_rate,
+            num_channels=audio.num_channels,
+            samples_per_channel=len(chunk) // (audio.num_channels * SAMPLE_WIDTH)
+        )
+
 
 class PregnancyCompanion(Agent):
-    def __init__(self) -> None:
+    # Fixed confirmations spoken by emit_intent
+    INTENT_CONFIRMATIONS = {
+        "CREATE_TASKS": "I'll help you create pregnancy care reminders.",
+        "SAVE_TO_NOTION": "I'll save this to your Notion workspace.",
+        "CREATE_REMINDER": "I'll set up that reminder for you.",
+        "WEEKLY_REFLECTION": "Let me pull up your weekly summary.",
+        "MARK_TASK_DONE": "Great! I'll mark that as complete."
+    }
+    DEFAULT_INTENT_CONFIRMATION = "Got it, processing that request."
+    WELCOME_GREETING = (
+        "Hi! Welcome to your pregnancy companion. I'm here to support you through your journey. "
+        "How are you feeling today?"
+    )
+    # Spoken (interruptibly) on an emergency keyword the user may still be qualifying
+    EMERGENCY_CHECK_PROMPT = (
+        "I want to make sure you're safe. If you have bleeding, severe pain or trouble "
+        "breathing right now, please call your doctor or emergency services."
+    )
+    
+    def __init__(self, shard: UserShard, tts_cache: Optional[TTSAudioCache] = None) -> None:
         super().__init__(
             instructions="""You are a Pregnancy Companion AI. You support pregnant users emotionally, physically, and informationally. You speak like a caring friend and pregnancy guide. You understand pregnancy weeks, symptoms, nutrition, and emotional changes. You never diagnose. You escalate on danger signs with support and urgency. You keep answers short, calm, and reassuring.
 
@@ -54,7 +99,7 @@ CONVERSATION STARTER:
 
 PREGNANCY CONVERSATION FLOW:
 1. Ask about pregnancy week (if not known)
-2. Ask: "How are you feeling? Any symptoms today?" → call analyze_symptom(symptom)
+2. Ask: "How are you feeling? Any symptoms today?" → call analyze_symptoms(symptoms) once with everything they mention
 3. Ask: "How's your mood and emotional state?" → call record_emotional_state(emotion)
 4. Ask: "How are you managing fatigue?" → call record_fatigue_level(fatigue)
 5. Ask: "Any nutrition questions or cravings?" → call check_nutrition(food_query)
@@ -83,13 +128,13 @@ When user asks about their week, call get_weekly_pregnancy_report().
 Trigger phrases: "How was my week?", "Show my pregnancy summary", "How am I doing?"
 
 NUTRITION GUIDANCE:
-When user asks about food, call check_nutrition(food_query).
+When user asks about food, call check_nutrition(food_query) once with the whole question, even if it names several foods.
 Provide pregnancy-safe recommendations.
 Warn about foods to avoid.
 Check for allergen conflicts.
 
 SYMPTOM SUPPORT:
-When user mentions symptoms, call analyze_symptom(symptom).
+When user mentions symptoms, call analyze_symptoms(symptoms) once with all of them.
 Provide trimester-appropriate guidance.
 Detect emergency keywords.
 Never diagnose - always support and guide.
@@ -120,11 +165,31 @@ When user says goodbye or thanks (e.g., "thank you", "thanks", "done", "got it",
 IMPORTANT: Call function tools when user provides information. Let the tools handle the logic.""",
         )
         
+        # Per-user storage shard (opened by the entrypoint)
+        self.shard = shard
+        
         # Initialize pregnancy profile and engines
-        self.pregnancy_profile = PregnancyProfile()
+        self.pregnancy_profile = shard.profile
         self.symptom_analyzer = SymptomAnalyzer()
         self.nutrition_engine = NutritionEngine(self.pregnancy_profile)
         self.conversation_closer = ConversationCloser()
+        # Journal I/O runs on the storage thread pool, never on the event loop
+        self.journal = AsyncJournalStore(shard.journal_store)
+        self.closure_log = shard.closure_log
+        self._compaction_task: Optional[asyncio.Task] = None
+        # Escalation started from a live transcript, before the turn ends
+        self._emergency_task: Optional[asyncio.Task] = None
+        self._emergency_speech = None
+        # Keyword escalated during the utterance being transcribed, and during
+        # the turn the LLM is currently answering (moved over on turn completion)
+        self._pending_escalation: Optional[str] = None
+        self._turn_escalation: Optional[str] = None
+        # Pre-synthesized audio for fixed phrases (None disables caching)
+        self.tts_cache = tts_cache
+        self._tts_fill_tasks: set = set()
+        self._fixed_phrase_set = frozenset(self.fixed_phrases())
+        # Keyword detection -> escalation speech starting (no LLM in between)
+        self.emergency_latency = LatencyTracker("emergency_escalation", warn_threshold_ms=1500)
         
         # Initialize pregnancy journal state
         self.journal_state = {
@@ -139,24 +204,14 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         # Track input mode for hybrid text/voice
         self.current_input_mode = "voice"  # "voice" or "text"
         
-        # Load previous entries
-        self.previous_entries = self._load_previous_entries()
-
-    def _load_previous_entries(self) -> list:
-        """Load previous pregnancy journal entries from JSON file."""
-        journal_file = "pregnancy_data/pregnancy_journal.json"
-        try:
-            if os.path.exists(journal_file):
-                with open(journal_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading pregnancy journal: {e}")
-        return []
+        # Previous entry, loaded in on_enter (head lookup, not a full history read)
+        self.last_entry = None
     
     async def on_enter(self) -> None:
         """Called when the agent starts - greet the user"""
-        # Get pregnancy week info
+        # Week info is an in-memory table lookup; the previous entry is read off the event loop
         week_info = self.pregnancy_profile.get_week_info()
+        self.last_entry = await self._get_latest_entry()
         
         if week_info:
             week = week_info["week"]
@@ -167,22 +222,19 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
                 f"Your baby is about the size of a {baby_size}. How are you feeling today? Any symptoms?"
             )
         else:
-            greeting = (
-                "Hi! Welcome to your pregnancy companion. I'm here to support you through your journey. "
-                "How are you feeling today?"
-            )
+            greeting = self.WELCOME_GREETING
         
         # Reference previous entry if available
-        if self.previous_entries:
-            last_entry = self.previous_entries[-1]
-            if "emotional_state" in last_entry and last_entry["emotional_state"]:
-                emotion = last_entry["emotional_state"]
+        if self.last_entry:
+            if "emotional_state" in self.last_entry and self.last_entry["emotional_state"]:
+                emotion = self.last_entry["emotional_state"]
                 greeting += f" Last time you were feeling {emotion}."
         
-        await self.session.say(greeting)
+        await self._say(greeting)
         
         # Set up text message listener for hybrid mode
         self.session.room.on("data_received", self._on_data_received)
+        self.session.on("agent_state_changed", self._on_agent_state_changed)
     
     def _on_data_received(self, data: rtc.DataPacket):
         """Handle incoming text messages from the frontend."""
@@ -227,29 +279,201 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         # The actual processing will be handled by the LLM through the session
         return f"Received your message: {message}"
     
-    @function_tool()
-    async def analyze_symptom(self, context: RunContext, symptom: str) -> str:
-        """Analyze a pregnancy symptom and provide safe guidance.
+    def on_emergency_keyword(
+        self,
+        keyword: str,
+        detected_at: Optional[float] = None,
+        is_final: bool = True
+    ) -> None:
+        """
+        Escalate an emergency keyword heard in a live (interim or final) transcript.
+        
+        An interim transcript can still turn "blood" into "blood test, all
+        fine", so an interim hit only gets a short check the user can talk
+        over, and the final turn goes to the LLM as usual. A hit first seen
+        in a final transcript gets the full, uninterruptible message.
         
         Args:
-            symptom: User's symptom description (e.g., "nausea", "back pain", "bleeding")
+            keyword: Emergency keyword found by the streaming scanner
+            detected_at: time.perf_counter() value when the keyword was heard
+            is_final: Whether the keyword came from a final transcript
         """
-        trimester = self.pregnancy_profile.profile.get("trimester", 1)
-        is_emergency, response = self.symptom_analyzer.analyze_symptom(symptom, trimester)
+        if self._emergency_task is not None and not self._emergency_task.done():
+            return
+        self.emergency_latency.start(detected_at)
+        if is_final:
+            self._pending_escalation = keyword
+            self._emergency_task = asyncio.create_task(self._escalate_emergency(keyword))
+        else:
+            self._emergency_task = asyncio.create_task(self._check_emergency(keyword))
+    
+    async def _check_emergency(self, keyword: str) -> None:
+        """Fast path for interim hits: a safety check the user can interrupt."""
+        logger.warning(f"🚨 Emergency keyword in interim transcript: {keyword}")
+        self.session.interrupt()
+        handle = await self._say(self.EMERGENCY_CHECK_PROMPT, allow_interruptions=True)
+        self._emergency_speech = handle
+        await handle
+    
+    async def _escalate_emergency(self, keyword: str) -> None:
+        """
+        Fast path: speak the fixed escalation message without waiting for the LLM.
         
-        # Log symptom
+        The current turn is cut off, the guide's escalation message goes
+        straight to TTS, and only then is the LLM told what happened so its
+        next reply follows on instead of repeating the warning.
+        """
+        logger.warning(f"🚨 Emergency keyword in live transcript: {keyword}")
         self.journal_state["symptoms"].append({
-            "symptom": symptom,
-            "is_emergency": is_emergency,
+            "symptom": keyword,
+            "is_emergency": True,
             "timestamp": datetime.now().isoformat()
         })
         
-        logger.info(f"Analyzed symptom: {symptom}, Emergency: {is_emergency}")
+        self.session.interrupt()
+        handle = await self._say(
+            self.symptom_analyzer.get_emergency_guidance(),
+            allow_interruptions=False
+        )
+        # The latency clock stops when this speech, not just any speech, starts playing
+        self._emergency_speech = handle
+        await handle
+        
+        chat_ctx = self.chat_ctx.copy()
+        chat_ctx.add_message(
+            role="system",
+            content=(
+                f"The user mentioned '{keyword}', an emergency warning sign. The emergency "
+                f"escalation message has already been spoken to them. Do not repeat it; stay "
+                f"calm and supportive and encourage them to contact their healthcare provider now."
+            )
+        )
+        await self.update_chat_ctx(chat_ctx)
+    
+    async def _say(self, text: str, allow_interruptions: bool = True):
+        """
+        Speak a phrase, replaying cached audio instead of calling the TTS when possible.
+        
+        Only fixed phrases (see fixed_phrases()) are cached: on a miss one
+        is spoken normally and synthesized into the cache in the background,
+        so the next session gets the cached audio. Free-form text, such as
+        the personalized greeting, never recurs and goes straight to the TTS.
+        
+        Args:
+            text: Exact text to speak
+            allow_interruptions: Whether user speech may cut the phrase off
+            
+        Returns:
+            The SpeechHandle from session.say()
+        """
+        cacheable = self.tts_cache is not None and text in self._fixed_phrase_set
+        audio = await run_io(self.tts_cache.get, text) if cacheable else None
+        if audio is not None:
+            return self.session.say(
+                text,
+                audio=_cached_audio_frames(audio),
+                allow_interruptions=allow_interruptions
+            )
+        
+        handle = self.session.say(text, allow_interruptions=allow_interruptions)
+        if cacheable:
+            self._schedule_tts_fill([text])
+        return handle
+    
+    def fixed_phrases(self) -> list[str]:
+        """Phrases this agent speaks verbatim, worth synthesizing ahead of time."""
+        return [
+            self.symptom_analyzer.get_emergency_guidance(),
+            self.EMERGENCY_CHECK_PROMPT,
+            self.WELCOME_GREETING,
+            *self.INTENT_CONFIRMATIONS.values(),
+            self.DEFAULT_INTENT_CONFIRMATION,
+            *self.conversation_closer.all_confirmations(),
+        ]
+    
+    def prepopulate_tts_cache(self) -> None:
+        """Synthesize every fixed phrase missing from the cache, in the background."""
+        if self.tts_cache:
+            self._schedule_tts_fill([text for text in self.fixed_phrases() if text not in self.tts_cache])
+    
+    def _schedule_tts_fill(self, texts: list[str]) -> None:
+        if texts:
+            task = asyncio.create_task(self._fill_tts_cache(texts))
+            self._tts_fill_tasks.add(task)
+            task.add_done_callback(self._tts_fill_tasks.discard)
+    
+    async def _fill_tts_cache(self, texts: list[str]) -> None:
+        """Synthesize phrases one at a time and store them in the cache."""
+        for text in texts:
+            try:
+                chunks = []
+                sample_rate, num_channels = 0, 1
+                async with self.session.tts.synthesize(text) as stream:
+                    async for synthesized in stream:
+                        frame = synthesized.frame
+                        chunks.append(bytes(frame.data))
+                        sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                await run_io(self.tts_cache.put, text, b"".join(chunks), sample_rate, num_channels)
+            except Exception as e:
+                logger.error(f"Error caching TTS audio: {e}")
+        logger.info(f"TTS cache: {self.tts_cache.get_summary()}")
+    
+    def _on_agent_state_changed(self, ev: AgentStateChangedEvent) -> None:
+        """Stop the escalation latency clock when the escalation message starts playing."""
+        if (
+            ev.new_state == "speaking"
+            and self.emergency_latency.pending
+            and self._emergency_speech is not None
+            and self.session.current_speech is self._emergency_speech
+        ):
+            self.emergency_latency.finish()
+    
+    async def on_user_turn_completed(self, turn_ctx: llm.ChatContext, new_message: llm.ChatMessage) -> None:
+        """Carry a live-transcript escalation over to the turn the LLM now answers."""
+        self._turn_escalation, self._pending_escalation = self._pending_escalation, None
+    
+    @function_tool()
+    async def analyze_symptoms(self, context: RunContext, symptoms: str) -> str:
+        """Analyze everything the user said about their symptoms in one call and provide safe guidance.
+        
+        Args:
+            symptoms: User's full symptom description, may mention several (e.g., "nausea and back pain", "bleeding")
+        """
+        trimester = self.pregnancy_profile.trimester or 1
+        findings = self.symptom_analyzer.analyze_symptoms(symptoms, trimester)
+        is_emergency = any(finding.is_emergency for finding in findings)
+        # This turn's emergency was already logged and spoken from the live transcript
+        escalated = self._turn_escalation
+        
+        # Log each recognized symptom (or the raw description if none was recognized)
+        timestamp = datetime.now().isoformat()
+        for finding in findings or [None]:
+            if escalated and finding is not None and finding.is_emergency:
+                continue
+            self.journal_state["symptoms"].append({
+                "symptom": finding.symptom if finding else symptoms,
+                "is_emergency": finding.is_emergency if finding else False,
+                "timestamp": timestamp
+            })
+        
+        logger.info(
+            f"Analyzed symptoms: {symptoms}, Found: {[finding.symptom for finding in findings]}, "
+            f"Emergency: {is_emergency}"
+        )
         
+        if is_emergency and escalated:
+            return (
+                f"Already escalated: the emergency message for '{escalated}' has already been "
+                f"spoken to the user. Do not repeat it; stay calm and supportive and encourage "
+                f"them to contact their healthcare provider now."
+            )
         if is_emergency:
-            return response
+            return self.symptom_analyzer.get_emergency_guidance()
+        if not findings:
+            return GENERIC_RESPONSE + " Now, how's your emotional state today?"
         
-        return response + " Now, how's your emotional state today?"
+        guidance = " ".join(f"For {finding.symptom}: {finding.response}" for finding in findings)
+        return guidance + " Now, how's your emotional state today?"
     
     @function_tool()
     async def record_emotional_state(self, context: RunContext, emotion: str) -> str:
@@ -302,12 +526,22 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         """Check nutrition and provide pregnancy-safe food guidance.
         
         Args:
-            food_query: User's food question or craving (e.g., "sushi", "coffee", "spinach")
+            food_query: User's food question or craving, may name several foods (e.g., "sushi", "can I have coffee and brie?")
         """
-        trimester = self.pregnancy_profile.profile.get("trimester", 1)
+        trimester = self.pregnancy_profile.trimester or 1
         
-        # Check if asking about specific food
-        if len(food_query.split()) <= 3:
+        # Answer every known food in the question at once ("sushi, coffee and brie")
+        food_checks = self.nutrition_engine.check_foods_in_text(food_query)
+        if food_checks:
+            response = " ".join(message for _, _, message in food_checks)
+            self.journal_state["nutrition_notes"].append({
+                "query": food_query,
+                "foods": [food for food, _, _ in food_checks],
+                "response": response,
+                "timestamp": datetime.now().isoformat()
+            })
+        # Check if asking about a specific (possibly partial or unknown) food
+        elif len(food_query.split()) <= 3:
             is_safe, message = self.nutrition_engine.check_food_safety(food_query)
             self.journal_state["nutrition_notes"].append({
                 "query": food_query,
@@ -389,7 +623,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
 
     @function_tool()
     async def save_pregnancy_journal(self, context: RunContext) -> str:
-        """Save the pregnancy journal entry to JSON file.
+        """Save the pregnancy journal entry to the journal store.
         Call this after the user confirms the recap is correct."""
         
         # Validate required fields
@@ -427,25 +661,9 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             "summary": summary
         }
         
-        # Ensure pregnancy_data directory exists
-        os.makedirs("pregnancy_data", exist_ok=True)
-        journal_file = "pregnancy_data/pregnancy_journal.json"
-        
-        # Load existing entries
-        entries = []
-        if os.path.exists(journal_file):
-            try:
-                with open(journal_file, 'r') as f:
-                    entries = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading pregnancy journal: {e}")
-        
-        # Append new entry
-        entries.append(entry)
-        
-        # Save to file
-        with open(journal_file, 'w') as f:
-            json.dump(entries, f, indent=2)
+        # Append new entry (single O(1) write, no rewrite of the history)
+        async with self.shard.lock:
+            await self.journal.append(entry)
         
         # Log the JSON output
         json_str = json.dumps(entry, separators=(',', ':'))
@@ -482,6 +700,16 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         Args:
             intent: The intent to emit (e.g., "CREATE_TASKS", "SAVE_TO_NOTION", "CREATE_REMINDER", "WEEKLY_REFLECTION", "MARK_TASK_DONE")
         """
+        await self._publish_intent(intent)
+        
+        # Speak the fixed confirmation from the audio cache, then tell the LLM it was said
+        confirmation = self.INTENT_CONFIRMATIONS.get(intent, self.DEFAULT_INTENT_CONFIRMATION)
+        await self._say(confirmation)
+        
+        return f"You already told the user: \"{confirmation}\" Do not repeat it."
+    
+    async def _publish_intent(self, intent: str) -> None:
+        """Send an intent signal to the frontend/backend, without speaking anything."""
         logger.info(f"INTENT:{intent}")
         
         # Send intent as data message to frontend/backend
@@ -494,17 +722,6 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             logger.info(f"✅ Intent emitted: {intent}")
         except Exception as e:
             logger.error(f"❌ Failed to emit intent: {e}")
-        
-        # Return appropriate confirmation based on intent
-        responses = {
-            "CREATE_TASKS": "I'll help you create pregnancy care reminders.",
-            "SAVE_TO_NOTION": "I'll save this to your Notion workspace.",
-            "CREATE_REMINDER": "I'll set up that reminder for you.",
-            "WEEKLY_REFLECTION": "Let me pull up your weekly summary.",
-            "MARK_TASK_DONE": "Great! I'll mark that as complete."
-        }
-        
-        return responses.get(intent, "Got it, processing that request.")
 
     @function_tool()
     async def get_weekly_pregnancy_report(self, context: RunContext) -> str:
@@ -512,59 +729,28 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         Call this when user asks about their week, progress, or patterns."""
         
         from datetime import timedelta
-        from collections import Counter
         
-        journal_file = "pregnancy_data/pregnancy_journal.json"
+        # Merge the daily rollups for the past 7 days (today and the 6 before it)
+        week_start = (datetime.now() - timedelta(days=6)).date()
         
-        # Load all entries
-        entries = []
-        if os.path.exists(journal_file):
-            try:
-                with open(journal_file, 'r') as f:
-                    entries = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading pregnancy journal: {e}")
-                return "I couldn't load your pregnancy journal right now."
-        
-        if not entries:
-            return "You don't have any journal entries yet. Let's start tracking your pregnancy journey!"
-        
-        # Filter entries from the past 7 days
-        now = datetime.now()
-        week_ago = now - timedelta(days=7)
-        
-        recent_entries = []
-        for entry in entries:
-            try:
-                entry_date = datetime.fromisoformat(entry["datetime"])
-                if entry_date >= week_ago:
-                    recent_entries.append(entry)
-            except Exception:
-                continue
+        try:
+            if await self.journal.latest() is None:
+                return "You don't have any journal entries yet. Let's start tracking your pregnancy journey!"
+            week_rollup = await self.journal.rollup(since_day=week_start)
+        except Exception as e:
+            logger.error(f"Error loading pregnancy journal: {e}")
+            return "I couldn't load your pregnancy journal right now."
         
-        if not recent_entries:
+        if not week_rollup.entry_count:
             return "You don't have any entries from the past week. Let's start fresh today!"
         
-        # Analyze the week
-        emotions = [e.get("emotional_state", "") for e in recent_entries if e.get("emotional_state")]
-        fatigue_levels = [e.get("fatigue_level", "") for e in recent_entries if e.get("fatigue_level")]
-        all_symptoms = []
-        all_tasks = []
-        nutrition_count = 0
-        
-        for e in recent_entries:
-            all_symptoms.extend([s["symptom"] for s in e.get("symptoms", [])])
-            all_tasks.extend(e.get("pregnancy_tasks", []))
-            nutrition_count += len(e.get("nutrition_notes", []))
-        
-        # Count frequencies
-        emotion_counts = Counter(emotions)
-        symptom_counts = Counter(all_symptoms)
-        most_common_emotion = emotion_counts.most_common(1)[0] if emotion_counts else None
-        most_common_symptom = symptom_counts.most_common(1)[0] if symptom_counts else None
+        # Most frequent emotion and symptom
+        nutrition_count = week_rollup.nutrition_count
+        most_common_emotion = week_rollup.emotions.most_common(1)[0] if week_rollup.emotions else None
+        most_common_symptom = week_rollup.symptoms.most_common(1)[0] if week_rollup.symptoms else None
         
         # Calculate streak
-        streak = len(recent_entries)
+        streak = week_rollup.entry_count
         
         # Build conversational summary
         summary_parts = []
@@ -598,8 +784,8 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             summary_parts.append(f"You asked about nutrition {nutrition_count} times - great job staying informed!")
         
         # Tasks
-        if all_tasks:
-            summary_parts.append(f"You set {len(all_tasks)} pregnancy care tasks.")
+        if week_rollup.task_count:
+            summary_parts.append(f"You set {week_rollup.task_count} pregnancy care tasks.")
         
         # Encouragement
         if streak >= 3:
@@ -607,11 +793,11 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         
         summary = " ".join(summary_parts)
         
-        logger.info(f"Weekly pregnancy report generated: {len(recent_entries)} entries")
+        logger.info(f"Weekly pregnancy report generated: {week_rollup.entry_count} entries")
         logger.info(f"WEEKLY_PREGNANCY_REPORT: {summary}")
         
         # Emit intent for tracking
-        await self.emit_intent(context, "WEEKLY_REFLECTION")
+        await self._publish_intent("WEEKLY_REFLECTION")
         
         return summary
 
@@ -625,7 +811,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         
         # Step 2: If no current tasks, try to load from latest entry
         if not tasks:
-            tasks = self._get_latest_pregnancy_tasks()
+            tasks = await self._get_latest_pregnancy_tasks()
         
         # Step 3: Validate we have tasks
         if not tasks:
@@ -653,7 +839,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             logger.info(f"✅ Created {result['created']} Todoist reminders")
             
             # Step 7: Emit intent for tracking
-            await self.emit_intent(context, "CREATE_TASKS")
+            await self._publish_intent("CREATE_TASKS")
             
             # Step 8: Return confirmation
             task_count = result['created']
@@ -668,20 +854,10 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             logger.error(f"❌ Error creating Todoist reminders: {e}")
             return "I had trouble creating those reminders. Please try again later."
 
-    def _get_latest_pregnancy_tasks(self) -> list[str]:
+    async def _get_latest_pregnancy_tasks(self) -> list[str]:
         """Get tasks from the most recent pregnancy journal entry."""
-        journal_file = "pregnancy_data/pregnancy_journal.json"
-        
-        if not os.path.exists(journal_file):
-            return []
-        
         try:
-            with open(journal_file, 'r') as f:
-                entries = json.load(f)
-            
-            if entries:
-                latest = entries[-1]
-                return latest.get("pregnancy_tasks", [])
+            return await self.journal.latest_tasks()
         except Exception as e:
             logger.error(f"Error loading latest pregnancy tasks: {e}")
         
@@ -693,7 +869,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         Call this when user asks to save to Notion, add to Notion, etc."""
         
         # Step 1: Get latest entry
-        entry = self._get_latest_entry()
+        entry = await self._get_latest_entry()
         
         # Step 2: Validate we have data
         if not entry:
@@ -719,7 +895,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
                 logger.info(f"✅ Saved to Notion: {result['page_id']}")
                 
                 # Step 6: Emit intent
-                await self.emit_intent(context, "SAVE_TO_NOTION")
+                await self._publish_intent("SAVE_TO_NOTION")
                 
                 return "Perfect! Your pregnancy journal has been saved to Notion. Everything is backed up!"
             else:
@@ -751,7 +927,7 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             "emotional_state": self.journal_state.get("emotional_state"),
             "symptoms": self.journal_state.get("symptoms", []),
             "fatigue_level": self.journal_state.get("fatigue_level"),
-            "pregnancy_week": self.pregnancy_profile.profile.get("week")
+            "pregnancy_week": self.pregnancy_profile.current_week
         }
         
         # Step 3: Select appropriate task
@@ -784,7 +960,10 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
         
         logger.info(f"✅ Conversation closure handled: Task assigned and logged")
         
-        return confirmation
+        # Fixed text, so it plays from the audio cache without a TTS round trip
+        await self._say(confirmation)
+        
+        return f"You already told the user: \"{confirmation}\" Do not repeat it; just say a short goodbye if anything."
     
     async def _save_closure_task(
         self,
@@ -804,34 +983,22 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             True if saved successfully
         """
         try:
-            # Ensure pregnancy_data directory exists
-            os.makedirs("pregnancy_data", exist_ok=True)
-            
-            # Load existing closure tasks log
-            closure_log_file = "pregnancy_data/closure_tasks.json"
-            closure_tasks = []
-            
-            if os.path.exists(closure_log_file):
-                try:
-                    with open(closure_log_file, 'r') as f:
-                        closure_tasks = json.load(f)
-                except Exception as e:
-                    logger.error(f"Error loading closure tasks: {e}")
-            
             # Create entry
             entry = {
                 "timestamp": datetime.now().isoformat(),
                 "task": task,
                 "trigger_phrase": trigger_phrase,
                 "context": context,
-                "pregnancy_week": self.pregnancy_profile.profile.get("week")
+                "pregnancy_week": self.pregnancy_profile.current_week
             }
             
-            # Append and save
-            closure_tasks.append(entry)
+            # Constant-time append to the current log segment, off the event loop
+            async with self.shard.lock:
+                needs_compaction = await run_io(self.closure_log.append, entry)
             
-            with open(closure_log_file, 'w') as f:
-                json.dump(closure_tasks, f, indent=2)
+            # Fold closed segments into the archive in the background
+            if needs_compaction and (self._compaction_task is None or self._compaction_task.done()):
+                self._compaction_task = asyncio.create_task(run_io(self.closure_log.compact))
             
             logger.info(f"💾 Closure task saved internally: {task}")
             return True
@@ -877,19 +1044,10 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
             logger.error(f"❌ Failed to sync task to Todoist: {e}")
             return False
 
-    def _get_latest_entry(self) -> dict:
+    async def _get_latest_entry(self) -> Optional[dict]:
         """Get the most recent pregnancy journal entry."""
-        journal_file = "pregnancy_data/pregnancy_journal.json"
-        
-        if not os.path.exists(journal_file):
-            return None
-        
         try:
-            with open(journal_file, 'r') as f:
-                entries = json.load(f)
-            
-            if entries:
-                return entries[-1]
+            return await self.journal.latest()
         except Exception as e:
             logger.error(f"Error loading latest entry: {e}")
         
@@ -898,6 +1056,10 @@ IMPORTANT: Call function tools when user provides information. Let the tools han
 
 def prewarm(proc: JobProcess):
     proc.userdata["vad"] = silero.VAD.load()
+    # Parse reference datasets once per worker; every job shares them read-only
+    proc.userdata["reference_data"] = get_reference_data()
+    # Index the on-disk TTS audio cache once per worker
+    proc.userdata["tts_cache"] = TTSAudioCache(voice=TTS_VOICE, style=TTS_STYLE)
 
 
 async def entrypoint(ctx: JobContext):
@@ -920,8 +1082,8 @@ async def entrypoint(ctx: JobContext):
         # Text-to-speech (TTS) is your agent's voice, turning the LLM's text into speech that the user can hear
         # See all available models as well as voice selections at https://docs.livekit.io/agents/models/tts/
         tts=murf.TTS(
-                voice="anisha", 
-                style="Conversation",
+                voice=TTS_VOICE, 
+                style=TTS_STYLE,
                 tokenizer=tokenize.basic.SentenceTokenizer(min_sentence_len=2),
                 text_pacing=True
             ),
@@ -947,6 +1109,10 @@ async def entrypoint(ctx: JobContext):
     # Metrics collection, to measure pipeline performance
     # For more information, see https://docs.livekit.io/agents/build/metrics/
     usage_collector = metrics.UsageCollector()
+    
+    # Event loop lag, to verify storage I/O never stalls the audio pipeline
+    loop_lag_monitor = EventLoopLagMonitor()
+    loop_lag_monitor.start()
 
     @session.on("metrics_collected")
     def _on_metrics_collected(ev: MetricsCollectedEvent):
@@ -956,6 +1122,8 @@ async def entrypoint(ctx: JobContext):
     async def log_usage():
         summary = usage_collector.get_summary()
         logger.info(f"Usage: {summary}")
+        await loop_lag_monitor.stop()
+        logger.info(f"Event loop lag: {loop_lag_monitor.get_summary()}")
 
     ctx.add_shutdown_callback(log_usage)
 
@@ -967,8 +1135,43 @@ async def entrypoint(ctx: JobContext):
     # # Start the avatar and wait for it to join
     # await avatar.start(session, room=ctx.room)
 
+    # Rooms are random per session, so storage follows the user: join the
+    # room first and key the shard on the participant's stable identity
+    await ctx.connect()
+    participant = await ctx.wait_for_participant()
+    user_id = session_user_id(participant.identity, participant.attributes)
+    ctx.log_context_fields["user"] = user_id
+    
+    # Open this user's storage shard (off the event loop, it touches disk)
+    shard = acquire_user_shard(user_id)
+    await run_io(shard.open)
+    
+    # Flush debounced profile writes and close the shard before the job exits
+    async def release_storage():
+        await release_user_shard(shard)
+    
+    ctx.add_shutdown_callback(release_storage)
+    
     # Create the pregnancy companion agent
-    pregnancy_agent = PregnancyCompanion()
+    pregnancy_agent = PregnancyCompanion(shard=shard, tts_cache=ctx.proc.userdata.get("tts_cache"))
+    
+    async def log_emergency_latency():
+        logger.info(f"Emergency escalation latency: {pregnancy_agent.emergency_latency.get_summary()}")
+    
+    ctx.add_shutdown_callback(log_emergency_latency)
+    
+    # Scan interim transcripts for emergency keywords while the user is still talking
+    emergency_scanner = pregnancy_agent.symptom_analyzer.create_emergency_scanner()
+    
+    @session.on("user_input_transcribed")
+    def _on_user_input_transcribed(ev: UserInputTranscribedEvent):
+        detected_at = time.perf_counter()
+        # "no bleeding or contractions" must not set off the fast path
+        hits = [hit for hit in emergency_scanner.update(ev.transcript) if not is_negated(ev.transcript, hit)]
+        if ev.is_final:
+            emergency_scanner.reset()
+        if hits:
+            pregnancy_agent.on_emergency_keyword(hits[0].keyword, detected_at, ev.is_final)
     
     # Set up text message handler for hybrid mode
     @ctx.room.on("data_received")
@@ -1000,13 +1203,15 @@ async def entrypoint(ctx: JobContext):
         agent=pregnancy_agent,
         room=ctx.room,
         room_input_options=RoomInputOptions(
+            # Only listen to the user whose storage shard this session opened
+            participant_identity=participant.identity,
             # For telephony applications, use `BVCTelephony` for best results
             noise_cancellation=noise_cancellation.BVC(),
         ),
     )
 
-    # Join the room and connect to the user
-    await ctx.connect()
+    # Synthesize fixed phrases not cached yet, so later sessions skip the TTS for them
+    pregnancy_agent.prepopulate_tts_cache()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""Async access to blocking pregnancy data storage.
+
+Journal, profile and closure-log I/O is synchronous (open/json/sqlite), so
+calling it directly from an async function tool stalls the event loop that
+drives STT, VAD and TTS audio. Everything here runs that I/O on a small,
+bounded thread pool instead.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, List, Optional, TypeVar
+
+from journal_rollup import JournalRollup
+from journal_store import JournalStore
+
+logger = logging.getLogger("async_storage")
+
+T = TypeVar("T")
+
+# Bounded so a burst of saves cannot spawn unbounded threads
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STORAGE_IO_WORKERS", "4")),
+    thread_name_prefix="storage-io"
+)
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking storage call on the storage I/O thread pool.
+
+    Args:
+        func: Blocking callable
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncJournalStore:
+    """Async facade over a JournalStore that never blocks the event loop."""
+
+    def __init__(self, store: JournalStore):
+        self.store = store
+
+    async def append(self, entry: dict) -> None:
+        await run_io(self.store.append, entry)
+
+    async def latest(self) -> Optional[dict]:
+        return await run_io(self.store.latest)
+
+    async def latest_tasks(self) -> List[str]:
+        return await run_io(self.store.latest_tasks)
+
+    async def entries_since(self, since: datetime) -> List[dict]:
+        return await run_io(self.store.entries_since, since)
+
+    async def rollup(
+        self,
+        since_day: Optional[date] = None,
+        until_day: Optional[date] = None,
+        trimester: Optional[int] = None
+    ) -> JournalRollup:
+        return await run_io(self.store.rollup, since_day, until_day, trimester)
+
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes up from short sleeps.
+
+    A sleep of `interval` seconds that returns `interval + lag` seconds later
+    means some callback held the loop for about `lag` seconds. Blocking I/O
+    on the loop shows up directly as lag.
+    """
+
+    def __init__(self, interval: float = 0.02, warn_threshold_ms: float = 5.0):
+        """
+        Initialize the monitor.
+
+        Args:
+            interval: Seconds between samples
+            warn_threshold_ms: Lag above which a warning is logged
+        """
+        self.interval = interval
+        self.warn_threshold_ms = warn_threshold_ms
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+
+            self.samples += 1
+            self.total_lag_ms += lag_ms
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+            if lag_ms > self.warn_threshold_ms:
+                logger.warning(f"⚠️ Event loop lag {lag_ms:.1f}ms")
+
+    def get_summary(self) -> dict:
+        """
+        Get lag statistics collected so far.
+
+        Returns:
+            Dict with sample count, max and mean lag in milliseconds
+        """
+        mean_lag_ms = self.total_lag_ms / self.samples if self.samples else 0.0
+        return {
+            "samples": self.samples,
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "mean_lag_ms": round(mean_lag_ms, 2),
+        }
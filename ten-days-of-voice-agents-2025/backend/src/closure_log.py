@@ -0,0 +1,226 @@
+"""Segmented, rotating append log for end-of-conversation closure tasks."""
+
+import json
+import os
+import re
+import logging
+import threading
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from storage_utils import append_json_line, iter_json_lines
+
+logger = logging.getLogger("closure_log")
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})-(\d{8})\.jsonl$")
+ARCHIVE_PATTERN = re.compile(r"^archive-(\d{6})\.jsonl$")
+
+
+class ClosureTaskLog:
+    """Append-only closure task log split into rotating segments.
+
+    Each closure task is one line appended to the current segment
+    (segment-<seq>-<YYYYMMDD>.jsonl). A new segment is started when the
+    current one exceeds max_segment_bytes or the day changes. compact()
+    folds closed segments into a single archive-<seq>.jsonl file, where
+    <seq> is the last segment it covers, so a crash between writing the
+    archive and deleting the merged segments never duplicates entries.
+    """
+
+    def __init__(
+        self,
+        log_dir: str = "pregnancy_data/closure_tasks",
+        max_segment_bytes: int = 256 * 1024,
+        compact_after_segments: int = 8,
+        legacy_file: Optional[str] = "pregnancy_data/closure_tasks.json"
+    ):
+        """
+        Initialize the closure task log.
+
+        Args:
+            log_dir: Directory holding the segment and archive files
+            max_segment_bytes: Size at which the current segment is rotated
+            compact_after_segments: Closed segments that make compaction worthwhile
+            legacy_file: Old JSON array log to migrate from
+        """
+        self.log_dir = log_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.compact_after_segments = compact_after_segments
+        self.legacy_file = legacy_file
+
+        # Guards the segment bookkeeping shared with compaction
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+        os.makedirs(log_dir, exist_ok=True)
+        self._migrate_legacy_log()
+
+        # Resume the newest segment; appends never scan the directory again
+        archive_seq = self._find_archive_seq()
+        self._archived_seq = archive_seq if archive_seq is not None else -1
+        segments = self._list_segments()
+        if segments:
+            self._current_seq, self._current_day, path = segments[-1]
+            self._current_size = os.path.getsize(path)
+        else:
+            self._current_seq = max(self._archived_seq, 0)
+            self._current_day = ""
+            self._current_size = 0
+
+    def _segment_path(self, seq: int, day: str) -> str:
+        return os.path.join(self.log_dir, f"segment-{seq:06d}-{day}.jsonl")
+
+    def _archive_path(self, seq: int) -> str:
+        return os.path.join(self.log_dir, f"archive-{seq:06d}.jsonl")
+
+    def _list_segments(self) -> List[Tuple[int, str, str]]:
+        """Return (seq, day, path) for every segment newer than the archive."""
+        segments = []
+        for name in os.listdir(self.log_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match and int(match.group(1)) > self._archived_seq:
+                segments.append((int(match.group(1)), match.group(2), os.path.join(self.log_dir, name)))
+        return sorted(segments)
+
+    def _find_archive_seq(self) -> Optional[int]:
+        """Return the segment sequence covered by the newest archive on disk."""
+        seqs = [
+            int(match.group(1))
+            for match in (ARCHIVE_PATTERN.match(name) for name in os.listdir(self.log_dir))
+            if match
+        ]
+        return max(seqs) if seqs else None
+
+    def _migrate_legacy_log(self):
+        """One-shot migration of closure_tasks.json into the first archive."""
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        if self._find_archive_seq() is not None:
+            return
+
+        try:
+            with open(self.legacy_file, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading legacy closure tasks: {e}")
+            return
+
+        if not isinstance(entries, list):
+            logger.warning("Legacy closure tasks file is not a list, skipping migration")
+            return
+        skipped = sum(1 for entry in entries if not isinstance(entry, dict))
+        if skipped:
+            logger.warning(f"Skipping {skipped} malformed legacy closure tasks")
+            entries = [entry for entry in entries if isinstance(entry, dict)]
+
+        archive_path = self._archive_path(0)
+        tmp_path = f"{archive_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, archive_path)
+        os.replace(self.legacy_file, f"{self.legacy_file}.migrated")
+
+        logger.info(f"Migrated {len(entries)} closure tasks to {archive_path}")
+
+    def append(self, entry: dict) -> bool:
+        """
+        Append one closure task to the current segment.
+
+        Args:
+            entry: Closure task entry dict
+
+        Returns:
+            True if enough closed segments have piled up that the caller
+            should schedule compact()
+        """
+        line_size = len(json.dumps(entry, separators=(',', ':'), ensure_ascii=False).encode('utf-8')) + 1
+        today = datetime.now().strftime("%Y%m%d")
+
+        with self._lock:
+            if (
+                self._current_day != today
+                or self._current_size + line_size > self.max_segment_bytes
+            ):
+                self._current_seq += 1
+                self._current_day = today
+                self._current_size = 0
+
+            append_json_line(self._segment_path(self._current_seq, self._current_day), entry)
+            self._current_size += line_size
+            closed_segments = self._current_seq - max(self._archived_seq, 0) - 1
+
+        return closed_segments >= self.compact_after_segments
+
+    def iter_entries(self) -> Iterator[dict]:
+        """
+        Iterate over every closure task, oldest first.
+
+        Yields:
+            Closure task entry dicts
+        """
+        with self._lock:
+            archive_seq = self._archived_seq
+            segments = self._list_segments()
+        if archive_seq >= 0:
+            yield from iter_json_lines(self._archive_path(archive_seq))
+        for _, _, path in segments:
+            yield from iter_json_lines(path)
+
+    def compact(self) -> int:
+        """
+        Fold every closed segment into a new archive file.
+
+        Safe to run on a background thread while appends continue: the
+        current segment is never touched.
+
+        Returns:
+            Number of segments compacted
+        """
+        # Only one compaction at a time; a concurrent request is a no-op
+        if not self._compact_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._compact_closed_segments()
+        finally:
+            self._compact_lock.release()
+
+    def _compact_closed_segments(self) -> int:
+        with self._lock:
+            current_seq = self._current_seq
+            old_archive_seq = self._archived_seq
+            closed = [segment for segment in self._list_segments() if segment[0] < current_seq]
+        if not closed:
+            return 0
+
+        new_archive_seq = closed[-1][0]
+        new_archive = self._archive_path(new_archive_seq)
+        tmp_path = f"{new_archive}.tmp"
+
+        with open(tmp_path, 'wb') as out:
+            sources = [path for _, _, path in closed]
+            if old_archive_seq >= 0:
+                sources.insert(0, self._archive_path(old_archive_seq))
+            for path in sources:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                # A torn last line must not swallow the next file's first record
+                if data and not data.endswith(b"\n"):
+                    data += b"\n"
+                out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, new_archive)
+        with self._lock:
+            self._archived_seq = new_archive_seq
+
+        # The new archive is authoritative from here on; stale files are only garbage
+        for _, _, path in closed:
+            os.remove(path)
+        if old_archive_seq >= 0:
+            os.remove(self._archive_path(old_archive_seq))
+
+        logger.info(f"Compacted {len(closed)} closure task segments into {new_archive}")
+        return len(closed)
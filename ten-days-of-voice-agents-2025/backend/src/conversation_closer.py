@@ -5,24 +5,49 @@ Non-invasive add-on for assigning small pregnancy care tasks when user ends conv
 
 import logging
 import random
-from typing import Optional, Tuple
+import re
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger("conversation_closer")
 
+# Where a closure phrase must appear in the utterance to count
+ANYWHERE = "anywhere"  # any position; rarely safe ("say bye to my husband")
+AT_END = "at_end"      # "that's great, thank you" but not "thanks, and what about sushi"
+WHOLE = "whole"        # "ok" on its own, not "ok so what can I eat"
+
+_WORD = re.compile(r"[a-z]+")
+
+# Words that can follow or precede a closure phrase without changing it
+# ("thanks so much", "bye for now", "oh okay")
+_TRAILING_FILLER = frozenset("so much a lot again for now everything all very really later soon tomorrow".split())
+_LEADING_FILLER = frozenset("oh ah well alright great".split())
+# A trailing "for ..." clause ("thanks for your help", "done for today")
+# still ends the conversation, unless it goes on to something new
+_CLAUSE_BREAKS = frozenset("but and what how can could should is are why when where".split())
+# "I'm not done" is not a goodbye ("no thanks" still is)
+_NEGATIONS = frozenset("not never isnt arent wasnt havent hasnt didnt".split())
+
+
+def _normalize(text: str) -> str:
+    """Lowercase words separated by single spaces, apostrophes dropped ("I'm" -> "im")."""
+    return " ".join(_WORD.findall(text.lower().replace("’", "'").replace("'", "")))
+
 
 class ConversationCloser:
     """Handles end-of-conversation detection and task assignment."""
     
-    # Trigger phrases for conversation closure
-    CLOSURE_PHRASES = [
-        "thank you", "thanks", "thank u", "thx", "ty",
-        "done", "i'm done", "that's all", "that's it",
-        "ok", "okay", "ok thanks", "okay thanks",
-        "got it", "understood", "appreciate it",
-        "bye", "goodbye", "see you", "talk later",
-        "that helps", "perfect", "sounds good"
-    ]
+    # Trigger phrases for conversation closure, with where each must appear
+    CLOSURE_PHRASES = {
+        "thank you": AT_END, "thanks": AT_END, "thank u": AT_END, "thx": AT_END, "ty": AT_END,
+        "done": WHOLE, "i'm done": AT_END, "that's all": AT_END, "that's it": AT_END,
+        "ok": WHOLE, "okay": WHOLE, "ok thanks": AT_END, "okay thanks": AT_END,
+        "got it": AT_END, "understood": AT_END, "appreciate it": AT_END,
+        "bye": AT_END, "goodbye": AT_END, "see you": AT_END, "talk later": AT_END,
+        "talk to you later": AT_END, "have a good day": AT_END, "have a nice day": AT_END,
+        "have a great day": AT_END, "good night": AT_END,
+        "that helps": AT_END, "perfect": WHOLE, "sounds good": AT_END
+    }
     
     # Small pregnancy care tasks (context-aware)
     CARE_TASKS = {
@@ -74,6 +99,14 @@ class ConversationCloser:
         """Initialize conversation closer."""
         self.last_task_assigned = None
         self.task_assignment_count = 0
+        # Every phrase in one alternation over normalized words, longest first
+        self._phrase_rules = {
+            _normalize(phrase): rule for phrase, rule in self.CLOSURE_PHRASES.items()
+        }
+        alternation = "|".join(
+            re.escape(phrase) for phrase in sorted(self._phrase_rules, key=len, reverse=True)
+        )
+        self._closure_pattern = re.compile(rf"(?<![a-z])(?:{alternation})(?![a-z])")
         logger.info("Conversation closer initialized")
     
     def detect_closure(self, message: str) -> bool:
@@ -86,18 +119,57 @@ class ConversationCloser:
         Returns:
             True if closure detected, False otherwise
         """
-        message_lower = message.lower().strip()
+        phrase = self.match_closure(message)
+        if phrase is not None:
+            logger.info(f"🔚 Closure detected: '{message}' matched '{phrase}'")
+            return True
         
-        # Remove punctuation for matching
-        message_clean = message_lower.replace(".", "").replace("!", "").replace("?", "")
+        return False
+    
+    def match_closure(self, message: str) -> Optional[str]:
+        """
+        Find the closure phrase in a message, honoring each phrase's position rule.
         
-        # Check for exact matches or phrases contained in message
-        for phrase in self.CLOSURE_PHRASES:
-            if phrase == message_clean or phrase in message_clean:
-                logger.info(f"🔚 Closure detected: '{message}' matched '{phrase}'")
-                return True
+        Phrases only match whole words ("ok" is not in "book", "ty" is not
+        in "pretty"), and the message is scanned once by a single regex.
         
-        return False
+        Args:
+            message: User's message
+            
+        Returns:
+            The matched (normalized) phrase, or None
+        """
+        words = _normalize(message).split()
+        # Filler around the phrase does not move it off the end or the start
+        end = len(words)
+        while end > 0 and words[end - 1] in _TRAILING_FILLER:
+            end -= 1
+        start = 0
+        while start < end and words[start] in _LEADING_FILLER:
+            start += 1
+        text = " ".join(words)
+        core_start = len(" ".join(words[:start])) + (1 if start else 0)
+        core_end = len(" ".join(words[:end]))
+        
+        for match in self._closure_pattern.finditer(text):
+            phrase = match.group()
+            rule = self._phrase_rules[phrase]
+            previous_word = text[:match.start()].split()[-1:]
+            if previous_word and previous_word[0] in _NEGATIONS:
+                continue
+            if rule == ANYWHERE:
+                return phrase
+            # Anything past core_end (or before core_start) is filler
+            if rule == AT_END and match.end() >= core_end:
+                return phrase
+            if rule == AT_END:
+                rest = text[match.end():].split()
+                if rest and rest[0] == "for" and not _CLAUSE_BREAKS.intersection(rest):
+                    return phrase
+            if rule == WHOLE and match.start() <= core_start and match.end() >= core_end:
+                return phrase
+        
+        return None
     
     def select_task(
         self,
@@ -209,6 +281,36 @@ class ConversationCloser:
         # Default: Hydration (always safe and beneficial)
         return "hydration"
     
+    @staticmethod
+    def _confirmation_text(task: str, todoist_success: bool) -> str:
+        """Build the confirmation message for one task."""
+        if todoist_success:
+            return (
+                f"Before you go, I've added one small care task for you today:\n\n"
+                f"📝 {task}\n\n"
+                f"I've saved it to Todoist for you 💗\n\n"
+                f"Take care and check back anytime."
+            )
+        return (
+            f"I saved a small care task for you here:\n\n"
+            f"📝 {task}\n\n"
+            f"I wasn't able to sync it to Todoist, but it's safe here for you 💗"
+        )
+    
+    def all_confirmations(self) -> List[str]:
+        """
+        Every confirmation message format_confirmation() can produce.
+        
+        Returns:
+            List of confirmation messages (e.g. for TTS pre-synthesis)
+        """
+        return [
+            self._confirmation_text(task, todoist_success)
+            for tasks in self.CARE_TASKS.values()
+            for task in tasks
+            for todoist_success in (True, False)
+        ]
+    
     def format_confirmation(
         self,
         task: str,
@@ -224,19 +326,7 @@ class ConversationCloser:
         Returns:
             Formatted confirmation message
         """
-        if todoist_success:
-            message = (
-                f"Before you go, I've added one small care task for you today:\n\n"
-                f"📝 {task}\n\n"
-                f"I've saved it to Todoist for you 💗\n\n"
-                f"Take care and check back anytime."
-            )
-        else:
-            message = (
-                f"I saved a small care task for you here:\n\n"
-                f"📝 {task}\n\n"
-                f"I wasn't able to sync it to Todoist, but it's safe here for you 💗"
-            )
+        message = self._confirmation_text(task, todoist_success)
         
         logger.info(f"✅ Confirmation formatted: Todoist success = {todoist_success}")
         return message
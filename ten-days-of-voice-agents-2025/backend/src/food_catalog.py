@@ -0,0 +1,425 @@
+"""Compiled, memory-mapped columnar food catalog."""
+
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import logging
+import zlib
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("food_catalog")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+MAGIC = b"FOODCAT2"
+# magic, food count, allergen count, nutrient count, hash capacity, longest key in tokens,
+# token count, token hash capacity
+HEADER = struct.Struct("<8sIIIIIII")
+SECTIONS = (
+    "strings",         # UTF-8 string table
+    "name_ref",        # uint32 (offset, length) per food
+    "key_ref",         # uint32 (offset, length) of the normalized lookup key per food
+    "benefit_ref",     # uint32 (offset, length) per food
+    "allergen_mask",   # uint64 per food, bit i = allergen i
+    "trimester_mask",  # uint8 per food, bit t-1 = listed for trimester t
+    "nutrients",       # float32 [nutrient][food], NaN when unknown
+    "allergen_ref",    # uint32 (offset, length) per allergen name
+    "nutrient_ref",    # uint32 (offset, length) per nutrient name
+    "hash_table",      # uint32 open-addressing table of food id + 1 (0 = empty)
+    "token_ref",       # uint32 (offset, length) per distinct name token
+    "postings_ref",    # uint32 (start, count) per token into postings
+    "postings",        # uint32 food ids per token, ascending
+    "token_table",     # uint32 open-addressing table of token id + 1 (0 = empty)
+    "curated",         # UTF-8 JSON of foods.json without safe_foods (avoid list, aliases)
+)
+SECTION_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))
+
+
+def _singular(token: str) -> str:
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("oes"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def food_tokens(text: str) -> Tuple[str, ...]:
+    """Lowercase, singularized word tokens of a food name or query."""
+    return tuple(_singular(token) for token in _TOKEN.findall(text.lower().replace("'", "")))
+
+
+def food_key(tokens: Iterable[str]) -> str:
+    """Catalog lookup key for a tokenized food name."""
+    return " ".join(tokens)
+
+
+def _hash_slot(key: bytes, capacity: int) -> int:
+    return zlib.crc32(key) & (capacity - 1)
+
+
+class FoodRecord(NamedTuple):
+    """One food, decoded from the catalog on demand."""
+
+    name: str
+    benefit: str
+    allergens: Tuple[str, ...]
+    trimesters: Tuple[int, ...]
+    nutrients: Mapping[str, float]
+
+    def as_food(self) -> dict:
+        """The record in foods.json shape (name, benefit, allergens)."""
+        return {"name": self.name, "benefit": self.benefit, "allergens": list(self.allergens)}
+
+
+def compile_catalog(foods_data: Mapping) -> bytes:
+    """
+    Compile foods.json-style safe_foods into the columnar catalog format.
+
+    Foods listed under several trimesters become one record with several
+    trimester bits; foods may carry an optional {"nutrients": {name: value}}.
+
+    Args:
+        foods_data: Parsed foods.json
+
+    Returns:
+        Catalog file contents
+    """
+    strings = io.BytesIO()
+    interned: Dict[str, Tuple[int, int]] = {}
+
+    def ref(text: str) -> Tuple[int, int]:
+        if text not in interned:
+            data = text.encode("utf-8")
+            interned[text] = (strings.tell(), len(data))
+            strings.write(data)
+        return interned[text]
+
+    foods: List[dict] = []
+    by_key: Dict[str, int] = {}
+    trimester_masks: List[int] = []
+    allergens: Dict[str, int] = {}
+    nutrient_names: Dict[str, int] = {}
+    max_key_tokens = 0
+
+    for trimester_key, trimester_foods in foods_data.get("safe_foods", {}).items():
+        trimester = int(trimester_key.rsplit("_", 1)[-1])
+        for food in trimester_foods:
+            tokens = food_tokens(food["name"])
+            key = food_key(tokens)
+            if key not in by_key:
+                by_key[key] = len(foods)
+                foods.append(food)
+                trimester_masks.append(0)
+                max_key_tokens = max(max_key_tokens, len(tokens))
+                for allergen in food.get("allergens", []):
+                    allergens.setdefault(allergen.lower(), len(allergens))
+                for nutrient in food.get("nutrients", {}):
+                    nutrient_names.setdefault(nutrient, len(nutrient_names))
+            trimester_masks[by_key[key]] |= 1 << (trimester - 1)
+
+    if len(allergens) > 64:
+        raise ValueError("The catalog supports at most 64 distinct allergens")
+
+    count = len(foods)
+    name_ref = np.zeros((count, 2), dtype=np.uint32)
+    key_ref = np.zeros((count, 2), dtype=np.uint32)
+    benefit_ref = np.zeros((count, 2), dtype=np.uint32)
+    allergen_mask = np.zeros(count, dtype=np.uint64)
+    nutrients = np.full((len(nutrient_names), count), np.nan, dtype=np.float32)
+    capacity = 1 << max(3, (2 * count).bit_length())
+    hash_table = np.zeros(capacity, dtype=np.uint32)
+
+    for food_id, (key, food) in enumerate(zip(by_key, foods)):
+        name_ref[food_id] = ref(food["name"])
+        key_ref[food_id] = ref(key)
+        benefit_ref[food_id] = ref(food.get("benefit", ""))
+        mask = 0
+        for allergen in food.get("allergens", []):
+            mask |= 1 << allergens[allergen.lower()]
+        allergen_mask[food_id] = mask
+        for nutrient, value in food.get("nutrients", {}).items():
+            nutrients[nutrient_names[nutrient], food_id] = value
+
+        slot = _hash_slot(key.encode("utf-8"), capacity)
+        while hash_table[slot]:
+            slot = (slot + 1) & (capacity - 1)
+        hash_table[slot] = food_id + 1
+
+    # Token -> food id postings, so part of a name ("potato") finds its foods
+    token_ids: Dict[str, int] = {}
+    token_foods: List[List[int]] = []
+    for food_id, key in enumerate(by_key):
+        for token in dict.fromkeys(key.split()):
+            if token not in token_ids:
+                token_ids[token] = len(token_foods)
+                token_foods.append([])
+            token_foods[token_ids[token]].append(food_id)
+    token_ref = np.array([ref(token) for token in token_ids] or np.zeros((0, 2)), dtype=np.uint32)
+    postings_ref = np.zeros((len(token_foods), 2), dtype=np.uint32)
+    postings = np.zeros(sum(len(ids) for ids in token_foods), dtype=np.uint32)
+    position = 0
+    for token_id, ids in enumerate(token_foods):
+        postings_ref[token_id] = (position, len(ids))
+        postings[position:position + len(ids)] = ids
+        position += len(ids)
+    token_capacity = 1 << max(3, (2 * len(token_ids)).bit_length())
+    token_table = np.zeros(token_capacity, dtype=np.uint32)
+    for token, token_id in token_ids.items():
+        slot = _hash_slot(token.encode("utf-8"), token_capacity)
+        while token_table[slot]:
+            slot = (slot + 1) & (token_capacity - 1)
+        token_table[slot] = token_id + 1
+
+    curated = {key: value for key, value in foods_data.items() if key != "safe_foods"}
+
+    allergen_ref = np.array([ref(name) for name in allergens] or np.zeros((0, 2)), dtype=np.uint32)
+    nutrient_ref = np.array([ref(name) for name in nutrient_names] or np.zeros((0, 2)), dtype=np.uint32)
+
+    sections = {
+        "strings": strings.getvalue(),
+        "name_ref": name_ref.tobytes(),
+        "key_ref": key_ref.tobytes(),
+        "benefit_ref": benefit_ref.tobytes(),
+        "allergen_mask": allergen_mask.astype("<u8").tobytes(),
+        "trimester_mask": np.array(trimester_masks, dtype=np.uint8).tobytes(),
+        "nutrients": nutrients.tobytes(),
+        "allergen_ref": allergen_ref.tobytes(),
+        "nutrient_ref": nutrient_ref.tobytes(),
+        "hash_table": hash_table.tobytes(),
+        "token_ref": token_ref.tobytes(),
+        "postings_ref": postings_ref.tobytes(),
+        "postings": postings.tobytes(),
+        "token_table": token_table.tobytes(),
+        "curated": json.dumps(curated).encode("utf-8"),
+    }
+
+    out = io.BytesIO()
+    out.write(HEADER.pack(
+        MAGIC, count, len(allergens), len(nutrient_names), capacity, max_key_tokens,
+        len(token_ids), token_capacity
+    ))
+    table_position = out.tell()
+    out.write(b"\0" * SECTION_TABLE.size)
+    layout = []
+    for name in SECTIONS:
+        # 8-byte alignment keeps every column a valid zero-copy numpy view
+        out.write(b"\0" * (-out.tell() % 8))
+        layout.extend((out.tell(), len(sections[name])))
+        out.write(sections[name])
+    out.seek(table_position)
+    out.write(SECTION_TABLE.pack(*layout))
+    return out.getvalue()
+
+
+class FoodCatalog:
+    """Read-only view of a compiled food catalog.
+
+    Opened from a file, the catalog is memory-mapped: every worker process
+    maps the same page-cache pages, the columns are zero-copy numpy views,
+    and strings are decoded only for the records actually looked up, so
+    process memory does not grow with the size of the catalog. Names are
+    found through an on-disk open-addressing hash table.
+    """
+
+    def __init__(self, buffer):
+        """
+        Wrap catalog bytes (an mmap or bytes object).
+
+        Args:
+            buffer: Catalog file contents, as produced by compile_catalog()
+        """
+        self._buffer = buffer
+        if len(buffer) < HEADER.size or bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a compiled food catalog (or an older format)")
+        (
+            _, count, allergen_count, nutrient_count, capacity, max_key_tokens, token_count, token_capacity
+        ) = HEADER.unpack_from(buffer, 0)
+        self.count = count
+        self.hash_capacity = capacity
+        self.max_key_tokens = max_key_tokens
+
+        layout = SECTION_TABLE.unpack_from(buffer, HEADER.size)
+        self._sections = {
+            name: (layout[2 * i], layout[2 * i + 1]) for i, name in enumerate(SECTIONS)
+        }
+        self._strings_offset = self._sections["strings"][0]
+        self._name_ref = self._column("name_ref", np.uint32).reshape(-1, 2)
+        self._key_ref = self._column("key_ref", np.uint32).reshape(-1, 2)
+        self._benefit_ref = self._column("benefit_ref", np.uint32).reshape(-1, 2)
+        self.allergen_masks = self._column("allergen_mask", np.dtype("<u8"))
+        self.trimester_masks = self._column("trimester_mask", np.uint8)
+        self._nutrients = self._column("nutrients", np.float32).reshape(nutrient_count, count)
+        self._hash_table = self._column("hash_table", np.uint32)
+        self.token_capacity = token_capacity
+        self._token_ref = self._column("token_ref", np.uint32).reshape(-1, 2)
+        self._postings_ref = self._column("postings_ref", np.uint32).reshape(-1, 2)
+        self._postings = self._column("postings", np.uint32)
+        self._token_table = self._column("token_table", np.uint32)
+
+        # The few small name tables are decoded up front
+        self.allergen_names = tuple(
+            self._string(ref) for ref in self._column("allergen_ref", np.uint32).reshape(-1, 2)
+        )
+        self.nutrient_names = tuple(
+            self._string(ref) for ref in self._column("nutrient_ref", np.uint32).reshape(-1, 2)
+        )
+
+    @classmethod
+    def open(cls, path: str) -> "FoodCatalog":
+        """Memory-map a compiled catalog file."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_foods(cls, foods_data: Mapping) -> "FoodCatalog":
+        """Compile a catalog in memory (for small or ad-hoc catalogs)."""
+        return cls(compile_catalog(foods_data))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _column(self, name: str, dtype) -> np.ndarray:
+        offset, length = self._sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self._buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+    def _bytes(self, ref) -> bytes:
+        start = self._strings_offset + int(ref[0])
+        return self._buffer[start:start + int(ref[1])]
+
+    def _string(self, ref) -> str:
+        return bytes(self._bytes(ref)).decode("utf-8")
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Look up a food id by its normalized key (see food_key()).
+
+        Returns:
+            Food id, or None if the catalog has no such food
+        """
+        encoded = key.encode("utf-8")
+        slot = _hash_slot(encoded, self.hash_capacity)
+        while True:
+            food_id = int(self._hash_table[slot])
+            if food_id == 0:
+                return None
+            if self._bytes(self._key_ref[food_id - 1]) == encoded:
+                return food_id - 1
+            slot = (slot + 1) & (self.hash_capacity - 1)
+
+    def token_postings(self, token: str) -> np.ndarray:
+        """
+        Ids of the foods whose name contains a (singularized) token.
+
+        Returns:
+            Ascending food ids, a zero-copy view of the catalog
+        """
+        encoded = token.encode("utf-8")
+        slot = _hash_slot(encoded, self.token_capacity)
+        while True:
+            token_id = int(self._token_table[slot])
+            if token_id == 0:
+                return self._postings[:0]
+            if self._bytes(self._token_ref[token_id - 1]) == encoded:
+                start, length = (int(value) for value in self._postings_ref[token_id - 1])
+                return self._postings[start:start + length]
+            slot = (slot + 1) & (self.token_capacity - 1)
+
+    def curated(self) -> Mapping:
+        """The rest of foods.json: avoid list, aliases and other small tables."""
+        offset, length = self._sections["curated"]
+        return json.loads(bytes(self._buffer[offset:offset + length]).decode("utf-8"))
+
+    def name(self, food_id: int) -> str:
+        """Display name of a food."""
+        return self._string(self._name_ref[food_id])
+
+    def benefit(self, food_id: int) -> str:
+        """Pregnancy benefit of a food."""
+        return self._string(self._benefit_ref[food_id])
+
+    def allergens(self, food_id: int) -> Tuple[str, ...]:
+        """Allergen names of a food."""
+        mask = int(self.allergen_masks[food_id])
+        return tuple(name for bit, name in enumerate(self.allergen_names) if mask >> bit & 1)
+
+    def nutrient(self, food_id: int, nutrient: str) -> Optional[float]:
+        """One nutrient value of a food, or None if unknown."""
+        if nutrient not in self.nutrient_names:
+            return None
+        value = float(self._nutrients[self.nutrient_names.index(nutrient), food_id])
+        return None if np.isnan(value) else value
+
+    def record(self, food_id: int) -> FoodRecord:
+        """Decode every field of one food."""
+        trimester_mask = int(self.trimester_masks[food_id])
+        values = self._nutrients[:, food_id]
+        return FoodRecord(
+            name=self.name(food_id),
+            benefit=self.benefit(food_id),
+            allergens=self.allergens(food_id),
+            trimesters=tuple(t for t in range(1, 9) if trimester_mask >> (t - 1) & 1),
+            nutrients={
+                name: float(value)
+                for name, value in zip(self.nutrient_names, values)
+                if not np.isnan(value)
+            },
+        )
+
+    def trimester_ids(self, trimester: int) -> np.ndarray:
+        """Ids of the foods listed for a trimester, in catalog order."""
+        return np.flatnonzero(self.trimester_masks & np.uint8(1 << (trimester - 1)))
+
+
+def load_food_catalog(
+    catalog_file: str,
+    foods_data: Optional[Mapping] = None,
+    source_file: Optional[str] = None
+) -> FoodCatalog:
+    """
+    Open the compiled catalog, (re)compiling it first if missing or stale.
+
+    foods.json is only parsed when the catalog has to be compiled, so a
+    worker starting on an up-to-date catalog never holds the full dataset.
+    The compiled file is replaced atomically, so worker processes starting
+    at the same time never map a half-written catalog.
+
+    Args:
+        catalog_file: Path of the compiled catalog
+        foods_data: Parsed foods.json; read from source_file if omitted
+        source_file: foods.json path, whose mtime decides staleness
+
+    Returns:
+        Memory-mapped FoodCatalog
+    """
+    stale = not os.path.exists(catalog_file) or (
+        source_file is not None
+        and os.path.exists(source_file)
+        and os.path.getmtime(source_file) > os.path.getmtime(catalog_file)
+    )
+    if not stale:
+        try:
+            return FoodCatalog.open(catalog_file)
+        except ValueError as e:
+            logger.warning(f"Recompiling food catalog {catalog_file}: {e}")
+
+    if foods_data is None:
+        if source_file is None:
+            raise ValueError("A stale food catalog needs foods_data or source_file")
+        with open(source_file, 'r', encoding='utf-8') as f:
+            foods_data = json.load(f)
+    tmp_path = f"{catalog_file}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compile_catalog(foods_data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, catalog_file)
+    logger.info(f"Compiled food catalog: {catalog_file}")
+    return FoodCatalog.open(catalog_file)
@@ -0,0 +1,368 @@
+"""Normalized token and alias index over the food catalog."""
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from food_catalog import FoodCatalog, food_key, food_tokens
+from fuzzy_index import FuzzyIndex, phonetic_key
+
+_PARENTHETICAL = re.compile(r"\(([^)]*)\)")
+
+# Catalog foods examined per partial-name lookup, however common the word
+MAX_POSTINGS_SCAN = 1024
+
+
+def name_aliases(name: str) -> List[str]:
+    """
+    Names a catalog entry can be referred to by.
+
+    "High-mercury fish (shark, swordfish)" is known as itself, as
+    "High-mercury fish", and as "shark" and "swordfish". Qualifiers such
+    as "(unless heated)" or "(>200mg/day)" are not aliases.
+    """
+    aliases = [name]
+    base = _PARENTHETICAL.sub("", name).strip()
+    if base and base != name:
+        aliases.append(base)
+    for group in _PARENTHETICAL.findall(name):
+        for item in group.split(","):
+            item = item.strip()
+            if item and re.fullmatch(r"[A-Za-z' -]+", item) and not item.lower().startswith("unless"):
+                aliases.append(item)
+    return aliases
+
+
+class FoodEntry(NamedTuple):
+    """One catalog entry: an avoid-list item or a safe food."""
+
+    name: str
+    avoid: bool
+    food: Optional[Mapping]
+    allergen_mask: int = 0
+
+
+class FoodMatch(NamedTuple):
+    """A catalog entry found for a query, and the alias that matched."""
+
+    entry: FoodEntry
+    alias: str
+
+
+class Partition(NamedTuple):
+    """A trimester's catalog foods split for one allergy set."""
+
+    food_ids: np.ndarray
+    safe_ids: np.ndarray
+
+
+class FoodIndex:
+    """Hash-probe lookup of foods by name or alias.
+
+    Safe foods live in the compiled FoodCatalog and are found through its
+    on-disk hash table by normalized name, so this index only keeps the
+    small curated part in memory: the avoid list and the alias table.
+    Every alias is reduced to singularized word tokens; whole aliases are
+    kept in a phrase table (one dict probe for an exact name) and every
+    token has a postings list of the aliases containing it; the catalog
+    stores the same postings for its food names, on disk. Avoid-list
+    entries win over safe foods, except when the query is exactly a safe
+    food's name ("eggs" is safe, "raw eggs" is not). A query may be part
+    of a name ("fish"), but curated aliases are specific varieties and
+    must be named in full ("tuna" is not "bigeye tuna"). Misheard names
+    ("sushy", "keesh") are answered by suggest() from a phonetic trigram
+    index, built on first use.
+    """
+
+    def __init__(self, foods_data: Mapping, catalog: Optional[FoodCatalog] = None):
+        """
+        Build the indexes.
+
+        Args:
+            foods_data: Parsed foods.json (foods_to_avoid, food_aliases; safe_foods
+                only when no catalog is given)
+            catalog: Compiled catalog of the safe foods; compiled in memory if omitted
+        """
+        self.catalog = catalog if catalog is not None else FoodCatalog.from_foods(foods_data)
+        # One bit per catalog allergen, as stored in the catalog's allergen masks
+        self.allergen_bits: Dict[str, int] = {
+            name: 1 << bit for bit, name in enumerate(self.catalog.allergen_names)
+        }
+        # Singularized allergen name -> bit, to recognize "nuts" in a query
+        self._allergen_tokens: Dict[str, int] = {
+            food_key(food_tokens(name)): bit for name, bit in self.allergen_bits.items()
+        }
+        # alias id -> (avoid entry or catalog food id, alias text, alias tokens)
+        self._aliases: List[Tuple[Union[FoodEntry, int], str, Tuple[str, ...]]] = []
+        self._phrases: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        # Curated aliases only match when named in full ("tuna" is not "bigeye tuna")
+        self._whole_only: set = set()
+        self._partitions: Dict[Tuple[str, int], Partition] = {}
+        self._fuzzy: Optional[FuzzyIndex] = None
+        self.max_alias_tokens = self.catalog.max_key_tokens
+
+        extra_aliases = dict(foods_data.get("food_aliases", {}))
+        for name in foods_data.get("foods_to_avoid", []):
+            entry = FoodEntry(name, True, None)
+            for alias in name_aliases(name):
+                self._add_alias(entry, alias)
+            for alias in extra_aliases.pop(name, ()):
+                self._add_alias(entry, alias, whole_only=True)
+
+        # Remaining curated aliases point at catalog foods
+        for name, aliases in extra_aliases.items():
+            food_id = self.catalog.find(food_key(food_tokens(name)))
+            if food_id is not None:
+                for alias in aliases:
+                    self._add_alias(food_id, alias, whole_only=True)
+
+    def __len__(self) -> int:
+        return len(self.catalog)
+
+    def _add_alias(self, target: Union[FoodEntry, int], alias: str, whole_only: bool = False):
+        tokens = food_tokens(alias)
+        if not tokens:
+            return
+        alias_id = len(self._aliases)
+        self._aliases.append((target, alias, tokens))
+        if whole_only:
+            self._whole_only.add(alias_id)
+        self._phrases[tokens].append(alias_id)
+        for token in set(tokens):
+            self._postings[token].append(alias_id)
+        self.max_alias_tokens = max(self.max_alias_tokens, len(tokens))
+
+    def catalog_entry(self, food_id: int) -> FoodEntry:
+        """Decode a catalog food into a FoodEntry."""
+        record = self.catalog.record(food_id)
+        return FoodEntry(record.name, False, record.as_food(), int(self.catalog.allergen_masks[food_id]))
+
+    def _match(self, alias_id: int) -> FoodMatch:
+        target, alias, _ = self._aliases[alias_id]
+        entry = target if isinstance(target, FoodEntry) else self.catalog_entry(target)
+        return FoodMatch(entry, alias)
+
+    def _is_avoid(self, alias_id: int) -> bool:
+        return isinstance(self._aliases[alias_id][0], FoodEntry)
+
+    def _phrase_match(self, tokens: Tuple[str, ...]) -> Optional[FoodMatch]:
+        """Exact alias or catalog name for a token sequence."""
+        alias_ids = self._phrases.get(tokens)
+        if alias_ids:
+            # Avoid-list aliases are indexed first, so the lowest id wins
+            return self._match(min(alias_ids))
+        food_id = self.catalog.find(food_key(tokens))
+        if food_id is not None:
+            entry = self.catalog_entry(food_id)
+            return FoodMatch(entry, entry.name)
+        return None
+
+    def allergen_mask(self, allergies: Iterable[str]) -> int:
+        """
+        Bitmask of the catalog allergens in an allergy list.
+
+        Args:
+            allergies: Lowercase allergy names (unknown ones are ignored)
+
+        Returns:
+            OR of the matching allergen bits
+        """
+        mask = 0
+        for allergy in allergies:
+            mask |= self.allergen_bits.get(allergy, 0)
+        return mask
+
+    def partition(self, trimester_key: str, allergy_mask: int) -> Partition:
+        """
+        Split a trimester's foods into all and allergen-free food ids.
+
+        The split is one vectorized AND over the catalog's allergen mask
+        column, computed once per (trimester, allergy set) and shared.
+        Records are decoded by the caller, only for the ids it uses.
+
+        Args:
+            trimester_key: e.g. "trimester_2"
+            allergy_mask: Result of allergen_mask() for the user's allergies
+
+        Returns:
+            Partition of catalog food ids, in catalog order
+        """
+        key = (trimester_key, allergy_mask)
+        partition = self._partitions.get(key)
+        if partition is None:
+            food_ids = self.catalog.trimester_ids(int(trimester_key.rsplit("_", 1)[-1]))
+            conflicts = self.catalog.allergen_masks[food_ids] & np.uint64(allergy_mask)
+            partition = Partition(food_ids=food_ids, safe_ids=food_ids[conflicts == 0])
+            self._partitions[key] = partition
+        return partition
+
+    def _iter_phrase_matches(self, tokens: Tuple[str, ...]) -> Iterator[FoodMatch]:
+        # At each word the longest alias or catalog name starting there wins
+        position = 0
+        while position < len(tokens):
+            longest = min(self.max_alias_tokens, len(tokens) - position)
+            for length in range(longest, 0, -1):
+                match = self._phrase_match(tokens[position:position + length])
+                if match is not None:
+                    yield match
+                    position += length
+                    break
+            else:
+                position += 1
+
+    def extract(self, text: str) -> List[FoodMatch]:
+        """
+        Find every catalog food named in an utterance, in one left-to-right pass.
+
+        At each word the longest alias starting there wins ("raw eggs"
+        before "eggs"), and scanning resumes after it.
+
+        Args:
+            text: Free text, e.g. "can I have sushi, coffee and brie"
+
+        Returns:
+            One match per catalog entry, in order of mention
+        """
+        matches = []
+        seen = set()
+        for match in self._iter_phrase_matches(food_tokens(text)):
+            if match.entry.name not in seen:
+                seen.add(match.entry.name)
+                matches.append(match)
+        return matches
+
+    def _fuzzy_index(self) -> FuzzyIndex:
+        # Only needed when an exact lookup fails, so built lazily; aliases
+        # come first so an avoid-list phrase keeps its payload on a clash
+        if self._fuzzy is None:
+            phrases: Dict[str, Union[FoodEntry, int]] = {}
+            for target, alias, _ in self._aliases:
+                phrases.setdefault(alias, target)
+            for food_id in range(len(self.catalog)):
+                phrases.setdefault(self.catalog.name(food_id), food_id)
+            self._fuzzy = FuzzyIndex(phrases, min_score=0.75, normalizer=phonetic_key)
+        return self._fuzzy
+
+    def suggest(self, query: str, limit: int = 3) -> List[FoodMatch]:
+        """
+        "Did you mean" candidates for a misheard or misspelled food name.
+
+        Candidates are near-matches by phonetic trigrams and edit distance.
+        Avoid-list entries are ranked before safe foods whatever their
+        score, so a near-miss of something unsafe is always flagged.
+
+        Args:
+            query: Food name as transcribed (e.g. "sushy", "keesh")
+            limit: Maximum number of candidates
+
+        Returns:
+            One FoodMatch per catalog entry, avoid-list entries first
+        """
+        candidates = self._fuzzy_index().search(query, limit=limit * 2)
+        candidates.sort(key=lambda match: (not isinstance(match.payload, FoodEntry), -match.score))
+
+        matches = []
+        seen = set()
+        for candidate in candidates:
+            target = candidate.payload
+            entry = target if isinstance(target, FoodEntry) else self.catalog_entry(target)
+            if entry.name not in seen:
+                seen.add(entry.name)
+                matches.append(FoodMatch(entry, candidate.phrase))
+        return matches[:limit]
+
+    def allergen_match(self, query: str, allergy_mask: int) -> Optional[FoodMatch]:
+        """
+        A catalog food carrying an allergen the query names ("nuts").
+
+        Foods whose name contains the allergen word come first, so "nuts"
+        finds Walnuts before Almonds.
+
+        Args:
+            query: Food name or phrase
+            allergy_mask: Allergen bits to consider (see allergen_mask())
+
+        Returns:
+            FoodMatch with the allergen as its alias, or None
+        """
+        for token in food_tokens(query):
+            bit = self._allergen_tokens.get(token, 0) & allergy_mask
+            if not bit:
+                continue
+            food_ids = [
+                int(food_id)
+                for food_id in np.flatnonzero(self.catalog.allergen_masks & np.uint64(bit))[:MAX_POSTINGS_SCAN]
+            ]
+            if not food_ids:
+                continue
+            food_id = next((i for i in food_ids if token in self.catalog.name(i).lower()), food_ids[0])
+            allergen = next(name for name, name_bit in self.allergen_bits.items() if name_bit == bit)
+            return FoodMatch(self.catalog_entry(food_id), allergen)
+        return None
+
+    def _first_food_with(self, tokens: Iterable[str]) -> Optional[int]:
+        """Lowest catalog food id whose name has every token, from the on-disk postings."""
+        postings = sorted((self.catalog.token_postings(token) for token in tokens), key=len)
+        if not postings or not len(postings[0]):
+            return None
+        # Candidates come from the rarest token, capped for very common ones
+        candidates = postings[0][:MAX_POSTINGS_SCAN]
+        for other in postings[1:]:
+            candidates = candidates[np.isin(candidates, other, assume_unique=True)]
+        return int(candidates[0]) if len(candidates) else None
+
+    def lookup(self, query: str) -> Optional[FoodMatch]:
+        """
+        Find the catalog entry a food name or short phrase refers to.
+
+        Args:
+            query: Food name or phrase (e.g. "sushi", "raw eggs", "fish")
+
+        Returns:
+            Best FoodMatch, or None if no alias shares enough words
+        """
+        tokens = food_tokens(query)
+        if not tokens:
+            return None
+
+        # Exact name: a hash probe in memory, then one in the catalog
+        exact = self._phrase_match(tokens)
+        if exact is not None:
+            return exact
+
+        # Otherwise count, per candidate alias, how many query words it contains
+        query_tokens = set(tokens)
+        shared: Dict[int, int] = defaultdict(int)
+        for token in query_tokens:
+            for alias_id in self._postings.get(token, ()):
+                shared[alias_id] += 1
+
+        best = None
+        best_rank = None
+        for alias_id, count in shared.items():
+            alias_size = len(set(self._aliases[alias_id][2]))
+            # The whole alias is in the query, or the whole query is in a name
+            if count != alias_size and (count != len(query_tokens) or alias_id in self._whole_only):
+                continue
+            rank = (not self._is_avoid(alias_id), -count, 0, alias_id)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = alias_id, rank
+
+        # The whole query is in a catalog food's name ("potato", "tea")
+        food_id = self._first_food_with(query_tokens)
+        if food_id is not None:
+            rank = (True, -len(query_tokens), 1, food_id)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = food_id, rank
+
+        if best is not None:
+            if best_rank[2]:
+                entry = self.catalog_entry(best)
+                return FoodMatch(entry, entry.name)
+            return self._match(best)
+
+        # A catalog food named somewhere inside a longer query
+        return next(self._iter_phrase_matches(tokens), None)
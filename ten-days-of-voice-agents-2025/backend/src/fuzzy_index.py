@@ -0,0 +1,215 @@
+"""Typo- and mishearing-tolerant phrase lookup over character n-gram postings."""
+
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Spelling variants an English speaker (or a transcriber) uses for the same sound
+_PHONETIC_RULES = [
+    (re.compile(pattern), replacement)
+    for pattern, replacement in (
+        (r"ph", "f"),
+        (r"qu", "k"),
+        (r"ck", "k"),
+        (r"che$", "sh"),
+        (r"c(?=[eiy])", "s"),
+        (r"c(?!h)", "k"),
+        (r"ee|ea|ie", "i"),
+        (r"y$", "i"),
+        (r"ti(?=on)", "sh"),
+        (r"(.)\1", r"\1"),
+    )
+]
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower().replace("’", "'").replace("'", ""))
+
+
+def _ngrams(compact: str, n: int) -> set:
+    padded = f"^{compact}$"
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def phonetic_key(compact: str) -> str:
+    """
+    Fold spellings that sound alike onto one form.
+
+    "keesh" and "quiche" both become "kish", "sushy" becomes "sushi".
+    Meant as a FuzzyIndex normalizer for words that are heard, not read.
+    """
+    for pattern, replacement in _PHONETIC_RULES:
+        compact = pattern.sub(replacement, compact)
+    return compact
+
+
+def consonant_key(compact: str) -> str:
+    """
+    Consonant skeleton of a word's phonetic key.
+
+    Misspellings and mishearings mostly get vowels wrong ("nausia",
+    "heartbern") or double a letter ("swellling"); a different word
+    usually swaps a consonant ("smelling", "sweating", "backpack").
+    """
+    key = re.sub(r"[aeiouy]", "", phonetic_key(compact))
+    return re.sub(r"(.)\1+", r"\1", key)
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance between a and b, giving up past max_distance.
+
+    Only the diagonal band of width 2 * max_distance + 1 is computed, and
+    the scan stops as soon as every cell in a row exceeds the bound.
+
+    Returns:
+        The distance, or None if it is greater than max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [max_distance + 1] * (len(b) + 1)
+        if low == 1:
+            current[0] = i
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > max_distance:
+            return None
+        previous = current
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+
+class FuzzyMatch(NamedTuple):
+    """Best approximate occurrence of one indexed phrase in a text."""
+
+    phrase: str
+    score: float
+    text: str
+    payload: Any
+
+
+class FuzzyIndex:
+    """Approximate phrase lookup for noisy (typed or transcribed) text.
+
+    Phrases are indexed by the character n-grams of their space-free form,
+    so "heart burn" finds "heartburn" and "back pain" finds "backpain".
+    A query slides windows of one or more words over the text, counts the
+    n-grams each phrase shares with a window through the postings lists,
+    drops phrases sharing too few to be within min_score (q-gram lemma),
+    and verifies the rest with a banded edit distance. Query cost is capped
+    by max_query_words, independent of how the text was transcribed.
+    """
+
+    def __init__(
+        self,
+        phrases: Union[Iterable[str], Dict[str, Any]],
+        min_score: float = 0.75,
+        ngram_size: int = 3,
+        max_query_words: int = 64,
+        normalizer: Optional[Callable[[str], str]] = None,
+        word_key: Optional[Callable[[str], str]] = None
+    ):
+        """
+        Build the n-gram postings.
+
+        Args:
+            phrases: Phrases, or a mapping of phrase -> payload
+            min_score: Minimum similarity (1 - edits / length) for a match
+            ngram_size: Character n-gram length used for candidate lookup
+            max_query_words: Words of a query considered at most
+            normalizer: Applied to the space-free form of phrases and query
+                windows before comparing them (e.g. phonetic_key)
+            word_key: If given, a window only matches a phrase with the
+                same key (e.g. consonant_key), however close they are by
+                edit distance
+        """
+        if not isinstance(phrases, dict):
+            phrases = {phrase: phrase for phrase in phrases}
+        self.min_score = min_score
+        self.ngram_size = ngram_size
+        self.max_query_words = max_query_words
+        self.normalizer = normalizer
+        self.word_key = word_key
+
+        self._phrases: List[tuple] = []  # (phrase, compact form, n-gram count, payload, word key)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._max_words = 1
+        self._max_length = 0
+        for phrase, payload in phrases.items():
+            words = _words(phrase)
+            if not words:
+                continue
+            compact = self._normalize("".join(words))
+            phrase_id = len(self._phrases)
+            grams = _ngrams(compact, ngram_size)
+            key = word_key("".join(words)) if word_key else None
+            self._phrases.append((phrase, compact, len(grams), payload, key))
+            for gram in grams:
+                self._postings[gram].append(phrase_id)
+            self._max_words = max(self._max_words, len(words))
+            self._max_length = max(self._max_length, len(compact))
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def _normalize(self, compact: str) -> str:
+        return self.normalizer(compact) if self.normalizer else compact
+
+    def search(self, text: str, limit: int = 3) -> List[FuzzyMatch]:
+        """
+        Find indexed phrases that approximately occur in the text.
+
+        Args:
+            text: Free text, e.g. an STT transcript
+            limit: Maximum number of matches returned
+
+        Returns:
+            Best match per phrase, highest score first
+        """
+        words = _words(text)[:self.max_query_words]
+        best: Dict[int, FuzzyMatch] = {}
+        # No window longer than this can be within min_score of any phrase
+        max_window = int(self._max_length / self.min_score)
+
+        # One extra word per window catches phrases split by the transcriber
+        for start in range(len(words)):
+            raw_window = ""
+            for end in range(start + 1, min(len(words), start + self._max_words + 1) + 1):
+                raw_window += words[end - 1]
+                window = self._normalize(raw_window)
+                if len(window) > max_window:
+                    break
+                window_key = self.word_key(raw_window) if self.word_key else None
+
+                window_grams = _ngrams(window, self.ngram_size)
+                shared: Dict[int, int] = defaultdict(int)
+                for gram in window_grams:
+                    for phrase_id in self._postings.get(gram, ()):
+                        shared[phrase_id] += 1
+
+                for phrase_id, shared_count in shared.items():
+                    phrase, compact, gram_count, payload, key = self._phrases[phrase_id]
+                    if window_key is not None and window_key != key:
+                        continue
+                    length = max(len(compact), len(window))
+                    max_edits = int(length * (1 - self.min_score))
+                    # Each edit destroys at most n n-grams (q-gram lemma)
+                    min_shared = max(gram_count, len(window_grams)) - self.ngram_size * max_edits
+                    if shared_count < min_shared or abs(len(compact) - len(window)) > max_edits:
+                        continue
+                    distance = bounded_edit_distance(window, compact, max_edits)
+                    if distance is None:
+                        continue
+                    score = 1 - distance / length
+                    current = best.get(phrase_id)
+                    if current is None or score > current.score:
+                        best[phrase_id] = FuzzyMatch(phrase, score, " ".join(words[start:end]), payload)
+
+        return sorted(best.values(), key=lambda match: -match.score)[:limit]
@@ -0,0 +1,88 @@
+"""Per-day rollups of pregnancy journal entries for fast reports."""
+
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+# Rollup kinds stored for each (day, trimester) bucket
+ENTRIES = "entries"
+EMOTION = "emotion"
+SYMPTOM = "symptom"
+TASK = "task"
+NUTRITION = "nutrition"
+
+
+def entry_day(entry: dict) -> str:
+    """Return the ISO calendar day (YYYY-MM-DD) an entry belongs to."""
+    try:
+        return datetime.fromisoformat(entry["datetime"]).date().isoformat()
+    except (KeyError, TypeError, ValueError):
+        return datetime.now().date().isoformat()
+
+
+def entry_trimester(entry: dict) -> int:
+    """Return the trimester of an entry, or 0 when unknown."""
+    return entry.get("trimester") or 0
+
+
+def rollup_counts(entry: dict) -> List[Tuple[str, str, int]]:
+    """
+    Break one journal entry into (kind, key, count) rollup increments.
+
+    Args:
+        entry: Journal entry dict
+
+    Returns:
+        List of (kind, key, count) tuples
+    """
+    counts: Counter = Counter()
+    counts[(ENTRIES, "")] += 1
+
+    if entry.get("emotional_state"):
+        counts[(EMOTION, entry["emotional_state"])] += 1
+    for symptom in entry.get("symptoms", []):
+        if symptom.get("symptom"):
+            counts[(SYMPTOM, symptom["symptom"])] += 1
+    for task in entry.get("pregnancy_tasks", []):
+        counts[(TASK, task)] += 1
+    if entry.get("nutrition_notes"):
+        counts[(NUTRITION, "")] += len(entry["nutrition_notes"])
+
+    return [(kind, key, count) for (kind, key), count in counts.items()]
+
+
+class JournalRollup:
+    """Merged counts over a set of day buckets."""
+
+    def __init__(self):
+        self.entry_count = 0
+        self.nutrition_count = 0
+        self.emotions: Counter = Counter()
+        self.symptoms: Counter = Counter()
+        self.tasks: Counter = Counter()
+
+    def add(self, kind: str, key: str, count: int):
+        """Add one (kind, key, count) increment to the rollup."""
+        if kind == ENTRIES:
+            self.entry_count += count
+        elif kind == NUTRITION:
+            self.nutrition_count += count
+        elif kind == EMOTION:
+            self.emotions[key] += count
+        elif kind == SYMPTOM:
+            self.symptoms[key] += count
+        elif kind == TASK:
+            self.tasks[key] += count
+
+    @classmethod
+    def from_counts(cls, rows: Iterable[Tuple[str, str, int]]) -> "JournalRollup":
+        """Build a rollup by merging (kind, key, count) rows."""
+        rollup = cls()
+        for kind, key, count in rows:
+            rollup.add(kind, key, count)
+        return rollup
+
+    @property
+    def task_count(self) -> int:
+        return sum(self.tasks.values())
+
@@ -0,0 +1,578 @@
+"""Storage backends for pregnancy journal entries."""
+
+import json
+import os
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from journal_rollup import JournalRollup, entry_day, entry_trimester, rollup_counts
+from storage_utils import (
+    append_json_line,
+    atomic_write_json,
+    iter_json_lines,
+    read_last_json_line,
+)
+
+logger = logging.getLogger("journal_store")
+
+
+class JournalStore(ABC):
+    """Interface every pregnancy journal backend implements."""
+
+    @abstractmethod
+    def append(self, entry: dict) -> None:
+        """Persist one journal entry."""
+
+    @abstractmethod
+    def load_all(self) -> List[dict]:
+        """Return every journal entry in chronological order."""
+
+    @abstractmethod
+    def latest(self) -> Optional[dict]:
+        """Return the most recent journal entry, or None if empty."""
+
+    def latest_tasks(self) -> List[str]:
+        """Return the pregnancy tasks of the most recent entry."""
+        latest_entry = self.latest()
+        if not latest_entry:
+            return []
+        return latest_entry.get("pregnancy_tasks", [])
+
+    @abstractmethod
+    def entries_since(self, since: datetime) -> List[dict]:
+        """Return entries whose datetime is at or after `since`."""
+
+    @abstractmethod
+    def entries_for_trimester(self, trimester: int) -> List[dict]:
+        """Return entries recorded during the given trimester."""
+
+    @abstractmethod
+    def entries_with_symptom(self, symptom: str) -> List[dict]:
+        """Return entries that mention the given symptom."""
+
+    @abstractmethod
+    def rollup(
+        self,
+        since_day: Optional[date] = None,
+        until_day: Optional[date] = None,
+        trimester: Optional[int] = None
+    ) -> JournalRollup:
+        """Merge the daily rollup buckets matching a day range and/or trimester."""
+
+    def close(self) -> None:  # noqa: B027 - optional hook, stores without resources keep the no-op
+        """Release any resources held by the store."""
+
+
+class JsonlJournalStore(JournalStore):
+    """Stores journal entries as one JSON object per line.
+
+    A save appends a single line instead of rewriting the whole history,
+    so its cost does not grow with the number of past entries. Queries
+    scan the file. Daily rollups keyed by "day|trimester" are kept in
+    memory together with the journal offset they cover, and journal lines
+    past that offset are folded in before each read. A snapshot of both is
+    written to a small side file every snapshot_every entries and on
+    close(); after a crash the snapshot is simply behind the journal and
+    the missing tail is folded in on open.
+    """
+
+    def __init__(
+        self,
+        journal_file: str = "pregnancy_data/pregnancy_journal.jsonl",
+        legacy_file: Optional[str] = "pregnancy_data/pregnancy_journal.json",
+        snapshot_every: int = 64
+    ):
+        """
+        Initialize the journal store.
+
+        Args:
+            journal_file: Path to the line-delimited journal
+            legacy_file: Path to the old JSON array journal to migrate from
+            snapshot_every: Entries folded into the rollups between snapshots
+        """
+        self.journal_file = journal_file
+        self.legacy_file = legacy_file
+        self.rollup_file = f"{os.path.splitext(journal_file)[0]}.rollups.json"
+        self.snapshot_every = snapshot_every
+        self._rollup_lock = threading.Lock()
+        self._migrate_legacy_journal()
+
+        self._rollups, self._rollup_offset = self._load_rollups()
+        self._unsaved_entries = 0
+        with self._rollup_lock:
+            self._fold_journal_tail()
+            if self._unsaved_entries:
+                self._save_rollups()
+
+    def _migrate_legacy_journal(self):
+        """One-shot migration from the legacy JSON array journal.
+
+        Runs only while the .jsonl journal does not exist yet. The legacy
+        file is renamed afterwards so the migration never runs twice.
+        """
+        if not self.legacy_file or os.path.exists(self.journal_file):
+            return
+        if not os.path.exists(self.legacy_file):
+            return
+
+        try:
+            with open(self.legacy_file, 'r') as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading legacy pregnancy journal: {e}")
+            return
+
+        if not isinstance(entries, list):
+            logger.error("Legacy pregnancy journal is not a list, skipping migration")
+            return
+
+        # Write the whole converted journal to a temp file first so a crash
+        # mid-migration never leaves a half-written .jsonl behind
+        tmp_file = f"{self.journal_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.journal_file)
+        os.replace(self.legacy_file, f"{self.legacy_file}.migrated")
+
+        logger.info(f"Migrated {len(entries)} pregnancy journal entries to {self.journal_file}")
+
+    def _load_rollups(self) -> Tuple[dict, int]:
+        """Load the rollup snapshot and the journal offset it covers."""
+        if not os.path.exists(self.rollup_file):
+            return {}, 0
+        try:
+            with open(self.rollup_file, 'r') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading journal rollups: {e}")
+            return {}, 0
+        if not isinstance(snapshot, dict) or "offset" not in snapshot:
+            # Snapshot without an offset: rebuild from the whole journal
+            return {}, 0
+        return snapshot.get("buckets", {}), snapshot["offset"]
+
+    def _save_rollups(self):
+        """Write the rollup snapshot; caller must hold the rollup lock."""
+        atomic_write_json(
+            self.rollup_file,
+            {"offset": self._rollup_offset, "buckets": self._rollups},
+            indent=None
+        )
+        self._unsaved_entries = 0
+
+    @staticmethod
+    def _add_to_rollups(rollups: dict, entry: dict):
+        bucket_key = f"{entry_day(entry)}|{entry_trimester(entry)}"
+        bucket = rollups.setdefault(bucket_key, {})
+        for kind, key, count in rollup_counts(entry):
+            kind_counts = bucket.setdefault(kind, {})
+            kind_counts[key] = kind_counts.get(key, 0) + count
+
+    def _fold_journal_tail(self):
+        """Add journal lines past the rollup offset; caller must hold the rollup lock."""
+        if not os.path.exists(self.journal_file):
+            return
+        if os.path.getsize(self.journal_file) < self._rollup_offset:
+            # Journal replaced behind our back: start over
+            self._rollups, self._rollup_offset = {}, 0
+
+        with open(self.journal_file, 'rb') as f:
+            f.seek(self._rollup_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partial line still being written (or torn); fold it once complete
+                    break
+                self._rollup_offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                self._add_to_rollups(self._rollups, entry)
+                self._unsaved_entries += 1
+
+    def append(self, entry: dict) -> None:
+        """
+        Append one journal entry and fsync it to disk.
+
+        Args:
+            entry: Journal entry dict
+        """
+        append_json_line(self.journal_file, entry)
+
+        # Folds just the new line; the snapshot write is amortized
+        with self._rollup_lock:
+            self._fold_journal_tail()
+            if self._unsaved_entries >= self.snapshot_every:
+                self._save_rollups()
+
+    def load_all(self) -> List[dict]:
+        """
+        Load every journal entry in chronological order.
+
+        Returns:
+            List of journal entry dicts
+        """
+        return list(iter_json_lines(self.journal_file))
+
+    def latest(self) -> Optional[dict]:
+        """
+        Get the most recent journal entry by seeking back from the end of file.
+
+        Returns:
+            Latest entry dict, or None if the journal is empty
+        """
+        return read_last_json_line(self.journal_file)
+
+    def entries_since(self, since: datetime) -> List[dict]:
+        since_iso = since.isoformat()
+        return [
+            entry for entry in iter_json_lines(self.journal_file)
+            if entry.get("datetime", "") >= since_iso
+        ]
+
+    def entries_for_trimester(self, trimester: int) -> List[dict]:
+        return [
+            entry for entry in iter_json_lines(self.journal_file)
+            if entry.get("trimester") == trimester
+        ]
+
+    def entries_with_symptom(self, symptom: str) -> List[dict]:
+        symptom_lower = symptom.lower()
+        return [
+            entry for entry in iter_json_lines(self.journal_file)
+            if any(
+                s.get("symptom", "").lower() == symptom_lower
+                for s in entry.get("symptoms", [])
+            )
+        ]
+
+    def rollup(
+        self,
+        since_day: Optional[date] = None,
+        until_day: Optional[date] = None,
+        trimester: Optional[int] = None
+    ) -> JournalRollup:
+        since_iso = since_day.isoformat() if since_day else None
+        until_iso = until_day.isoformat() if until_day else None
+
+        with self._rollup_lock:
+            self._fold_journal_tail()
+            buckets = list(self._rollups.items())
+
+        rollup = JournalRollup()
+        for bucket_key, bucket in buckets:
+            day, bucket_trimester = bucket_key.split("|")
+            if since_iso and day < since_iso:
+                continue
+            if until_iso and day > until_iso:
+                continue
+            if trimester is not None and int(bucket_trimester) != trimester:
+                continue
+            for kind, kind_counts in bucket.items():
+                for key, count in kind_counts.items():
+                    rollup.add(kind, key, count)
+        return rollup
+
+    def close(self) -> None:
+        with self._rollup_lock:
+            if self._unsaved_entries:
+                self._save_rollups()
+
+
+class SqliteJournalStore(JournalStore):
+    """Stores journal entries in an embedded SQLite database.
+
+    Entries are indexed on datetime, pregnancy week and trimester, and the
+    symptoms of each entry are kept in a side table indexed by symptom name,
+    so range queries are index seeks rather than full-history parses. The
+    most recent entry is mirrored into a single-row head table, written in
+    the same transaction as the insert, so latest-entry lookups are constant
+    time whatever the history size. Per-day, per-trimester counts of
+    emotions, symptoms, tasks and nutrition queries are upserted alongside
+    each insert so reports merge a few day buckets instead of raw history.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT NOT NULL,
+            pregnancy_week INTEGER,
+            trimester INTEGER,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_journal_datetime
+            ON journal_entries (datetime);
+        CREATE INDEX IF NOT EXISTS idx_journal_week
+            ON journal_entries (pregnancy_week);
+        CREATE INDEX IF NOT EXISTS idx_journal_trimester
+            ON journal_entries (trimester);
+
+        CREATE TABLE IF NOT EXISTS journal_symptoms (
+            entry_id INTEGER NOT NULL REFERENCES journal_entries (id),
+            symptom TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_journal_symptom
+            ON journal_symptoms (symptom, entry_id);
+
+        CREATE TABLE IF NOT EXISTS journal_head (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            entry_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            pregnancy_tasks TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS journal_daily_rollups (
+            day TEXT NOT NULL,
+            trimester INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, trimester, kind, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_rollup_trimester
+            ON journal_daily_rollups (trimester, day);
+    """
+
+    def __init__(
+        self,
+        db_file: str = "pregnancy_data/pregnancy_journal.db",
+        import_from: Optional[JournalStore] = None
+    ):
+        """
+        Initialize the SQLite journal store.
+
+        Args:
+            db_file: Path to the SQLite database file
+            import_from: Store to import entries from when the database is empty
+        """
+        self.db_file = db_file
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The connection is shared across threads, so all access goes
+        # through self._lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._backfill_head()
+        self._backfill_rollups()
+
+        if import_from is not None:
+            self._import_entries(import_from)
+
+    def _backfill_head(self):
+        """Populate the head table for databases created before it existed."""
+        with self._lock, self._conn:
+            if self._conn.execute("SELECT 1 FROM journal_head").fetchone():
+                return
+            row = self._conn.execute(
+                "SELECT id, data FROM journal_entries ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                self._write_head(row[0], json.loads(row[1]))
+
+    def _backfill_rollups(self):
+        """Populate rollups for databases created before they existed."""
+        with self._lock:
+            has_rollups = self._conn.execute(
+                "SELECT 1 FROM journal_daily_rollups LIMIT 1"
+            ).fetchone()
+            if has_rollups:
+                return
+            rows = self._conn.execute("SELECT data FROM journal_entries").fetchall()
+            if not rows:
+                return
+            with self._conn:
+                for row in rows:
+                    self._write_rollup(json.loads(row[0]))
+
+    def _write_rollup(self, entry: dict):
+        """Add an entry to its day bucket; caller must hold the lock."""
+        day = entry_day(entry)
+        trimester = entry_trimester(entry)
+        self._conn.executemany(
+            "INSERT INTO journal_daily_rollups (day, trimester, kind, key, count) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (day, trimester, kind, key) "
+            "DO UPDATE SET count = count + excluded.count",
+            [(day, trimester, kind, key, count) for kind, key, count in rollup_counts(entry)]
+        )
+
+    def _write_head(self, entry_id: int, entry: dict):
+        """Point the head record at an entry; caller must hold the lock."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO journal_head (id, entry_id, data, pregnancy_tasks) "
+            "VALUES (1, ?, ?, ?)",
+            (
+                entry_id,
+                json.dumps(entry, separators=(',', ':'), ensure_ascii=False),
+                json.dumps(entry.get("pregnancy_tasks", []), ensure_ascii=False),
+            )
+        )
+
+    def _import_entries(self, source: JournalStore):
+        """Import entries from another store once, while this one is empty."""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM journal_entries").fetchone()
+        if row[0] > 0:
+            return
+
+        entries = source.load_all()
+        if not entries:
+            return
+
+        with self._lock, self._conn:
+            for entry in entries:
+                self._insert(entry)
+        logger.info(f"Imported {len(entries)} pregnancy journal entries into {self.db_file}")
+
+    def _insert(self, entry: dict) -> int:
+        """Insert one entry; caller must hold the lock and a transaction."""
+        cursor = self._conn.execute(
+            "INSERT INTO journal_entries (datetime, pregnancy_week, trimester, data) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                entry.get("datetime", datetime.now().isoformat()),
+                entry.get("pregnancy_week"),
+                entry.get("trimester"),
+                json.dumps(entry, separators=(',', ':'), ensure_ascii=False),
+            )
+        )
+        entry_id = cursor.lastrowid
+        symptoms = {
+            s.get("symptom", "").lower()
+            for s in entry.get("symptoms", [])
+            if s.get("symptom")
+        }
+        self._conn.executemany(
+            "INSERT INTO journal_symptoms (entry_id, symptom) VALUES (?, ?)",
+            [(entry_id, symptom) for symptom in symptoms]
+        )
+        self._write_head(entry_id, entry)
+        self._write_rollup(entry)
+        return entry_id
+
+    def _query(self, sql: str, params: tuple = ()) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def append(self, entry: dict) -> None:
+        """
+        Insert one journal entry in its own transaction.
+
+        Args:
+            entry: Journal entry dict
+        """
+        with self._lock, self._conn:
+            self._insert(entry)
+
+    def load_all(self) -> List[dict]:
+        return self._query("SELECT data FROM journal_entries ORDER BY id")
+
+    def latest(self) -> Optional[dict]:
+        rows = self._query("SELECT data FROM journal_head WHERE id = 1")
+        return rows[0] if rows else None
+
+    def latest_tasks(self) -> List[str]:
+        rows = self._query("SELECT pregnancy_tasks FROM journal_head WHERE id = 1")
+        return rows[0] if rows else []
+
+    def entries_since(self, since: datetime) -> List[dict]:
+        return self._query(
+            "SELECT data FROM journal_entries WHERE datetime >= ? ORDER BY datetime",
+            (since.isoformat(),)
+        )
+
+    def entries_for_trimester(self, trimester: int) -> List[dict]:
+        return self._query(
+            "SELECT data FROM journal_entries WHERE trimester = ? ORDER BY id",
+            (trimester,)
+        )
+
+    def entries_with_symptom(self, symptom: str) -> List[dict]:
+        return self._query(
+            "SELECT e.data FROM journal_symptoms s "
+            "JOIN journal_entries e ON e.id = s.entry_id "
+            "WHERE s.symptom = ? ORDER BY e.id",
+            (symptom.lower(),)
+        )
+
+    def rollup(
+        self,
+        since_day: Optional[date] = None,
+        until_day: Optional[date] = None,
+        trimester: Optional[int] = None
+    ) -> JournalRollup:
+        conditions = []
+        params: list = []
+        if since_day:
+            conditions.append("day >= ?")
+            params.append(since_day.isoformat())
+        if until_day:
+            conditions.append("day <= ?")
+            params.append(until_day.isoformat())
+        if trimester is not None:
+            conditions.append("trimester = ?")
+            params.append(trimester)
+
+        sql = "SELECT kind, key, SUM(count) FROM journal_daily_rollups"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " GROUP BY kind, key"
+
+        with self._lock:
+            rows = self._conn.execute(sql, tuple(params)).fetchall()
+        return JournalRollup.from_counts(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_journal_store(
+    data_dir: str = "pregnancy_data",
+    backend: Optional[str] = None
+) -> JournalStore:
+    """
+    Create the configured journal store.
+
+    Args:
+        data_dir: Directory holding the journal files
+        backend: "sqlite" or "jsonl"; defaults to $JOURNAL_STORE or "sqlite"
+
+    Returns:
+        A JournalStore instance
+    """
+    backend = (backend or os.getenv("JOURNAL_STORE", "sqlite")).lower()
+
+    def jsonl_store() -> JsonlJournalStore:
+        return JsonlJournalStore(
+            journal_file=os.path.join(data_dir, "pregnancy_journal.jsonl"),
+            legacy_file=os.path.join(data_dir, "pregnancy_journal.json")
+        )
+
+    if backend == "jsonl":
+        return jsonl_store()
+    if backend == "sqlite":
+        db_file = os.path.join(data_dir, "pregnancy_journal.db")
+        # The JSONL (and legacy JSON) journal is only read to seed a new database
+        return SqliteJournalStore(
+            db_file=db_file,
+            import_from=None if os.path.exists(db_file) else jsonl_store()
+        )
+
+    raise ValueError(f"Unknown journal store backend: {backend}")
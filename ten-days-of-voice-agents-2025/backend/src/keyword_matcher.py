@@ -0,0 +1,203 @@
+"""Aho-Corasick multi-keyword matcher with word-boundary awareness."""
+
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, unify apostrophes and collapse whitespace runs."""
+    return _WHITESPACE.sub(" ", text.lower().replace("’", "'"))
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "'"
+
+
+class KeywordMatch(NamedTuple):
+    """One keyword occurrence in a normalized text."""
+
+    keyword: str
+    start: int
+    end: int
+    payload: Any
+
+
+class KeywordMatcher:
+    """Finds every keyword occurrence in one pass over the text.
+
+    The keywords are compiled once into an Aho-Corasick automaton, so the
+    cost of a scan depends on the length of the text (plus the number of
+    hits), not on how many keywords there are.
+
+    A hit must start at a word boundary, so "ty" never fires inside
+    "empty". With require_end_boundary=False the keyword may be followed
+    by more letters ("headache" matches "headaches", "blood" matches
+    "bloody"), which is what safety keywords want.
+    """
+
+    def __init__(
+        self,
+        keywords: Union[Iterable[str], Dict[str, Any]],
+        require_end_boundary: bool = False
+    ):
+        """
+        Compile the automaton.
+
+        Args:
+            keywords: Keywords, or a mapping of keyword -> payload
+            require_end_boundary: Reject hits followed by a word character
+        """
+        if not isinstance(keywords, dict):
+            keywords = {keyword: keyword for keyword in keywords}
+        self.require_end_boundary = require_end_boundary
+
+        self._keywords: List[Tuple[str, Any]] = []
+        # State 0 is the root; each state has goto edges, a failure link and outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[int]] = [[]]
+
+        for keyword, payload in keywords.items():
+            normalized = normalize_text(keyword).strip()
+            if normalized:
+                self._add(normalized, payload)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def _add(self, keyword: str, payload: Any):
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._outputs[state].append(len(self._keywords))
+        self._keywords.append((keyword, payload))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                # Inherit the outputs of the longest proper suffix
+                self._outputs[next_state] = (
+                    self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                )
+
+    def step(self, state: int, ch: str) -> int:
+        """Advance the automaton by one (already normalized) character."""
+        while state and ch not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(ch, 0)
+
+    def _accept(self, text: str, keyword_index: int, end: int) -> Optional[KeywordMatch]:
+        """Check the word boundaries of a candidate hit ending at `end`."""
+        keyword, payload = self._keywords[keyword_index]
+        start = end - len(keyword)
+        if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(keyword[0]):
+            return None
+        if (
+            self.require_end_boundary
+            and end < len(text)
+            and _is_word_char(text[end])
+            and _is_word_char(keyword[-1])
+        ):
+            return None
+        return KeywordMatch(keyword, start, end, payload)
+
+    def iter_matches(self, text: str) -> Iterator[KeywordMatch]:
+        """
+        Yield keyword occurrences as the scan reaches them.
+
+        Args:
+            text: Free text (normalized internally)
+
+        Yields:
+            Matches in order of their end position
+        """
+        text = normalize_text(text)
+        state = 0
+        for position, ch in enumerate(text):
+            state = self.step(state, ch)
+            for keyword_index in self._outputs[state]:
+                match = self._accept(text, keyword_index, position + 1)
+                if match is not None:
+                    yield match
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Return every keyword occurrence in the text."""
+        return list(self.iter_matches(text))
+
+    def find_first(self, text: str) -> Optional[KeywordMatch]:
+        """Return the first keyword occurrence, stopping the scan there."""
+        return next(self.iter_matches(text), None)
+
+
+class StreamingKeywordScanner:
+    """Incremental KeywordMatcher scan over a growing, revisable transcript.
+
+    STT interim results re-send the whole utterance so far, usually as the
+    previous text plus a few new characters, sometimes with the tail
+    revised. The scanner keeps the automaton state after every character
+    it has seen, so each update only scans from the first changed
+    character onwards, and every hit is reported once per utterance.
+    """
+
+    def __init__(self, matcher: KeywordMatcher):
+        self.matcher = matcher
+        self.reset()
+
+    def reset(self):
+        """Forget the current utterance (call after a final transcript)."""
+        self._text = ""
+        self._states = [0]
+        self._reported = set()
+
+    def update(self, transcript: str) -> List[KeywordMatch]:
+        """
+        Scan the latest version of the current utterance.
+
+        Args:
+            transcript: Full interim or final transcript of the utterance
+
+        Returns:
+            Hits not reported earlier in this utterance
+        """
+        text = normalize_text(transcript)
+
+        # Resume from the automaton state at the end of the unchanged prefix
+        prefix = 0
+        limit = min(len(text), len(self._text))
+        while prefix < limit and text[prefix] == self._text[prefix]:
+            prefix += 1
+        del self._states[prefix + 1:]
+        self._text = text
+
+        new_hits = []
+        state = self._states[prefix]
+        for position in range(prefix, len(text)):
+            state = self.matcher.step(state, text[position])
+            self._states.append(state)
+            for keyword_index in self.matcher._outputs[state]:
+                match = self.matcher._accept(text, keyword_index, position + 1)
+                if match is None:
+                    continue
+                key = (match.keyword, match.start)
+                if key not in self._reported:
+                    self._reported.add(key)
+                    new_hits.append(match)
+        return new_hits
@@ -0,0 +1,84 @@
+"""Latency tracking for time-critical agent responses."""
+
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger("latency_metrics")
+
+
+class LatencyTracker:
+    """Records start-to-finish latencies of one kind of response.
+
+    Call start() when the triggering event happens and finish() when the
+    response reaches the user; the worst case is kept alongside the mean
+    so a session summary shows the bound, not just the average.
+    """
+
+    def __init__(self, name: str, warn_threshold_ms: float = 1000.0):
+        """
+        Initialize the tracker.
+
+        Args:
+            name: Metric name used in logs
+            warn_threshold_ms: Latency above which a warning is logged
+        """
+        self.name = name
+        self.warn_threshold_ms = warn_threshold_ms
+        self.count = 0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.last_ms: Optional[float] = None
+        self._started_at: Optional[float] = None
+
+    def start(self, started_at: Optional[float] = None) -> None:
+        """
+        Mark the triggering event.
+
+        Args:
+            started_at: time.perf_counter() value of the event, defaults to now
+        """
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+
+    def finish(self) -> Optional[float]:
+        """
+        Mark the response as delivered and record its latency.
+
+        Returns:
+            Latency in milliseconds, or None if start() was not called
+        """
+        if self._started_at is None:
+            return None
+        latency_ms = (time.perf_counter() - self._started_at) * 1000
+        self._started_at = None
+
+        self.count += 1
+        self.total_ms += latency_ms
+        self.last_ms = latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+        if latency_ms > self.warn_threshold_ms:
+            logger.warning(f"⚠️ {self.name} took {latency_ms:.0f}ms")
+        else:
+            logger.info(f"{self.name}: {latency_ms:.0f}ms")
+        return latency_ms
+
+    @property
+    def pending(self) -> bool:
+        """Whether a started measurement is waiting for finish()."""
+        return self._started_at is not None
+
+    def get_summary(self) -> dict:
+        """
+        Get latency statistics collected so far.
+
+        Returns:
+            Dict with sample count, max and mean latency in milliseconds
+        """
+        mean_ms = self.total_ms / self.count if self.count else 0.0
+        return {
+            "name": self.name,
+            "count": self.count,
+            "max_ms": round(self.max_ms, 2),
+            "mean_ms": round(mean_ms, 2),
+        }
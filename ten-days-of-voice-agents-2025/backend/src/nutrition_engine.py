@@ -1,9 +1,11 @@
 """Pregnancy nutrition recommendation engine."""
 
-import json
-import os
 import logging
-from typing import List, Dict, Tuple
+from typing import List, Dict, Mapping, Optional, Tuple
+
+from food_catalog import FoodCatalog
+from food_index import FoodEntry, FoodIndex
+from reference_data import get_reference_data
 
 logger = logging.getLogger("nutrition_engine")
 
@@ -11,20 +13,45 @@ logger = logging.getLogger("nutrition_engine")
 class NutritionEngine:
     """Provides pregnancy-safe nutrition recommendations."""
     
-    def __init__(self, profile):
+    # Food indexes per catalog object, shared by every engine in the worker
+    _indexes: Dict[int, Tuple[Mapping, FoodIndex]] = {}
+    
+    def __init__(
+        self,
+        profile,
+        foods_data: Optional[Mapping] = None,
+        food_catalog: Optional[FoodCatalog] = None
+    ):
         self.profile = profile
-        self.foods_data = self._load_foods_data()
+        # Shared, read-only data loaded once per worker in prewarm; the
+        # compiled catalog is memory-mapped and shared by every worker process
+        if foods_data is None:
+            reference_data = get_reference_data()
+            foods_data = reference_data.foods
+            food_catalog = food_catalog or reference_data.food_catalog
+        self.foods_data = foods_data
+        self.food_index = self._build_index(self.foods_data, food_catalog)
+        # User's allergen bitmask, recomputed only when the allergy set changes
+        self._allergy_mask = 0
+        self._allergy_version: Optional[int] = None
     
-    def _load_foods_data(self) -> dict:
-        """Load foods database from JSON."""
-        foods_file = "pregnancy_data/foods.json"
-        if os.path.exists(foods_file):
-            try:
-                with open(foods_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading foods data: {e}")
-        return {"safe_foods": {}, "foods_to_avoid": []}
+    @classmethod
+    def _build_index(cls, foods_data: Mapping, food_catalog: Optional[FoodCatalog] = None) -> FoodIndex:
+        """Build (or reuse) the name and alias index for a food catalog."""
+        cached = cls._indexes.get(id(foods_data))
+        if cached is not None and cached[0] is foods_data:
+            return cached[1]
+        index = FoodIndex(foods_data, food_catalog)
+        cls._indexes[id(foods_data)] = (foods_data, index)
+        return index
+    
+    def _get_allergy_mask(self) -> int:
+        """Get the user's allergen bitmask, rebuilt after add_allergy changes it."""
+        version = self.profile.allergy_version
+        if version != self._allergy_version:
+            self._allergy_mask = self.food_index.allergen_mask(self.profile.profile.get("allergies", []))
+            self._allergy_version = version
+        return self._allergy_mask
     
     def get_recommendations(self, trimester: int) -> List[Dict]:
         """
@@ -36,29 +63,19 @@ class NutritionEngine:
         Returns:
             List of food recommendations with allergy warnings
         """
-        trimester_key = f"trimester_{trimester}"
-        foods = self.foods_data.get("safe_foods", {}).get(trimester_key, [])
+        allergy_mask = self._get_allergy_mask()
+        catalog = self.food_index.catalog
+        partition = self.food_index.partition(f"trimester_{trimester}", allergy_mask)
         
         recommendations = []
-        user_allergies = self.profile.profile.get("allergies", [])
-        
-        for food in foods:
-            food_copy = food.copy()
-            
-            # Check for allergen conflicts
-            has_conflict = False
-            for allergen in food.get("allergens", []):
-                if allergen.lower() in user_allergies:
-                    has_conflict = True
-                    break
-            
-            if has_conflict:
-                food_copy["warning"] = "⚠️ Contains allergen"
-                food_copy["safe"] = False
+        for food_id in partition.food_ids:
+            food = catalog.record(food_id).as_food()
+            if int(catalog.allergen_masks[food_id]) & allergy_mask:
+                food["warning"] = "⚠️ Contains allergen"
+                food["safe"] = False
             else:
-                food_copy["safe"] = True
-            
-            recommendations.append(food_copy)
+                food["safe"] = True
+            recommendations.append(food)
         
         return recommendations
     
@@ -73,15 +90,16 @@ class NutritionEngine:
         Returns:
             Formatted string of recommendations
         """
-        recommendations = self.get_recommendations(trimester)
-        safe_foods = [f for f in recommendations if f.get("safe", True)][:limit]
+        catalog = self.food_index.catalog
+        safe_ids = self.food_index.partition(f"trimester_{trimester}", self._get_allergy_mask()).safe_ids[:limit]
         
-        if not safe_foods:
+        if not len(safe_ids):
             return "I don't have specific recommendations right now, but focus on balanced meals with plenty of fruits, vegetables, and protein."
         
+        # Only the records actually spoken are decoded
         food_list = []
-        for food in safe_foods:
-            food_list.append(f"{food['name']} - {food['benefit']}")
+        for food_id in safe_ids:
+            food_list.append(f"{catalog.name(food_id)} - {catalog.benefit(food_id)}")
         
         return "Here are some great options for you: " + ", ".join(food_list) + "."
     
@@ -95,25 +113,48 @@ class NutritionEngine:
         Returns:
             Tuple of (is_safe: bool, message: str)
         """
-        food_lower = food_name.lower()
+        match = self.food_index.lookup(food_name)
+        if match is None:
+            # An allergen asked about by name ("nuts"): warn with a food carrying it
+            match = self.food_index.allergen_match(food_name, self._get_allergy_mask())
+        if match is None:
+            # Probably misheard - the closest name, avoid-list entries first
+            suggestions = self.food_index.suggest(food_name, limit=1)
+            if suggestions:
+                is_safe, message = self._entry_safety(suggestions[0].entry)
+                return is_safe, f"Did you mean {suggestions[0].alias}? {message}"
+            # Unknown food - provide general guidance
+            return True, "I'm not sure about that specific food. When in doubt, check with your healthcare provider or a nutritionist."
         
-        # Check foods to avoid
-        foods_to_avoid = self.foods_data.get("foods_to_avoid", [])
-        for avoid_food in foods_to_avoid:
-            if avoid_food.lower() in food_lower or food_lower in avoid_food.lower():
-                return False, f"⚠️ {avoid_food} should be avoided during pregnancy."
+        return self._entry_safety(match.entry)
+    
+    def check_foods_in_text(self, text: str) -> List[Tuple[str, bool, str]]:
+        """
+        Check every known food mentioned in a free-text question.
+        
+        Args:
+            text: User's question (e.g. "can I have sushi, coffee and brie?")
+            
+        Returns:
+            List of (food name, is_safe, message), in order of mention
+        """
+        results = []
+        for match in self.food_index.extract(text):
+            is_safe, message = self._entry_safety(match.entry)
+            results.append((match.entry.name, is_safe, message))
+        return results
+    
+    def _entry_safety(self, entry: FoodEntry) -> Tuple[bool, str]:
+        """Safety verdict and message for one catalog entry."""
+        if entry.avoid:
+            return False, f"⚠️ {entry.name} should be avoided during pregnancy."
         
-        # Check if it's in safe foods
-        for trimester_foods in self.foods_data.get("safe_foods", {}).values():
-            for food in trimester_foods:
-                if food["name"].lower() in food_lower or food_lower in food["name"].lower():
-                    # Check allergens
-                    user_allergies = self.profile.profile.get("allergies", [])
-                    for allergen in food.get("allergens", []):
-                        if allergen.lower() in user_allergies:
-                            return False, f"⚠️ {food['name']} contains {allergen}, which you're allergic to."
-                    
-                    return True, f"✅ {food['name']} is great! {food['benefit']}"
+        # Check allergens: one AND, the allergen name is only needed on a conflict
+        if entry.allergen_mask & self._get_allergy_mask():
+            allergen = next(
+                allergen for allergen in entry.food.get("allergens", [])
+                if self.food_index.allergen_bits[allergen.lower()] & self._allergy_mask
+            )
+            return False, f"⚠️ {entry.name} contains {allergen}, which you're allergic to."
         
-        # Unknown food - provide general guidance
-        return True, "I'm not sure about that specific food. When in doubt, check with your healthcare provider or a nutritionist."
+        return True, f"✅ {entry.name} is great! {entry.food['benefit']}"
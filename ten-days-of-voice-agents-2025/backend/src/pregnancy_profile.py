@@ -1,32 +1,103 @@
 """Pregnancy profile management."""
 
-import json
+import asyncio
+import copy
 import os
-from datetime import datetime, timedelta
-from typing import Optional
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import List, Mapping, Optional, Tuple
 import logging
 
+from async_storage import run_io
+from profile_store import ProfileOp, VersionedProfileStore, apply_op, apply_ops
+from reference_data import get_reference_data
+
 logger = logging.getLogger("pregnancy_profile")
 
 
+def _today() -> date:
+    return date.today()
+
+
+def week_from_due_date(due_date: str, today: date) -> Tuple[int, int]:
+    """
+    Pregnancy week and trimester on a given day.
+    
+    Args:
+        due_date: ISO due date (a date or datetime string)
+        today: Day to compute for
+        
+    Returns:
+        (week clamped to 1..42, trimester 1..3)
+    
+    Raises:
+        ValueError: If due_date is not an ISO date
+    """
+    days_until_due = (datetime.fromisoformat(due_date).date() - today).days
+    week = min(max(40 - (days_until_due // 7), 1), 42)
+    
+    if week <= 13:
+        trimester = 1
+    elif week <= 27:
+        trimester = 2
+    else:
+        trimester = 3
+    return week, trimester
+
+
 class PregnancyProfile:
-    """Manages pregnancy profile data."""
+    """Manages pregnancy profile data.
     
-    def __init__(self, profile_file: str = "pregnancy_data/profile.json"):
+    Mutations are written behind: each one is applied to the in-memory
+    profile and queued as an op, and the queued ops are committed to the
+    versioned store in one compare-and-swap when the outermost
+    transaction() exits, or after a short debounce window when called from
+    the event loop. flush()/flush_async() force any pending write out.
+    Changes committed meanwhile by other sessions of the same user (other
+    workers, other devices) are merged in, never overwritten.
+    """
+    
+    def __init__(
+        self,
+        profile_file: str = "pregnancy_data/profile.json",
+        debounce_seconds: float = 0.5
+    ):
         self.profile_file = profile_file
+        self.debounce_seconds = debounce_seconds
+        # Versions live next to the legacy profile.json, which is imported once
+        self.store = VersionedProfileStore(
+            store_dir=f"{os.path.splitext(profile_file)[0]}_versions",
+            legacy_file=profile_file
+        )
+        # Last committed (version, profile); self.profile is it plus pending ops
+        self._version = 0
+        self._committed: dict = {}
+        self._pending_ops: List[ProfileOp] = []
         self.profile = self._load_profile()
+        # Bumped whenever the allergy set changes, so cached allergy filters know to rebuild
+        self.allergy_version = 0
+        # (due_date, day) the derived week was computed for, and (week, trimester)
+        self._week_key: Optional[tuple] = None
+        self._week: Tuple[Optional[int], Optional[int]] = (None, None)
+        
+        # Write-behind state
+        self._dirty = False
+        self._transaction_depth = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
     
     def _load_profile(self) -> dict:
-        """Load pregnancy profile from JSON."""
-        if os.path.exists(self.profile_file):
-            try:
-                with open(self.profile_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading profile: {e}")
+        """Load the newest committed pregnancy profile."""
+        try:
+            self._version, profile = self.store.load()
+            if profile is not None:
+                self._committed = profile
+                return copy.deepcopy(profile)
+        except Exception as e:
+            logger.error(f"Error loading profile: {e}")
         
         # Default empty profile
-        return {
+        self._committed = {
             "lmp": None,  # Last Menstrual Period
             "due_date": None,
             "current_week": None,
@@ -35,103 +106,216 @@ class PregnancyProfile:
             "food_preferences": [],
             "created_at": datetime.now().isoformat()
         }
+        return copy.deepcopy(self._committed)
+    
+    def _apply(self, op: ProfileOp):
+        """Apply a change to the in-memory profile and queue it for commit."""
+        apply_op(self.profile, op)
+        self._pending_ops.append(op)
+    
+    def _take_pending(self) -> Tuple[int, dict, List[ProfileOp]]:
+        self._cancel_scheduled_flush()
+        self._dirty = False
+        ops, self._pending_ops = self._pending_ops, []
+        return self._version, self._committed, ops
+    
+    def _adopt(self, version: int, committed: dict):
+        """Take a committed version, replaying ops queued since the commit started."""
+        allergies = list(self.profile.get("allergies", []))
+        self._version, self._committed = version, committed
+        # Updated in place: other components hold a reference to the dict
+        self.profile.clear()
+        self.profile.update(apply_ops(copy.deepcopy(committed), self._pending_ops))
+        if self.profile.get("allergies", []) != allergies:
+            # Another session changed the allergy set
+            self.allergy_version += 1
+    
+    def _restore_pending(self, ops: List[ProfileOp]):
+        # Failed commit: keep the ops so the next flush retries them
+        self._pending_ops = ops + self._pending_ops
+        self._dirty = True
     
     def save_profile(self):
-        """Save profile to JSON."""
-        os.makedirs(os.path.dirname(self.profile_file), exist_ok=True)
-        with open(self.profile_file, 'w') as f:
-            json.dump(self.profile, f, indent=2)
-        logger.info("Pregnancy profile saved")
+        """Commit pending changes to the versioned store (blocking)."""
+        version, committed, ops = self._take_pending()
+        try:
+            self._adopt(*self.store.commit(version, committed, ops))
+        except Exception:
+            self._restore_pending(ops)
+            raise
+        logger.info(f"Pregnancy profile saved (version {self._version})")
+    
+    async def save_profile_async(self):
+        """Commit pending changes to the versioned store on the storage thread pool."""
+        # Taken on the loop thread; mutations made while committing stay queued
+        version, committed, ops = self._take_pending()
+        try:
+            self._adopt(*await run_io(self.store.commit, version, committed, ops))
+        except Exception:
+            self._restore_pending(ops)
+            raise
+        logger.info(f"Pregnancy profile saved (version {self._version})")
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Batch several mutations into one profile write.
+        
+        Example:
+            with profile.transaction():
+                profile.add_allergy("nuts")
+                profile.add_allergy("shellfish")
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            self._transaction_depth -= 1
+        
+        if self._transaction_depth == 0 and self._dirty:
+            self._commit()
+    
+    def _mark_dirty(self):
+        """Record a mutation and commit it unless a transaction is open."""
+        self._dirty = True
+        if self._transaction_depth == 0:
+            self._commit()
+    
+    def _commit(self):
+        """Write now, or debounce the write when running on an event loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is None or self.debounce_seconds <= 0:
+            self.save_profile()
+            return
+        
+        # Coalesce: one write per debounce window, however many mutations
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce_seconds, self._start_scheduled_flush)
+    
+    def _start_scheduled_flush(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self.flush_async())
+        self._flush_task.add_done_callback(self._on_flush_done)
+    
+    def _on_flush_done(self, task: asyncio.Task):
+        if task is self._flush_task:
+            self._flush_task = None
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error(f"Background profile save failed, retrying: {task.exception()}")
+        # The ops were put back; try again after another debounce window
+        if self._dirty and self._transaction_depth == 0:
+            self._commit()
+    
+    async def wait_for_flush(self):
+        """Wait for a debounced write that is already committing, if any."""
+        task = self._flush_task
+        if task is not None and not task.done():
+            # A failure is logged and re-armed by _on_flush_done
+            await asyncio.wait([task])
+    
+    def _cancel_scheduled_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+    
+    def flush(self):
+        """Write any pending changes now (blocking)."""
+        if self._dirty:
+            self.save_profile()
+    
+    async def flush_async(self):
+        """Write any pending changes now, off the event loop."""
+        if self._dirty:
+            await self.save_profile_async()
     
     def set_due_date(self, due_date: str):
         """Set due date and calculate current week."""
-        self.profile["due_date"] = due_date
+        self._apply(["set", "due_date", due_date])
         self._calculate_week()
-        self.save_profile()
+        self._mark_dirty()
     
     def set_lmp(self, lmp: str):
         """Set last menstrual period and calculate due date."""
-        self.profile["lmp"] = lmp
+        self._apply(["set", "lmp", lmp])
         # Calculate due date (LMP + 280 days)
         lmp_date = datetime.fromisoformat(lmp)
         due_date = lmp_date + timedelta(days=280)
-        self.profile["due_date"] = due_date.isoformat()
+        self._apply(["set", "due_date", due_date.isoformat()])
         self._calculate_week()
-        self.save_profile()
+        self._mark_dirty()
     
     def _calculate_week(self):
-        """Calculate current pregnancy week from due date."""
-        if not self.profile.get("due_date"):
-            return
+        """Store the current week and trimester alongside the due date.
         
-        try:
-            due_date = datetime.fromisoformat(self.profile["due_date"])
-            today = datetime.now()
-            days_until_due = (due_date - today).days
-            weeks_pregnant = 40 - (days_until_due // 7)
-            
-            if weeks_pregnant < 1:
-                weeks_pregnant = 1
-            elif weeks_pregnant > 42:
-                weeks_pregnant = 42
-            
-            self.profile["current_week"] = weeks_pregnant
-            
-            # Determine trimester
-            if weeks_pregnant <= 13:
-                self.profile["trimester"] = 1
-            elif weeks_pregnant <= 27:
-                self.profile["trimester"] = 2
-            else:
-                self.profile["trimester"] = 3
-                
-        except Exception as e:
-            logger.error(f"Error calculating week: {e}")
+        The stored values are a snapshot for readers of the JSON file; the
+        current_week and trimester properties are always derived from today.
+        """
+        self._apply(["set", "current_week", self.current_week])
+        self._apply(["set", "trimester", self.trimester])
+    
+    def _derived_week(self) -> Tuple[Optional[int], Optional[int]]:
+        """(week, trimester) for today, recomputed only when the day or due date changes."""
+        due_date = self.profile.get("due_date")
+        if not due_date:
+            # No due date: whatever week was stored explicitly
+            return self.profile.get("current_week"), self.profile.get("trimester")
+        
+        key = (due_date, _today())
+        if key != self._week_key:
+            try:
+                self._week = week_from_due_date(due_date, key[1])
+            except (TypeError, ValueError) as e:
+                logger.error(f"Error calculating week: {e}")
+                self._week = (self.profile.get("current_week"), self.profile.get("trimester"))
+            self._week_key = key
+        return self._week
+    
+    @property
+    def current_week(self) -> Optional[int]:
+        """Current pregnancy week (1..42), derived from the due date when known."""
+        return self._derived_week()[0]
+    
+    @property
+    def trimester(self) -> Optional[int]:
+        """Current trimester (1..3), derived from the due date when known."""
+        return self._derived_week()[1]
     
     def add_allergy(self, allergy: str):
         """Add an allergy."""
+        allergy = allergy.lower()
         if allergy not in self.profile["allergies"]:
-            self.profile["allergies"].append(allergy.lower())
-            self.save_profile()
+            self._apply(["add", "allergies", allergy])
+            self.allergy_version += 1
+            self._mark_dirty()
     
     def add_food_preference(self, preference: str):
         """Add a food preference."""
         if preference not in self.profile["food_preferences"]:
-            self.profile["food_preferences"].append(preference)
-            self.save_profile()
+            self._apply(["add", "food_preferences", preference])
+            self._mark_dirty()
     
-    def get_week_info(self) -> Optional[dict]:
-        """Get information about current pregnancy week."""
-        if not self.profile.get("current_week"):
-            return None
+    def get_week_info(self) -> Optional[Mapping]:
+        """
+        Get information about current pregnancy week.
         
-        week = self.profile["current_week"]
-        
-        # Load week guide
-        week_guide_file = "pregnancy_data/week_guide.json"
-        if not os.path.exists(week_guide_file):
+        Returns:
+            Shared, read-only week record (week, trimester, baby_size,
+            key_developments, common_symptoms, tips), or None
+        """
+        week = self.current_week
+        if not week:
             return None
         
-        try:
-            with open(week_guide_file, 'r') as f:
-                guide = json.load(f)
-            
-            # Find appropriate week range
-            for week_range, info in guide["weeks"].items():
-                start, end = map(int, week_range.split('-'))
-                if start <= week <= end:
-                    return {
-                        "week": week,
-                        "trimester": info["trimester"],
-                        "baby_size": info["baby_size"],
-                        "key_developments": info["key_developments"],
-                        "common_symptoms": info["common_symptoms"],
-                        "tips": info["tips"]
-                    }
-        except Exception as e:
-            logger.error(f"Error loading week guide: {e}")
-        
-        return None
+        # Week table compiled once per worker in prewarm; one index, no disk access
+        week_table = get_reference_data().week_table
+        if not 0 < week < len(week_table):
+            return None
+        return week_table[week]
     
     def has_allergy(self, allergen: str) -> bool:
         """Check if user has specific allergy."""
@@ -0,0 +1,224 @@
+"""Versioned pregnancy profile store with compare-and-swap commits."""
+
+import copy
+import json
+import os
+import re
+import logging
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("profile_store")
+
+VERSION_PATTERN = re.compile(r"^v(\d{9})\.json$")
+
+# A profile change: ["set", field, value] or ["add", field, item]
+ProfileOp = Sequence
+
+
+def apply_op(profile: dict, op: ProfileOp) -> dict:
+    """
+    Apply one change to a profile dict in place.
+
+    "add" appends an item to a list field unless it is already there, so
+    adds from different writers commute. "set" replaces a field; when two
+    writers set the same field, the later commit wins.
+
+    Args:
+        profile: Profile to change
+        op: ["set", field, value] or ["add", field, item]
+
+    Returns:
+        The same profile
+    """
+    kind, field, value = op
+    if kind == "set":
+        profile[field] = value
+    elif kind == "add":
+        items = profile.setdefault(field, [])
+        if value not in items:
+            items.append(value)
+    else:
+        raise ValueError(f"Unknown profile op: {kind}")
+    return profile
+
+
+def apply_ops(profile: dict, ops: Iterable[ProfileOp]) -> dict:
+    """Apply changes in order to a profile dict in place."""
+    for op in ops:
+        apply_op(profile, op)
+    return profile
+
+
+class CommitConflict(Exception):
+    """Raised when a commit keeps losing the race for the next version."""
+
+
+class VersionedProfileStore:
+    """Append-only sequence of immutable profile versions.
+
+    Every commit writes the whole profile, plus the ops that produced it,
+    to a new file v<version>.json. The file is written under a unique temp
+    name and then hard-linked to its final name, which fails if the
+    version already exists: that link is the compare-and-swap, so no
+    writer ever takes a lock. A writer that loses the race re-reads the
+    newest version, replays its own ops on top of it and tries the next
+    version number. Adds commute and sets are last-writer-wins, so
+    concurrent sessions (e.g. two devices) never drop each other's
+    changes. Only the newest keep_versions files are kept.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        legacy_file: Optional[str] = None,
+        keep_versions: int = 8,
+        max_retries: int = 64
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            store_dir: Directory holding the version files
+            legacy_file: Unversioned profile.json to import as the first version
+            keep_versions: Number of newest versions kept on disk
+            max_retries: Lost races tolerated by one commit before giving up
+        """
+        self.store_dir = store_dir
+        self.legacy_file = legacy_file
+        self.keep_versions = keep_versions
+        self.max_retries = max_retries
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _version_path(self, version: int) -> str:
+        return os.path.join(self.store_dir, f"v{version:09d}.json")
+
+    def _list_versions(self) -> List[int]:
+        versions = []
+        for name in os.listdir(self.store_dir):
+            match = VERSION_PATTERN.match(name)
+            if match:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def _read_latest(self) -> Tuple[int, int, Optional[dict]]:
+        """
+        Newest version number on disk, and the newest readable version.
+
+        Returns:
+            (newest version, newest readable version, its profile), with
+            zeros and None when nothing exists or can be read
+        """
+        versions = self._list_versions()
+        newest = versions[-1] if versions else 0
+        for version in reversed(versions):
+            try:
+                with open(self._version_path(version), 'r', encoding='utf-8') as f:
+                    return newest, version, json.load(f)["profile"]
+            except FileNotFoundError:
+                # Pruned by another writer between listing and reading
+                continue
+            except (json.JSONDecodeError, KeyError) as e:
+                logger.error(f"Skipping unreadable profile version {version}: {e}")
+        return newest, 0, None
+
+    def _create_version(self, version: int, record: dict) -> bool:
+        """Publish a version file unless that version exists (the CAS)."""
+        tmp_path = os.path.join(self.store_dir, f".v{version:09d}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            # Readers only ever see complete files under the final name
+            os.link(tmp_path, self._version_path(version))
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def _prune(self, latest: int) -> None:
+        for version in self._list_versions():
+            if version > latest - self.keep_versions:
+                break
+            try:
+                os.unlink(self._version_path(version))
+            except FileNotFoundError:
+                # Another writer pruned it first
+                pass
+
+    def load(self) -> Tuple[int, Optional[dict]]:
+        """
+        Read the newest committed profile.
+
+        Imports legacy_file as version 1 the first time, if it exists.
+
+        Returns:
+            (version, profile), or (0, None) if nothing was ever committed
+        """
+        _, version, profile = self._read_latest()
+        if profile is None and self.legacy_file and os.path.exists(self.legacy_file):
+            try:
+                with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading legacy profile: {e}")
+                return version, profile
+            # Another session may import it concurrently; either copy is the same
+            self._create_version(1, {"version": 1, "profile": legacy, "ops": []})
+            logger.info(f"Imported legacy profile {self.legacy_file}")
+            _, version, profile = self._read_latest()
+        return version, profile
+
+    def commit(
+        self,
+        base_version: int,
+        base_profile: dict,
+        ops: Sequence[ProfileOp]
+    ) -> Tuple[int, dict]:
+        """
+        Commit changes made on top of a known version.
+
+        Args:
+            base_version: Version the changes were made against (0 for none)
+            base_profile: Profile at base_version (not modified)
+            ops: Changes to apply, in order
+
+        Returns:
+            (new version, committed profile), which includes any changes
+            committed by other writers since base_version
+
+        Raises:
+            CommitConflict: If the commit lost max_retries races in a row
+        """
+        version, profile = base_version, base_profile
+        for attempt in range(self.max_retries):
+            newest, latest, latest_profile = self._read_latest()
+            if latest > version and latest_profile is not None:
+                # Someone else committed: rebase our ops onto their version
+                version, profile = latest, latest_profile
+            if not ops:
+                return version, profile
+
+            # An unreadable newest file still holds its number; publish after it
+            target = max(version, newest) + 1
+            merged = apply_ops(copy.deepcopy(profile), ops)
+            record = {
+                "version": target,
+                "committed_at": datetime.now().isoformat(),
+                "ops": [list(op) for op in ops],
+                "profile": merged,
+            }
+            if self._create_version(target, record):
+                if attempt:
+                    logger.info(f"Profile commit merged after {attempt} conflicting writes")
+                self._prune(target)
+                return target, merged
+            # Lost the race for target; the loop re-reads the winner
+
+        raise CommitConflict(f"Gave up committing profile after {self.max_retries} conflicts")
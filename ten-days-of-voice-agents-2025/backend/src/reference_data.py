@@ -0,0 +1,147 @@
+"""Shared, read-only pregnancy reference data (symptoms, foods, week guide)."""
+
+import json
+import os
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+from food_catalog import FoodCatalog, load_food_catalog
+
+logger = logging.getLogger("reference_data")
+
+# Reference data ships with the backend; resolved from this file, not the working directory
+DATA_DIR = Path(__file__).resolve().parent.parent / "pregnancy_data"
+
+# Pregnancy weeks covered by the week table (1..MAX_WEEK)
+MAX_WEEK = 42
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert parsed JSON into immutable structures.
+
+    dicts become read-only mappings and lists become tuples, so one copy
+    can be shared by every job in the worker without defensive copies.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _load_json(path: str, default: dict) -> Mapping:
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return freeze(json.load(f))
+        except Exception as e:
+            logger.error(f"Error loading {path}: {e}")
+    return freeze(default)
+
+
+def compile_week_table(week_guide: Mapping) -> Tuple[Optional[Mapping], ...]:
+    """
+    Expand the guide's "start-end" week ranges into a dense lookup table.
+
+    Args:
+        week_guide: Parsed week_guide.json
+
+    Returns:
+        Tuple indexed by week (0..MAX_WEEK) of read-only week records, or
+        None for weeks the guide does not cover
+    """
+    table: list = [None] * (MAX_WEEK + 1)
+    for week_range, info in week_guide.get("weeks", {}).items():
+        try:
+            start, end = map(int, week_range.split('-'))
+        except ValueError:
+            logger.error(f"Invalid week range in week guide: {week_range}")
+            continue
+        for week in range(max(start, 1), min(end, MAX_WEEK) + 1):
+            table[week] = MappingProxyType({
+                "week": week,
+                "trimester": info["trimester"],
+                "baby_size": info["baby_size"],
+                "key_developments": info["key_developments"],
+                "common_symptoms": info["common_symptoms"],
+                "tips": info["tips"]
+            })
+    return tuple(table)
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Immutable reference datasets shared by every job in the worker."""
+
+    symptoms_guide: Mapping
+    # foods.json minus safe_foods, which live in food_catalog (all of it if
+    # the catalog could not be loaded)
+    foods: Mapping
+    week_guide: Mapping
+    # week_guide expanded to one record per week, see compile_week_table()
+    week_table: Tuple[Optional[Mapping], ...] = (None,) * (MAX_WEEK + 1)
+    # Compiled, memory-mapped safe-food catalog (see food_catalog.py)
+    food_catalog: Optional[FoodCatalog] = None
+
+
+def load_reference_data(data_dir: str = str(DATA_DIR)) -> ReferenceData:
+    """
+    Parse the reference datasets from disk.
+
+    Args:
+        data_dir: Directory holding the reference JSON files
+
+    Returns:
+        Frozen ReferenceData
+    """
+    foods_file = os.path.join(data_dir, "foods.json")
+    try:
+        # Safe foods stay in the mapped catalog; only the curated part is parsed
+        food_catalog = load_food_catalog(os.path.join(data_dir, "foods.catalog"), source_file=foods_file)
+        foods = freeze(food_catalog.curated())
+    except Exception as e:
+        # Engines compile a private in-memory catalog instead
+        logger.error(f"Error loading food catalog: {e}")
+        food_catalog = None
+        foods = _load_json(foods_file, {"safe_foods": {}, "foods_to_avoid": []})
+
+    week_guide = _load_json(os.path.join(data_dir, "week_guide.json"), {"weeks": {}})
+
+    return ReferenceData(
+        symptoms_guide=_load_json(
+            os.path.join(data_dir, "symptoms_guide.json"),
+            {"emergency_keywords": [], "common_symptoms": {}}
+        ),
+        foods=foods,
+        week_guide=week_guide,
+        week_table=compile_week_table(week_guide),
+        food_catalog=food_catalog,
+    )
+
+
+_shared: Optional[ReferenceData] = None
+_shared_lock = threading.Lock()
+
+
+def get_reference_data() -> ReferenceData:
+    """
+    Get the worker-wide reference data, loading it on first use.
+
+    prewarm() calls this once per worker process, so jobs normally find it
+    already loaded and never touch the disk.
+
+    Returns:
+        Shared ReferenceData
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = load_reference_data()
+                logger.info("Reference data loaded")
+    return _shared
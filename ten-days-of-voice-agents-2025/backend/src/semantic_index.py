@@ -0,0 +1,165 @@
+"""Hashed TF-IDF index for matching free-text descriptions to reference entries."""
+
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Any, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z]+")
+
+STOPWORDS = frozenset(
+    "a an and are am as at be been being but by can do does doing for from get getting got had "
+    "has have having i i'm im in is it its just keep keeps like look looks lot me my of on or "
+    "really so some that the them there they this to too up very was way were what when with you "
+    "your feel feeling feels".split()
+)
+
+
+def _features(text: str) -> Counter:
+    """Word and character 4-gram features of a text, stopwords removed."""
+    features = Counter()
+    for word in _WORD.findall(text.lower().replace("'", "")):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        features[f"w:{word}"] += 1
+        padded = f"^{word}$"
+        for i in range(len(padded) - 3):
+            features[f"c:{padded[i:i + 4]}"] += 1
+    return features
+
+
+def _bucket(feature: str, dim: int) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode("utf-8")) & (dim - 1)
+
+
+class SemanticMatch(NamedTuple):
+    """One indexed entry scored against a query."""
+
+    score: float
+    payload: Any
+
+
+class SemanticIndex:
+    """Cosine-similarity lookup over hashed TF-IDF vectors.
+
+    Every document is turned into word and character 4-gram features,
+    hashed into `dim` buckets and weighted by TF-IDF, and the L2-normalized
+    rows are stacked into one float32 matrix when the index is built. A
+    query only touches the columns of its own features, so scoring every
+    document is a single (documents x query features) matrix-vector product.
+    """
+
+    def __init__(
+        self,
+        documents: Iterable[Tuple[str, Any]],
+        dim: int = 4096,
+        min_score: float = 0.2,
+        require_shared_word: bool = False
+    ):
+        """
+        Build the TF-IDF matrix.
+
+        Args:
+            documents: (text, payload) pairs to index
+            dim: Number of hash buckets (a power of two)
+            min_score: Minimum cosine similarity for a match
+            require_shared_word: Only match documents sharing a whole word
+                with the query; letter n-grams alone then only rank them
+                ("dwelling" is not "swelling")
+        """
+        if dim & (dim - 1):
+            raise ValueError("dim must be a power of two")
+        self.dim = dim
+        self.min_score = min_score
+        self.require_shared_word = require_shared_word
+
+        documents = list(documents)
+        self._payloads = [payload for _, payload in documents]
+        counts = np.zeros((len(documents), dim), dtype=np.float32)
+        for row, (text, _) in enumerate(documents):
+            for feature, count in _features(text).items():
+                counts[row, _bucket(feature, dim)] += count
+
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self._idf = np.log((1 + len(documents)) / (1 + document_frequency)).astype(np.float32) + 1
+
+        matrix = np.zeros_like(counts)
+        nonzero = counts > 0
+        matrix[nonzero] = 1 + np.log(counts[nonzero])
+        matrix *= self._idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self._matrix = matrix / norms
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def search(self, text: str, limit: int = 3) -> List[SemanticMatch]:
+        """
+        Score a free-text query against every indexed document.
+
+        Args:
+            text: Free text, e.g. an STT transcript
+            limit: Maximum number of matches returned
+
+        Returns:
+            Matches above min_score, best first
+        """
+        scores = self._scores(text)
+        if scores is None:
+            return []
+        ranked = np.argsort(-scores)[:limit]
+        return [
+            SemanticMatch(float(scores[row]), self._payloads[row])
+            for row in ranked
+            if scores[row] >= self.min_score
+        ]
+
+    def _scores(self, text: str) -> Optional[np.ndarray]:
+        """Cosine similarity of a query to every document, or None if it has no features."""
+        buckets = Counter()
+        word_buckets = []
+        for feature, count in _features(text).items():
+            bucket = _bucket(feature, self.dim)
+            buckets[bucket] += count
+            if feature.startswith("w:"):
+                word_buckets.append(bucket)
+        if not buckets or not self._payloads:
+            return None
+
+        columns = np.fromiter(buckets.keys(), dtype=np.intp, count=len(buckets))
+        weights = np.fromiter(
+            (1 + math.log(count) for count in buckets.values()), dtype=np.float32, count=len(buckets)
+        ) * self._idf[columns]
+        weights /= np.linalg.norm(weights)
+        scores = self._matrix[:, columns] @ weights
+        if self.require_shared_word:
+            shared = self._matrix[:, word_buckets].any(axis=1)
+            scores = np.where(shared, scores, 0)
+        return scores
+
+    def calibrate(self, examples: Iterable[Tuple[str, Any]], margin: float = 0.9) -> float:
+        """
+        Lower min_score until every example finds the document it describes.
+
+        Args:
+            examples: (text, payload) pairs, e.g. the descriptions a guide
+                ships for each entry
+            margin: Fraction of the weakest example's score to accept
+
+        Returns:
+            The new min_score
+        """
+        for text, payload in examples:
+            scores = self._scores(text)
+            if scores is None:
+                continue
+            row = self._payloads.index(payload)
+            # Only examples whose own document ranks first can set the bar
+            if scores[row] >= scores.max():
+                self.min_score = min(self.min_score, float(scores[row]) * margin)
+        return self.min_score
@@ -0,0 +1,146 @@
+"""Low-level file helpers shared by the pregnancy data stores."""
+
+import json
+import os
+import logging
+import tempfile
+from typing import Iterator, Optional
+
+logger = logging.getLogger("storage_utils")
+
+
+def append_json_line(path: str, record: dict, fsync: bool = True) -> None:
+    """
+    Append one JSON record as a single line to a line-delimited file.
+
+    The file is opened in append mode so the write lands at the end of the
+    file regardless of its size, which keeps the cost of a save constant.
+    If the file ends in a torn line (a crash mid-write), the record starts
+    on a new line instead of being glued onto it.
+
+    Args:
+        path: Path to the .jsonl file (created if missing)
+        record: JSON-serializable dict to append
+        fsync: Flush the write to disk before returning
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    line = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + "\n"
+    with open(path, 'a+b') as f:
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = "\n" + line
+        f.write(line.encode('utf-8'))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+
+def iter_json_lines(path: str) -> Iterator[dict]:
+    """
+    Iterate over the records of a line-delimited JSON file.
+
+    Blank lines and lines that fail to parse (e.g. a torn final write after
+    a crash) are skipped.
+
+    Args:
+        path: Path to the .jsonl file
+
+    Yields:
+        Parsed records in file order
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable line {line_number} in {path}")
+
+
+
+def read_last_json_line(path: str, chunk_size: int = 4096) -> Optional[dict]:
+    """
+    Read the last parseable record of a line-delimited JSON file.
+
+    Seeks backwards from the end of the file in fixed-size chunks, so the
+    cost depends on the size of the last record rather than the file.
+
+    Args:
+        path: Path to the .jsonl file
+        chunk_size: Bytes read per backwards step
+
+    Returns:
+        The last record, or None if the file is missing or has no records
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b""
+
+        while position > 0:
+            read_size = min(chunk_size, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + buffer
+
+            # Every complete line after the first newline in the buffer can be
+            # tried, newest first; the head of the buffer may be a partial line
+            lines = buffer.split(b"\n")
+            candidates = lines if position == 0 else lines[1:]
+            for line in reversed(candidates):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    return json.loads(line.decode('utf-8'))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Torn final write after a crash; fall back to the line before
+                    continue
+
+            # Keep only the unfinished head; the rest has been tried
+            buffer = lines[0]
+
+    return None
+
+
+def atomic_write_json(path: str, data, indent: Optional[int] = 2) -> None:
+    """
+    Write JSON to a temp file and rename it over the target.
+
+    Readers see either the old or the new content, never a partial file.
+    Every call uses its own temp file, so concurrent writers on the storage
+    thread pool never write into each other's temp file.
+
+    Args:
+        path: Destination path
+        data: JSON-serializable data
+        indent: Indentation passed to json.dump
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
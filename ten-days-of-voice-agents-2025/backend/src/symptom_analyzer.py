@@ -1,29 +1,155 @@
 """Pregnancy symptom analyzer with safety checks."""
 
-import json
-import os
 import logging
-from typing import Tuple
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from fuzzy_index import FuzzyIndex, consonant_key
+from keyword_matcher import KeywordMatch, KeywordMatcher, StreamingKeywordScanner, normalize_text
+from reference_data import get_reference_data
+from semantic_index import STOPWORDS, SemanticIndex
 
 logger = logging.getLogger("symptom_analyzer")
 
+SEVERITY_EMERGENCY = "emergency"
+SEVERITY_COMMON = "common"
+
+GENERIC_RESPONSE = (
+    "I hear you. Every pregnancy is unique. If this symptom is concerning you "
+    "or getting worse, it's always best to check with your healthcare provider. "
+    "They know your specific situation best."
+)
+
+_WORD = re.compile(r"[a-z']+")
+
+# "sleeping well" is not trouble sleeping, but "not sleeping well" is
+_DOING_FINE = frozenset("well fine good great better okay ok normal".split())
+_NEGATIONS = frozenset("not no never hardly barely cannot".split())
+_FILLER = frozenset("all everything pretty quite today now doing".split())
+# "no bleeding or contractions" denies both; "it won't stop bleeding" and
+# "no, I'm bleeding" do not, and neither does a negation before "but"
+_NEGATED_SPAN = 4
+_EMERGENCY_NEGATIONS = _NEGATIONS | {"without", "nor"}
+_SCOPE_BREAKS = frozenset("but though although except yet why stop stops stopped stopping".split())
+_TOKEN = re.compile(r"[a-z']+|[.,;:!?]")
+
+
+def _only_sounds_fine(symptom_text: str) -> bool:
+    """
+    Whether the utterance is nothing but a statement that things are fine.
+    
+    "I'm fine" and "I was sleeping well" are; "my ankles look puffy but
+    otherwise I feel fine" and "not sleeping well" are not.
+    """
+    words = _WORD.findall(symptom_text.lower().replace("’", "'"))
+    fine = False
+    subjects = 0
+    for i, word in enumerate(words):
+        if word in _DOING_FINE:
+            if any(previous in _NEGATIONS or previous.endswith("n't") for previous in words[max(0, i - 3):i]):
+                return False
+            fine = True
+        elif word.replace("'", "") not in STOPWORDS and word not in _FILLER and word not in _NEGATIONS:
+            # At most what is fine ("sleeping"), nothing else described
+            subjects += 1
+    return fine and subjects <= 1
+
+
+def is_negated(transcript: str, match: KeywordMatch) -> bool:
+    """
+    Whether a keyword hit is denied by a negation just before it.
+    
+    Args:
+        transcript: Text the hit was found in (match offsets are into its normalized form)
+        match: Hit from the emergency matcher or scanner
+    """
+    before = _TOKEN.findall(normalize_text(transcript)[:match.start])
+    for token in reversed(before[-_NEGATED_SPAN:]):
+        if not token[0].isalpha() or token in _SCOPE_BREAKS:
+            return False
+        if token in _EMERGENCY_NEGATIONS or token.endswith("n't"):
+            return True
+    return False
+
+
+class SymptomFinding(NamedTuple):
+    """One symptom recognized in an utterance."""
+    
+    symptom: str
+    response: str
+    severity: str
+    
+    @property
+    def is_emergency(self) -> bool:
+        return self.severity == SEVERITY_EMERGENCY
+
 
 class SymptomAnalyzer:
     """Analyzes pregnancy symptoms and provides safe guidance."""
     
-    def __init__(self):
-        self.symptoms_guide = self._load_symptoms_guide()
+    # Compiled matchers per guide object, shared by every analyzer in the worker
+    _compiled: Dict[int, Tuple[Mapping, tuple]] = {}
+    
+    def __init__(self, symptoms_guide: Optional[Mapping] = None):
+        # Shared, read-only guide loaded once per worker in prewarm
+        self.symptoms_guide = symptoms_guide if symptoms_guide is not None else get_reference_data().symptoms_guide
+        (
+            self.emergency_matcher,
+            self.symptom_matchers,
+            self.symptom_fuzzy_indexes,
+            self.symptom_semantic_indexes
+        ) = self._compile_matchers(self.symptoms_guide)
     
-    def _load_symptoms_guide(self) -> dict:
-        """Load symptoms guide from JSON."""
-        guide_file = "pregnancy_data/symptoms_guide.json"
-        if os.path.exists(guide_file):
-            try:
-                with open(guide_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading symptoms guide: {e}")
-        return {"emergency_keywords": [], "common_symptoms": {}}
+    @classmethod
+    def _compile_matchers(
+        cls,
+        guide: Mapping
+    ) -> Tuple[KeywordMatcher, Dict[str, KeywordMatcher], Dict[str, FuzzyIndex], Dict[str, SemanticIndex]]:
+        """
+        Compile the guide's keyword lists into exact, fuzzy and semantic matchers.
+        
+        Returns:
+            (emergency matcher, {trimester_key: common-symptom matcher},
+             {trimester_key: common-symptom fuzzy index},
+             {trimester_key: common-symptom semantic index})
+        """
+        cached = cls._compiled.get(id(guide))
+        if cached is not None and cached[0] is guide:
+            return cached[1]
+        
+        # Emergencies stay exact: a fuzzy hit must never decide whether to escalate
+        emergency_matcher = KeywordMatcher(guide.get("emergency_keywords", []))
+        
+        # Payload is the symptom's position in the guide, so ties keep guide order
+        symptom_matchers = {}
+        symptom_fuzzy_indexes = {}
+        symptom_semantic_indexes = {}
+        for trimester_key, symptoms in guide.get("common_symptoms", {}).items():
+            phrases = {}
+            documents = []
+            descriptions = []
+            for index, info in enumerate(symptoms):
+                names = (info["symptom"], *info.get("aliases", ()))
+                for phrase in names:
+                    phrases[phrase] = (index, info)
+                # Names count twice so they outweigh the wording of the response
+                text = " ".join((*names, *names, info.get("descriptions", ""), info["response"]))
+                documents.append((text, (index, info)))
+                descriptions.extend(
+                    (description.strip(), (index, info))
+                    for description in info.get("descriptions", "").split(",")
+                    if description.strip()
+                )
+            symptom_matchers[trimester_key] = KeywordMatcher(phrases)
+            symptom_fuzzy_indexes[trimester_key] = FuzzyIndex(phrases, word_key=consonant_key)
+            semantic_index = SemanticIndex(documents, require_shared_word=True)
+            # Each way the guide describes a symptom ("queasy") must find it
+            semantic_index.calibrate(descriptions)
+            symptom_semantic_indexes[trimester_key] = semantic_index
+        
+        compiled = (emergency_matcher, symptom_matchers, symptom_fuzzy_indexes, symptom_semantic_indexes)
+        cls._compiled[id(guide)] = (guide, compiled)
+        return compiled
     
     def analyze_symptom(self, symptom_text: str, trimester: int) -> Tuple[bool, str]:
         """
@@ -36,33 +162,120 @@ class SymptomAnalyzer:
         Returns:
             Tuple of (is_emergency: bool, response: str)
         """
-        symptom_lower = symptom_text.lower()
-        
-        # Check for emergency keywords
-        emergency_keywords = self.symptoms_guide.get("emergency_keywords", [])
-        for keyword in emergency_keywords:
-            if keyword in symptom_lower:
-                escalation_msg = self.symptoms_guide.get(
-                    "escalation_message",
-                    "⚠️ Please contact your healthcare provider immediately."
-                )
-                logger.warning(f"Emergency keyword detected: {keyword}")
-                return True, escalation_msg
+        # Check for emergency keywords (one pass, stops at the first hit)
+        emergency = self.emergency_matcher.find_first(symptom_text)
+        if emergency is not None:
+            logger.warning(f"Emergency keyword detected: {emergency.keyword}")
+            return True, self.get_emergency_guidance()
         
         # Check common symptoms for trimester
-        trimester_key = f"trimester_{trimester}"
-        common_symptoms = self.symptoms_guide.get("common_symptoms", {}).get(trimester_key, [])
+        matcher = self.symptom_matchers.get(f"trimester_{trimester}")
+        if matcher is not None:
+            matches = matcher.find_all(symptom_text)
+            if matches:
+                _, symptom_info = min(matches, key=lambda match: match.payload[0]).payload
+                return False, symptom_info["response"]
         
-        for symptom_info in common_symptoms:
-            if symptom_info["symptom"] in symptom_lower:
+        # Fall back to the fuzzy index for misspelled or misheard symptoms
+        fuzzy_index = self.symptom_fuzzy_indexes.get(f"trimester_{trimester}")
+        if fuzzy_index is not None:
+            fuzzy_matches = fuzzy_index.search(symptom_text, limit=1)
+            if fuzzy_matches:
+                match = fuzzy_matches[0]
+                logger.info(f"Fuzzy symptom match: '{match.text}' -> {match.phrase} ({match.score:.2f})")
+                _, symptom_info = match.payload
                 return False, symptom_info["response"]
         
+        # Free-text descriptions without any symptom name ("my ankles look puffy")
+        semantic_match = self._semantic_match(symptom_text, trimester)
+        if semantic_match is not None:
+            return False, semantic_match["response"]
+        
         # Generic supportive response
-        return False, (
-            "I hear you. Every pregnancy is unique. If this symptom is concerning you "
-            "or getting worse, it's always best to check with your healthcare provider. "
-            "They know your specific situation best."
+        return False, GENERIC_RESPONSE
+    
+    def analyze_symptoms(self, symptom_text: str, trimester: int) -> List[SymptomFinding]:
+        """
+        Find every symptom mentioned in an utterance in one scan.
+        
+        Emergency keywords come first. A common symptom overlapping an
+        emergency keyword (e.g. "shortness of breath") is not reported
+        separately, and each symptom is reported once.
+        
+        Args:
+            symptom_text: User's description, possibly of several symptoms
+            trimester: Current trimester (1, 2, or 3)
+            
+        Returns:
+            Findings, emergencies first, then in order of mention
+        """
+        findings = []
+        
+        # Longest emergency keyword per span ("heavy bleeding", not also "bleeding")
+        emergency_spans = []
+        emergencies = sorted(
+            self.emergency_matcher.find_all(symptom_text),
+            key=lambda match: (match.start, -match.end)
         )
+        for match in emergencies:
+            if emergency_spans and match.end <= emergency_spans[-1][1]:
+                continue
+            emergency_spans.append((match.start, match.end))
+            logger.warning(f"Emergency keyword detected: {match.keyword}")
+            findings.append(SymptomFinding(match.keyword, self.get_emergency_guidance(), SEVERITY_EMERGENCY))
+        
+        trimester_key = f"trimester_{trimester}"
+        seen = set()
+        matcher = self.symptom_matchers.get(trimester_key)
+        if matcher is not None:
+            for match in sorted(matcher.find_all(symptom_text), key=lambda match: match.start):
+                index, symptom_info = match.payload
+                if index in seen:
+                    continue
+                seen.add(index)
+                if any(match.start < end and start < match.end for start, end in emergency_spans):
+                    continue
+                findings.append(SymptomFinding(symptom_info["symptom"], symptom_info["response"], SEVERITY_COMMON))
+        
+        # Misspelled or misheard symptoms the exact pass did not find
+        fuzzy_index = self.symptom_fuzzy_indexes.get(trimester_key)
+        if fuzzy_index is not None:
+            for match in fuzzy_index.search(symptom_text, limit=len(fuzzy_index)):
+                index, symptom_info = match.payload
+                if index in seen:
+                    continue
+                seen.add(index)
+                logger.info(f"Fuzzy symptom match: '{match.text}' -> {match.phrase} ({match.score:.2f})")
+                findings.append(SymptomFinding(symptom_info["symptom"], symptom_info["response"], SEVERITY_COMMON))
+        
+        # Emergencies say it all; a loose semantic guess would only add noise
+        if not findings and not seen:
+            symptom_info = self._semantic_match(symptom_text, trimester)
+            if symptom_info is not None:
+                findings.append(SymptomFinding(symptom_info["symptom"], symptom_info["response"], SEVERITY_COMMON))
+        
+        return findings
+    
+    def _semantic_match(self, symptom_text: str, trimester: int) -> Optional[Mapping]:
+        """Best common symptom by TF-IDF similarity to its guide entry, if any."""
+        semantic_index = self.symptom_semantic_indexes.get(f"trimester_{trimester}")
+        if semantic_index is None or _only_sounds_fine(symptom_text):
+            return None
+        matches = semantic_index.search(symptom_text, limit=1)
+        if not matches:
+            return None
+        _, symptom_info = matches[0].payload
+        logger.info(f"Semantic symptom match: {symptom_info['symptom']} ({matches[0].score:.2f})")
+        return symptom_info
+    
+    def create_emergency_scanner(self) -> StreamingKeywordScanner:
+        """
+        Create an incremental emergency keyword scanner for live transcripts.
+        
+        Returns:
+            Scanner fed with interim/final STT transcripts of one speaker
+        """
+        return StreamingKeywordScanner(self.emergency_matcher)
     
     def get_emergency_guidance(self) -> str:
         """Get emergency escalation message."""
@@ -0,0 +1,199 @@
+"""Content-addressed on-disk cache of synthesized speech for fixed phrases."""
+
+import hashlib
+import os
+import logging
+import threading
+import wave
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+logger = logging.getLogger("tts_cache")
+
+SAMPLE_WIDTH = 2  # 16-bit PCM, as produced by the TTS plugins
+
+
+class CachedAudio(NamedTuple):
+    """Decoded 16-bit PCM audio of one cached phrase."""
+
+    pcm: bytes
+    sample_rate: int
+    num_channels: int
+
+    @property
+    def duration(self) -> float:
+        """Length of the audio in seconds."""
+        return len(self.pcm) / (SAMPLE_WIDTH * self.num_channels * self.sample_rate)
+
+
+def cache_key(voice: str, style: str, text: str) -> str:
+    """
+    Content address of a phrase spoken with one voice and style.
+
+    Args:
+        voice: TTS voice id
+        style: TTS speaking style
+        text: Exact text sent to the TTS
+
+    Returns:
+        Hex SHA-256 digest of voice|style|text
+    """
+    return hashlib.sha256(f"{voice}|{style}|{text}".encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    """LRU-bounded WAV cache keyed by (voice, style, text).
+
+    Each phrase is stored once as <sha256>.wav. Recency is tracked in
+    memory and mirrored to file mtimes, so the LRU order survives restarts
+    and is shared by every worker process using the same directory. When
+    the cache grows past max_bytes or max_entries the least recently used
+    files are deleted.
+    """
+
+    def __init__(
+        self,
+        voice: str,
+        style: str,
+        cache_dir: str = "pregnancy_data/tts_cache",
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 1000
+    ):
+        """
+        Initialize the cache and index the files already on disk.
+
+        Args:
+            voice: TTS voice id the cached audio was synthesized with
+            style: TTS speaking style the cached audio was synthesized with
+            cache_dir: Directory holding the WAV files
+            max_bytes: Total size above which old entries are evicted
+            max_entries: Entry count above which old entries are evicted
+        """
+        self.voice = voice
+        self.style = style
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # key -> file size, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        files = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(".wav"):
+                stat = os.stat(os.path.join(cache_dir, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return self._key(text) in self._entries
+
+    def _key(self, text: str) -> str:
+        return cache_key(self.voice, self.style, text)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def get(self, text: str) -> Optional[CachedAudio]:
+        """
+        Load the cached audio for a phrase (blocking).
+
+        Args:
+            text: Exact text to be spoken
+
+        Returns:
+            CachedAudio, or None on a cache miss
+        """
+        key = self._key(text)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with wave.open(path, "rb") as f:
+                audio = CachedAudio(
+                    pcm=f.readframes(f.getnframes()),
+                    sample_rate=f.getframerate(),
+                    num_channels=f.getnchannels()
+                )
+            os.utime(path)
+        except (OSError, EOFError, wave.Error) as e:
+            # Evicted by another process, or a damaged file: treat as a miss
+            logger.warning(f"Dropping unreadable TTS cache entry {key}: {e}")
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, text: str, pcm: bytes, sample_rate: int, num_channels: int = 1) -> None:
+        """
+        Store synthesized audio for a phrase (blocking, atomic).
+
+        Args:
+            text: Exact text that was spoken
+            pcm: 16-bit little-endian PCM samples
+            sample_rate: Sample rate in Hz
+            num_channels: Number of interleaved channels
+        """
+        if not pcm:
+            return
+        key = self._key(text)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with wave.open(tmp_path, "wb") as f:
+            f.setnchannels(num_channels)
+            f.setsampwidth(SAMPLE_WIDTH)
+            f.setframerate(sample_rate)
+            f.writeframes(pcm)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until within limits."""
+        while self._entries and (
+            self._total_bytes > self.max_bytes or len(self._entries) > self.max_entries
+        ):
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get_summary(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with entry count, total size, hits and misses
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
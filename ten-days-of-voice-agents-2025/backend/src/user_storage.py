@@ -0,0 +1,224 @@
+"""Per-user sharded storage for pregnancy data."""
+
+import asyncio
+import hashlib
+import os
+import re
+import logging
+import threading
+from typing import Dict, Mapping, Optional
+
+from async_storage import run_io
+from closure_log import ClosureTaskLog
+from journal_store import JournalStore, create_journal_store
+from pregnancy_profile import PregnancyProfile
+
+logger = logging.getLogger("user_storage")
+
+_UNSAFE_CHARS = re.compile(r"[^a-z0-9_-]+")
+
+# Single-user data files that predate per-user shards, relative to the data root
+LEGACY_DATA_FILES = (
+    "profile.json",
+    "profile_versions",
+    "pregnancy_journal.json",
+    "pregnancy_journal.jsonl",
+    "pregnancy_journal.rollups.json",
+    "pregnancy_journal.db",
+    "pregnancy_journal.db-wal",
+    "pregnancy_journal.db-shm",
+    "closure_tasks.json",
+    "closure_tasks",
+)
+# Created (exclusively) by the user shard that took over the legacy files
+LEGACY_CLAIM_FILE = ".legacy_data_claimed"
+# Whether the unassigned legacy data warning was logged in this worker
+_legacy_warned = False
+
+
+def session_user_id(identity: str, attributes: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Stable user id of a session's participant.
+
+    Rooms are created per session, so storage is keyed on the participant:
+    an explicit "user_id" participant attribute when the token carries one,
+    otherwise the participant identity.
+
+    Args:
+        identity: Participant identity
+        attributes: Participant attributes
+
+    Returns:
+        User id to pass to acquire_user_shard
+    """
+    return (attributes or {}).get("user_id") or identity
+
+
+def shard_key(user_id: str) -> str:
+    """
+    Turn a user identity into a safe, collision-free directory name.
+
+    Args:
+        user_id: User identity
+
+    Returns:
+        Readable prefix plus a short hash of the full identity
+    """
+    readable = _UNSAFE_CHARS.sub("-", user_id.lower()).strip("-")[:40] or "user"
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:10]
+    return f"{readable}-{digest}"
+
+
+class UserShard:
+    """All mutable storage belonging to one user.
+
+    Sessions for the same user in this worker share one UserShard, so they
+    share its store instances and its asyncio lock; sessions for different
+    users never contend on anything.
+    """
+
+    def __init__(self, user_id: Optional[str], data_dir: str, legacy_dir: Optional[str] = None):
+        """
+        Initialize a user shard. No disk access happens until open().
+
+        Args:
+            user_id: User identity, or None for the legacy global shard
+            data_dir: Directory holding this user's files
+            legacy_dir: Data root whose single-user files this shard may take over
+        """
+        self.user_id = user_id
+        self.data_dir = data_dir
+        self.legacy_dir = legacy_dir
+        self.lock = asyncio.Lock()
+        self.journal_store: Optional[JournalStore] = None
+        self.closure_log: Optional[ClosureTaskLog] = None
+        self.profile: Optional[PregnancyProfile] = None
+        self._refcount = 0
+        self._open_lock = threading.Lock()
+
+    def open(self) -> "UserShard":
+        """Open this shard's stores (blocking, idempotent)."""
+        with self._open_lock:
+            if self.journal_store is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                if self.legacy_dir:
+                    self._claim_legacy_data()
+                self.journal_store = create_journal_store(data_dir=self.data_dir)
+                self.closure_log = ClosureTaskLog(
+                    log_dir=os.path.join(self.data_dir, "closure_tasks"),
+                    legacy_file=os.path.join(self.data_dir, "closure_tasks.json")
+                )
+                self.profile = PregnancyProfile(
+                    profile_file=os.path.join(self.data_dir, "profile.json")
+                )
+                logger.info(f"Opened user shard: {self.data_dir}")
+        return self
+
+    def _claim_legacy_data(self):
+        """Move the pre-sharding single-user files into this shard, once.
+
+        The files hold one person's health data from before storage was
+        sharded, so they only move to the user named by $LEGACY_USER_ID.
+        Without it they stay where they are (with a warning): user ids are
+        client-supplied, and the first browser to connect may be anyone.
+        They are moved as they are, so the store migrations (legacy JSON
+        journal, closure_tasks.json, profile.json) run on them on open.
+        """
+        legacy_paths = [
+            name for name in LEGACY_DATA_FILES
+            if os.path.exists(os.path.join(self.legacy_dir, name))
+        ]
+        if not legacy_paths:
+            return
+        legacy_user = os.getenv("LEGACY_USER_ID")
+        if not legacy_user:
+            global _legacy_warned
+            if not _legacy_warned:
+                _legacy_warned = True
+                logger.warning(
+                    f"Legacy data {legacy_paths} in {self.legacy_dir} is not assigned to any user; "
+                    "set LEGACY_USER_ID to the owner's user id to move it into their shard"
+                )
+            return
+        if legacy_user != self.user_id:
+            return
+
+        try:
+            # Exclusive create: exactly one shard, in any worker, wins the claim
+            fd = os.open(
+                os.path.join(self.legacy_dir, LEGACY_CLAIM_FILE),
+                os.O_CREAT | os.O_EXCL | os.O_WRONLY
+            )
+        except FileExistsError:
+            return
+        with os.fdopen(fd, 'w') as f:
+            f.write(os.path.basename(self.data_dir))
+
+        for name in legacy_paths:
+            target = os.path.join(self.data_dir, name)
+            if os.path.exists(target):
+                logger.warning(f"Not moving legacy {name}: {target} already exists")
+                continue
+            os.replace(os.path.join(self.legacy_dir, name), target)
+        logger.info(f"Moved legacy data {legacy_paths} into user shard {self.data_dir}")
+
+    def close(self) -> None:
+        """Close this shard's stores (blocking)."""
+        with self._open_lock:
+            if self.journal_store is not None:
+                self.journal_store.close()
+                self.journal_store = None
+                self.closure_log = None
+                self.profile = None
+
+
+# Shards currently in use by at least one session in this worker
+_shards: Dict[str, UserShard] = {}
+
+
+def acquire_user_shard(user_id: Optional[str], root_dir: str = "pregnancy_data") -> UserShard:
+    """
+    Get the shard for a user and register one more session using it.
+
+    Args:
+        user_id: Stable user id (see session_user_id); None maps to the legacy global files
+        root_dir: Root of the pregnancy data directory
+
+    Returns:
+        The user's shard (call open() off the event loop before use)
+    """
+    if user_id:
+        data_dir = os.path.join(root_dir, "users", shard_key(user_id))
+        legacy_dir = root_dir
+    else:
+        data_dir = root_dir
+        legacy_dir = None
+
+    shard = _shards.get(data_dir)
+    if shard is None:
+        shard = _shards[data_dir] = UserShard(user_id, data_dir, legacy_dir)
+    shard._refcount += 1
+    return shard
+
+
+async def release_user_shard(shard: UserShard) -> None:
+    """
+    Unregister a session from a shard, flushing and closing it when unused.
+
+    Args:
+        shard: Shard returned by acquire_user_shard
+    """
+    shard._refcount -= 1
+    if shard._refcount > 0:
+        return
+
+    if shard.profile is not None:
+        # A debounced write may be mid-commit with the ops it took
+        await shard.profile.wait_for_flush()
+        await shard.profile.flush_async()
+    if shard._refcount > 0:
+        # Another session picked the shard up while we were flushing
+        return
+
+    _shards.pop(shard.data_dir, None)
+    await run_io(shard.close)
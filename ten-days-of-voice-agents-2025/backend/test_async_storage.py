@@ -0,0 +1,139 @@
+"""
+Test script for the async storage layer
+Run this to verify storage I/O does not stall the event loop
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from async_storage import AsyncJournalStore, EventLoopLagMonitor, run_io
+from journal_store import SqliteJournalStore
+from storage_utils import atomic_write_json
+
+
+class SlowJournalStore(SqliteJournalStore):
+    """SQLite store on a simulated slow disk (50ms per save)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.save_threads = set()
+
+    def append(self, entry: dict) -> None:
+        self.save_threads.add(threading.get_ident())
+        time.sleep(0.05)
+        super().append(entry)
+
+
+def _make_entry(day: int) -> dict:
+    return {
+        "datetime": f"2025-01-{day:02d}T09:00:00",
+        "trimester": 2,
+        "emotional_state": "calm",
+        "symptoms": [],
+        "nutrition_notes": [],
+        "pregnancy_tasks": ["rest"],
+    }
+
+
+def test_loop_lag_during_saves():
+    """Test that event loop lag stays low while saves run on the thread pool."""
+    print("🧪 Testing event loop lag during journal saves...")
+
+    async def measure(blocking: bool) -> tuple:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SlowJournalStore(db_file=os.path.join(tmp, "journal.db"))
+            journal = AsyncJournalStore(store)
+            monitor = EventLoopLagMonitor(interval=0.005, warn_threshold_ms=1000)
+            monitor.start()
+            await asyncio.sleep(0.02)
+
+            for day in range(1, 6):
+                if blocking:
+                    store.append(_make_entry(day))
+                else:
+                    await journal.append(_make_entry(day))
+                await asyncio.sleep(0.01)
+
+            await monitor.stop()
+            assert (await journal.rollup()).entry_count == 5
+            store.close()
+            return monitor.get_summary()["max_lag_ms"], store.save_threads
+
+    loop_thread = threading.get_ident()
+    blocking_lag, blocking_threads = asyncio.run(measure(blocking=True))
+    offloaded_lag, offloaded_threads = asyncio.run(measure(blocking=False))
+    # Timings are printed, not asserted: they depend on how busy the machine is
+    print(f"  Max lag with inline saves: {blocking_lag:.1f}ms")
+    print(f"  Max lag with thread pool saves: {offloaded_lag:.1f}ms")
+
+    assert blocking_threads == {loop_thread}
+    assert loop_thread not in offloaded_threads, "Saves should run off the event loop thread"
+
+    print("✅ Event loop lag tests passed!\n")
+
+
+def test_run_io_returns_result():
+    """Test that run_io passes arguments through and returns the result."""
+    print("🧪 Testing run_io...")
+
+    async def run():
+        return await run_io(lambda a, b=0: a + b, 2, b=3)
+
+    assert asyncio.run(run()) == 5
+
+    print("✅ run_io tests passed!\n")
+
+
+def test_concurrent_atomic_writes():
+    """Test that concurrent atomic writes of one file never share a temp file."""
+    print("🧪 Testing concurrent atomic writes...")
+
+    async def write_all(path: str):
+        await asyncio.gather(*(
+            run_io(atomic_write_json, path, {"writer": n, "padding": "x" * 50000})
+            for n in range(16)
+        ))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profile.json")
+        asyncio.run(write_all(path))
+        with open(path) as f:
+            assert json.load(f)["writer"] in range(16)
+        assert os.listdir(tmp) == ["profile.json"]
+
+    print("✅ Concurrent atomic write tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Async Storage Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_loop_lag_during_saves()
+        test_run_io_returns_result()
+        test_concurrent_atomic_writes()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
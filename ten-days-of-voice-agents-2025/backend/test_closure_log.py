@@ -0,0 +1,105 @@
+"""
+Test script for the segmented closure task log
+Run this to verify rotation and compaction work correctly
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from closure_log import ClosureTaskLog
+
+
+def _make_entry(i: int) -> dict:
+    return {"timestamp": f"2025-01-01T10:00:{i:02d}", "task": f"Drink water {i}"}
+
+
+def test_rotation_and_compaction():
+    """Test size-based rotation and compaction into an archive."""
+    print("🧪 Testing closure log rotation and compaction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = os.path.join(tmp, "closure_tasks")
+        log = ClosureTaskLog(log_dir=log_dir, max_segment_bytes=200, compact_after_segments=3, legacy_file=None)
+
+        compaction_requested = False
+        for i in range(20):
+            compaction_requested = log.append(_make_entry(i)) or compaction_requested
+        segments = [name for name in os.listdir(log_dir) if name.startswith("segment-")]
+        assert len(segments) > 3
+        assert compaction_requested
+
+        compacted = log.compact()
+        assert compacted == len(segments) - 1
+        names = os.listdir(log_dir)
+        assert len([name for name in names if name.startswith("archive-")]) == 1
+        assert len([name for name in names if name.startswith("segment-")]) == 1
+
+        # Appends continue after compaction, and reopening resumes the log
+        log.append(_make_entry(20))
+        reopened = ClosureTaskLog(log_dir=log_dir, max_segment_bytes=200, legacy_file=None)
+        reopened.append(_make_entry(21))
+        tasks = [entry["task"] for entry in reopened.iter_entries()]
+        assert tasks == [f"Drink water {i}" for i in range(22)]
+
+    print("✅ Rotation and compaction tests passed!\n")
+
+
+def test_legacy_migration():
+    """Test one-shot migration of closure_tasks.json."""
+    print("🧪 Testing closure log legacy migration...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, "closure_tasks.json")
+        with open(legacy_file, 'w') as f:
+            json.dump([_make_entry(0), _make_entry(1)], f)
+
+        log = ClosureTaskLog(log_dir=os.path.join(tmp, "closure_tasks"), legacy_file=legacy_file)
+        log.append(_make_entry(2))
+        assert [entry["task"] for entry in log.iter_entries()] == [
+            "Drink water 0", "Drink water 1", "Drink water 2"
+        ]
+        assert os.path.exists(f"{legacy_file}.migrated")
+
+        log.compact()
+        assert len(list(log.iter_entries())) == 3
+
+        # A legacy file that is not a list is left alone
+        other_legacy = os.path.join(tmp, "other_closure_tasks.json")
+        with open(other_legacy, 'w') as f:
+            json.dump({"task": "Drink water"}, f)
+        log = ClosureTaskLog(log_dir=os.path.join(tmp, "other_closure_tasks"), legacy_file=other_legacy)
+        assert list(log.iter_entries()) == []
+        assert os.path.exists(other_legacy)
+
+    print("✅ Legacy migration tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Closure Log Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_rotation_and_compaction()
+        test_legacy_migration()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -25,7 +25,19 @@ def test_closure_detection():
         "okay thanks",
         "bye",
         "that's all",
-        "appreciate it"
+        "appreciate it",
+        "Thank you so much!",
+        "I'm done.",
+        "oh okay",
+        "ok bye",
+        "that's great, see you tomorrow",
+        "thanks for your help",
+        "thank you for your help",
+        "thanks, have a good day",
+        "that's all for today",
+        "I'm done for today",
+        "sounds good, talk to you later",
+        "bye for now"
     ]
     
     for phrase in positive_cases:
@@ -39,7 +51,22 @@ def test_closure_detection():
         "hello",
         "how are you",
         "I'm feeling anxious",
-        "what should I eat"
+        "what should I eat",
+        # Substrings of other words
+        "can you book my scan",
+        "my stomach feels empty",
+        "I'm pretty tired today",
+        # Right phrase, wrong position
+        "I'm done with my glucose test, what's next?",
+        "ok so what can I eat for breakfast",
+        "thanks, and what about sushi?",
+        "perfect, can I also have coffee",
+        "I'm not done yet",
+        "I'm almost done",
+        "are you done",
+        "I will talk later with my doctor about the bleeding",
+        "can you say bye to my husband",
+        "thanks for that, but what about coffee"
     ]
     
     for phrase in negative_cases:
@@ -228,7 +255,7 @@ def run_all_tests():
         print("1. Start the agent: python src/agent.py")
         print("2. Have a conversation")
         print("3. Say 'thank you' to trigger task assignment")
-        print("4. Check pregnancy_data/closure_tasks.json")
+        print("4. Check pregnancy_data/closure_tasks/ (segment-*.jsonl)")
         print("5. Check Todoist for the new task")
         
     except AssertionError as e:
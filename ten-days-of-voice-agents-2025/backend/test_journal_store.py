@@ -0,0 +1,255 @@
+"""
+Test script for the pregnancy journal store
+Run this to verify journal persistence works correctly
+"""
+
+import sys
+import os
+import json
+import tempfile
+from datetime import date, datetime
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from journal_store import JsonlJournalStore, SqliteJournalStore, create_journal_store
+
+
+def _make_entry(day: int, emotion: str = "happy") -> dict:
+    return {
+        "datetime": f"2025-01-{day:02d}T09:00:00",
+        "pregnancy_week": 20,
+        "trimester": 2,
+        "emotional_state": emotion,
+        "fatigue_level": "okay",
+        "symptoms": [{"symptom": "back pain", "is_emergency": False}],
+        "nutrition_notes": [],
+        "pregnancy_tasks": [f"task {day}"],
+        "summary": ""
+    }
+
+
+def test_append_and_latest():
+    """Test appending entries and reading them back."""
+    print("🧪 Testing journal append...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlJournalStore(
+            journal_file=os.path.join(tmp, "pregnancy_journal.jsonl"),
+            legacy_file=None
+        )
+        assert store.latest() is None
+        assert store.load_all() == []
+
+        for day in range(1, 4):
+            store.append(_make_entry(day))
+
+        entries = store.load_all()
+        assert len(entries) == 3
+        assert store.latest()["pregnancy_tasks"] == ["task 3"]
+
+    print("✅ Journal append tests passed!\n")
+
+
+def test_legacy_migration():
+    """Test one-shot migration from the legacy JSON array journal."""
+    print("🧪 Testing legacy journal migration...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_file = os.path.join(tmp, "pregnancy_journal.json")
+        journal_file = os.path.join(tmp, "pregnancy_journal.jsonl")
+        with open(legacy_file, 'w') as f:
+            json.dump([_make_entry(1), _make_entry(2)], f)
+
+        store = JsonlJournalStore(journal_file=journal_file, legacy_file=legacy_file)
+        assert len(store.load_all()) == 2
+        assert not os.path.exists(legacy_file)
+        assert os.path.exists(f"{legacy_file}.migrated")
+
+        # Reopening must not migrate again
+        store = JsonlJournalStore(journal_file=journal_file, legacy_file=legacy_file)
+        assert len(store.load_all()) == 2
+
+    print("✅ Legacy migration tests passed!\n")
+
+
+def test_torn_write_is_skipped():
+    """Test that a partial last line does not break reads."""
+    print("🧪 Testing torn write handling...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        journal_file = os.path.join(tmp, "pregnancy_journal.jsonl")
+        store = JsonlJournalStore(journal_file=journal_file, legacy_file=None)
+        store.append(_make_entry(1))
+        with open(journal_file, 'a') as f:
+            f.write('{"datetime": "2025-01-02')
+
+        assert len(store.load_all()) == 1
+        assert store.latest()["pregnancy_tasks"] == ["task 1"]
+
+        # The next append starts a fresh line instead of extending the torn one
+        store.append(_make_entry(3))
+        assert [entry["pregnancy_tasks"] for entry in store.load_all()] == [["task 1"], ["task 3"]]
+        assert store.rollup().entry_count == 2
+
+    print("✅ Torn write tests passed!\n")
+
+
+def test_latest_with_large_entries():
+    """Test tail-seek lookups when entries span several read chunks."""
+    print("🧪 Testing latest-entry tail seek...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlJournalStore(
+            journal_file=os.path.join(tmp, "pregnancy_journal.jsonl"),
+            legacy_file=None
+        )
+        for day in range(1, 6):
+            entry = _make_entry(day)
+            entry["summary"] = "x" * 10000
+            store.append(entry)
+
+        assert store.latest()["pregnancy_tasks"] == ["task 5"]
+        assert store.latest_tasks() == ["task 5"]
+
+        sqlite_store = SqliteJournalStore(db_file=os.path.join(tmp, "journal.db"))
+        assert sqlite_store.latest() is None
+        assert sqlite_store.latest_tasks() == []
+        sqlite_store.append(_make_entry(1))
+        sqlite_store.append(_make_entry(2))
+        assert sqlite_store.latest_tasks() == ["task 2"]
+        sqlite_store.close()
+
+    print("✅ Latest-entry tests passed!\n")
+
+
+def test_sqlite_queries():
+    """Test indexed range, trimester and symptom queries."""
+    print("🧪 Testing SQLite journal queries...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SqliteJournalStore(db_file=os.path.join(tmp, "journal.db"))
+        for day in range(1, 11):
+            entry = _make_entry(day, emotion="calm" if day % 2 else "tired")
+            if day > 5:
+                entry["trimester"] = 3
+                entry["symptoms"] = [{"symptom": "Swelling", "is_emergency": False}]
+            store.append(entry)
+
+        assert len(store.load_all()) == 10
+        assert store.latest()["pregnancy_tasks"] == ["task 10"]
+        assert len(store.entries_since(datetime(2025, 1, 8))) == 3
+        assert len(store.entries_for_trimester(2)) == 5
+        assert len(store.entries_with_symptom("swelling")) == 5
+        assert len(store.entries_with_symptom("back pain")) == 5
+        store.close()
+
+    print("✅ SQLite query tests passed!\n")
+
+
+def test_sqlite_imports_existing_journal():
+    """Test that the SQLite store imports the JSONL journal once."""
+    print("🧪 Testing SQLite import from JSONL...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_store = JsonlJournalStore(
+            journal_file=os.path.join(tmp, "pregnancy_journal.jsonl"),
+            legacy_file=None
+        )
+        jsonl_store.append(_make_entry(1))
+        jsonl_store.append(_make_entry(2))
+
+        store = create_journal_store(data_dir=tmp, backend="sqlite")
+        assert len(store.load_all()) == 2
+        store.close()
+
+        # Reopening must not import the same entries twice, or read the JSONL at all
+        jsonl_store.append(_make_entry(3))
+        store = create_journal_store(data_dir=tmp, backend="sqlite")
+        assert len(store.load_all()) == 2
+        store.close()
+
+    print("✅ SQLite import tests passed!\n")
+
+
+def test_daily_rollups():
+    """Test that both backends keep daily rollups in sync with appends."""
+    print("🧪 Testing daily rollups...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [
+            JsonlJournalStore(
+                journal_file=os.path.join(tmp, "pregnancy_journal.jsonl"),
+                legacy_file=None
+            ),
+            SqliteJournalStore(db_file=os.path.join(tmp, "journal.db")),
+        ]
+        for store in stores:
+            for day in range(1, 11):
+                entry = _make_entry(day, emotion="calm" if day % 3 else "tired")
+                entry["nutrition_notes"] = [{"query": "sushi"}, {"query": "coffee"}]
+                if day > 5:
+                    entry["trimester"] = 3
+                store.append(entry)
+            store.append(_make_entry(10, emotion="calm"))
+
+            week = store.rollup(since_day=date(2025, 1, 4), until_day=date(2025, 1, 10))
+            assert week.entry_count == 8
+            assert week.emotions.most_common(1)[0] == ("calm", 6)
+            assert week.symptoms["back pain"] == 8
+            assert week.task_count == 8
+            assert week.nutrition_count == 14
+
+            third_trimester = store.rollup(trimester=3)
+            assert third_trimester.entry_count == 5
+            assert store.rollup(trimester=2).entry_count == 6
+            store.close()
+
+        # A reopened SQLite store must not double count
+        reopened = SqliteJournalStore(db_file=os.path.join(tmp, "journal.db"))
+        assert reopened.rollup().entry_count == 11
+        reopened.close()
+
+        # A JSONL store that crashed before its snapshot folds in the missing tail
+        journal_file = os.path.join(tmp, "pregnancy_journal.jsonl")
+        crashed = JsonlJournalStore(journal_file=journal_file, legacy_file=None, snapshot_every=1000)
+        crashed.append(_make_entry(12))
+        reopened = JsonlJournalStore(journal_file=journal_file, legacy_file=None)
+        assert reopened.rollup().entry_count == 12
+        # Entries appended by another store on the same file are picked up too
+        crashed.append(_make_entry(13))
+        assert reopened.rollup().entry_count == 13
+        reopened.close()
+
+    print("✅ Daily rollup tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Journal Store Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_append_and_latest()
+        test_legacy_migration()
+        test_torn_write_is_skipped()
+        test_latest_with_large_entries()
+        test_sqlite_queries()
+        test_sqlite_imports_existing_journal()
+        test_daily_rollups()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,62 @@
+"""
+Test script for latency tracking
+Run this to verify worst-case response latencies are recorded
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from latency_metrics import LatencyTracker
+
+
+def test_latency_tracker():
+    """Test that the tracker keeps count, worst case and mean."""
+    print("🧪 Testing latency tracker...")
+
+    tracker = LatencyTracker("escalation")
+    assert tracker.finish() is None, "finish() without start() records nothing"
+
+    tracker.start(time.perf_counter() - 0.2)
+    assert tracker.pending
+    slow = tracker.finish()
+    tracker.start()
+    fast = tracker.finish()
+    assert not tracker.pending
+
+    summary = tracker.get_summary()
+    print(f"  Summary: {summary}")
+    assert summary["count"] == 2
+    assert slow >= 200 and fast < 50
+    assert summary["max_ms"] == round(slow, 2)
+    assert summary["mean_ms"] == round((slow + fast) / 2, 2)
+
+    print("✅ Latency tracker tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Latency Metrics Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_latency_tracker()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,277 @@
+"""
+Test script for the nutrition engine
+Run this to verify food safety lookups and recommendations
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from food_catalog import FoodCatalog, food_key, load_food_catalog
+from food_index import FoodIndex, food_tokens, name_aliases
+from nutrition_engine import NutritionEngine
+from pregnancy_profile import PregnancyProfile
+
+with open(os.path.join(os.path.dirname(__file__), 'pregnancy_data', 'foods.json')) as f:
+    FOODS = json.load(f)
+
+
+def _engine(allergies=()):
+    return NutritionEngine(SimpleNamespace(profile={"allergies": list(allergies)}, allergy_version=0), FOODS)
+
+
+def test_compiled_catalog():
+    """Test the memory-mapped catalog round-trips records and finds names."""
+    print("🧪 Testing compiled food catalog...")
+
+    foods = {
+        "safe_foods": {
+            "trimester_1": [
+                {"name": "Spinach", "benefit": "Folate", "allergens": [], "nutrients": {"iron_mg": 2.7}},
+                {"name": "Yogurt", "benefit": "Calcium", "allergens": ["Dairy"]},
+            ],
+            "trimester_2": [
+                {"name": "Spinach", "benefit": "Folate", "allergens": []},
+                {"name": "Almonds", "benefit": "Fats", "allergens": ["nuts", "dairy"]},
+            ],
+        }
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "foods.catalog")
+        catalog = load_food_catalog(path, foods)
+        assert os.path.exists(path) and len(catalog) == 3
+
+        spinach = catalog.find(food_key(food_tokens("spinach")))
+        record = catalog.record(spinach)
+        assert record.name == "Spinach" and record.trimesters == (1, 2)
+        assert list(record.nutrients) == ["iron_mg"] and abs(record.nutrients["iron_mg"] - 2.7) < 1e-6
+        assert catalog.nutrient(catalog.find("yogurt"), "iron_mg") is None
+        assert catalog.allergens(catalog.find("almond")) == ("dairy", "nuts")
+        assert catalog.find("kale") is None
+        assert list(catalog.trimester_ids(2)) == [spinach, catalog.find("almond")]
+
+        # A reopened (mmapped) catalog is byte-for-byte the same
+        assert FoodCatalog.open(path).record(spinach) == record
+
+        # Name tokens are indexed on disk, the curated tables ride along
+        assert list(catalog.token_postings("spinach")) == [spinach]
+        assert len(catalog.token_postings("kale")) == 0
+        assert "safe_foods" not in catalog.curated()
+
+        # An up-to-date catalog opens without foods.json; an old format is rebuilt
+        assert len(load_food_catalog(path, source_file=os.path.join(tmp, "missing.json"))) == 3
+        source = os.path.join(tmp, "foods.json")
+        with open(source, "w") as f:
+            json.dump(foods, f)
+        with open(path, "wb") as f:
+            f.write(b"FOODCAT1" + b"\0" * 64)
+        os.utime(source, (0, 0))
+        assert len(load_food_catalog(path, source_file=source)) == 3
+
+    print("✅ Compiled food catalog tests passed!\n")
+
+
+def test_food_aliases():
+    """Test catalog names are split into usable aliases."""
+    print("🧪 Testing food aliases...")
+
+    assert name_aliases("High-mercury fish (shark, swordfish)") == [
+        "High-mercury fish (shark, swordfish)", "High-mercury fish", "shark", "swordfish"
+    ]
+    assert name_aliases("Deli meats (unless heated)") == ["Deli meats (unless heated)", "Deli meats"]
+    assert name_aliases("Excessive caffeine (>200mg/day)")[1:] == ["Excessive caffeine"]
+    assert food_tokens("Sweet Potatoes") == food_tokens("sweet potato")
+    assert food_tokens("berries") == ("berry",)
+
+    print("✅ Food alias tests passed!\n")
+
+
+def test_check_food_safety():
+    """Test avoid-list, safe food, allergen and unknown lookups."""
+    print("🧪 Testing food safety checks...")
+
+    engine = _engine()
+    assert engine.check_food_safety("sushi") == (False, "⚠️ Raw fish (sushi) should be avoided during pregnancy.")
+    assert engine.check_food_safety("a swordfish steak")[0] is False
+    assert engine.check_food_safety("Brie")[0] is False
+    assert engine.check_food_safety("fish")[0] is False
+    assert engine.check_food_safety("raw eggs")[0] is False
+    assert engine.check_food_safety("eggs") == (True, "✅ Eggs is great! Protein, choline")
+    assert engine.check_food_safety("sweet potato")[0] is True
+    assert engine.check_food_safety("some salmon please")[1].startswith("✅ Salmon")
+    # Part of a catalog food's name
+    assert engine.check_food_safety("potato") == (True, "✅ Sweet potatoes is great! Vitamin A, fiber")
+    assert engine.check_food_safety("tea")[1].startswith("✅ Ginger tea")
+    assert engine.check_food_safety("bread")[1].startswith("✅ Whole grain bread")
+    assert engine.check_food_safety("dragonfruit")[1].startswith("I'm not sure")
+    # A plain food is not the specific variety a curated alias names
+    assert engine.check_food_safety("bigeye tuna")[0] is False
+    for food in ["tuna", "oysters", "dogs"]:
+        assert engine.check_food_safety(food)[1].startswith("I'm not sure"), food
+    assert engine.check_food_safety("nuts")[1].startswith("I'm not sure")
+
+    allergic = _engine(allergies=["nuts"])
+    assert allergic.check_food_safety("almonds") == (
+        False, "⚠️ Almonds contains nuts, which you're allergic to."
+    )
+    assert allergic.check_food_safety("nuts") == (
+        False, "⚠️ Walnuts contains nuts, which you're allergic to."
+    )
+    assert allergic.check_food_safety("tuna")[1].startswith("I'm not sure")
+
+    print("✅ Food safety tests passed!\n")
+
+
+def test_misheard_food_names():
+    """Test "did you mean" suggestions for misheard food names."""
+    print("🧪 Testing misheard food names...")
+
+    engine = _engine()
+    assert engine.check_food_safety("sushy") == (
+        False, "Did you mean sushi? ⚠️ Raw fish (sushi) should be avoided during pregnancy."
+    )
+    assert engine.check_food_safety("mercury fish")[0] is False
+    assert engine.check_food_safety("sword fish")[1].startswith("Did you mean swordfish?")
+    assert engine.check_food_safety("expresso")[0] is False
+    assert engine.check_food_safety("avacado") == (
+        True, "Did you mean Avocado? ✅ Avocado is great! Healthy fats, folate"
+    )
+    assert engine.check_food_safety("pizza")[1].startswith("I'm not sure")
+
+    # Sound-alike spellings, and avoid-list near-matches ranked first
+    foods = {
+        "safe_foods": {"trimester_1": [{"name": "Keys lime", "benefit": "Vitamin C", "allergens": []}]},
+        "foods_to_avoid": ["Runny quiche"],
+        "food_aliases": {"Runny quiche": ["quiche"]},
+    }
+    index = FoodIndex(foods)
+    suggestions = index.suggest("keesh")
+    assert [(match.entry.name, match.alias) for match in suggestions][0] == ("Runny quiche", "quiche")
+    assert index.suggest("dragonfruit") == []
+
+    index = _engine().food_index
+    started = time.perf_counter()
+    for _ in range(200):
+        suggestions = index.suggest("sushy")
+    suggest_us = (time.perf_counter() - started) / 200 * 1e6
+    # Printed, not asserted: timings depend on how busy the machine is
+    print(f"  Suggest: {suggest_us:.1f}us")
+    assert suggestions
+
+    print("✅ Misheard food name tests passed!\n")
+
+
+def test_multi_food_questions():
+    """Test that every food in a question is found and answered."""
+    print("🧪 Testing multi-food questions...")
+
+    engine = _engine(allergies=["dairy"])
+    results = engine.check_foods_in_text("Can I have sushi, coffee and brie? Also yogurt and Sweet Potatoes!")
+    assert [(name, safe) for name, safe, _ in results] == [
+        ("Raw fish (sushi)", False),
+        ("Excessive caffeine (>200mg/day)", False),
+        ("Unpasteurized cheese", False),
+        ("Yogurt", False),
+        ("Sweet potatoes", True),
+    ]
+    assert "allergic" in results[3][2]
+
+    # Longest alias wins, and repeated mentions are answered once
+    results = engine.check_foods_in_text("raw eggs or eggs, and more eggs")
+    assert [(name, safe) for name, safe, _ in results] == [("Raw eggs", False), ("Eggs", True)]
+    assert engine.check_foods_in_text("what should I eat this week") == []
+
+    print("✅ Multi-food question tests passed!\n")
+
+
+def test_cached_recommendations():
+    """Test allergy-aware partitions are shared and rebuilt only on allergy changes."""
+    print("🧪 Testing cached recommendations...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = PregnancyProfile(profile_file=os.path.join(tmp, "profile.json"))
+        engine = NutritionEngine(profile, FOODS)
+
+        before = engine.get_recommendations(2)
+        assert all(food["safe"] for food in before)
+        mask = engine._get_allergy_mask()
+        assert engine.food_index.partition("trimester_2", mask) is engine.food_index.partition("trimester_2", mask)
+
+        profile.add_allergy("Nuts")
+        profile.add_allergy("nuts")
+        assert profile.allergy_version == 1
+        after = {food["name"]: food for food in engine.get_recommendations(2)}
+        assert after["Almonds"]["safe"] is False
+        assert after["Almonds"]["warning"] == "⚠️ Contains allergen"
+        assert "Almonds" not in engine.get_safe_recommendations_text(2, limit=10)
+        assert engine.check_food_safety("walnuts")[0] is False
+
+        # Another user with the same allergy set shares the partition
+        other = _engine(allergies=["nuts"])
+        assert other._get_allergy_mask() == engine._get_allergy_mask()
+        assert other.food_index is engine.food_index
+
+    print("✅ Cached recommendation tests passed!\n")
+
+
+def test_lookup_scales_with_catalog():
+    """Test lookups in a large catalog (timings are printed for comparison)."""
+    print("🧪 Testing food index scaling...")
+
+    def catalog(size):
+        foods = [{"name": f"Food{i} dish{i % 97}", "benefit": "x", "allergens": []} for i in range(size)]
+        return {"safe_foods": {"trimester_1": foods}, "foods_to_avoid": FOODS["foods_to_avoid"]}
+
+    def lookup_us(index):
+        started = time.perf_counter()
+        for _ in range(200):
+            index.lookup("is swordfish okay")
+        return (time.perf_counter() - started) / 200 * 1e6
+
+    small, large = FoodIndex(catalog(50)), FoodIndex(catalog(20000))
+    small_us, large_us = lookup_us(small), lookup_us(large)
+    # Timings are printed, not asserted: they depend on how busy the machine is
+    print(f"  Lookup: {small_us:.1f}us (50 foods), {large_us:.1f}us (20000 foods)")
+    assert large.lookup("food1234 dish70").entry.name == "Food1234 dish70"
+    # A word shared by hundreds of foods finds the first of them
+    assert large.lookup("dish70").entry.name == "Food70 dish70"
+    assert large.lookup("is swordfish okay").entry.name == small.lookup("is swordfish okay").entry.name
+
+    print("✅ Food index scaling tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Nutrition Engine Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_compiled_catalog()
+        test_food_aliases()
+        test_check_food_safety()
+        test_misheard_food_names()
+        test_multi_food_questions()
+        test_cached_recommendations()
+        test_lookup_scales_with_catalog()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
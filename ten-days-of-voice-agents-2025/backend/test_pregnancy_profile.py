@@ -0,0 +1,213 @@
+"""
+Test script for pregnancy profile persistence
+Run this to verify profile writes are batched and atomic
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import date
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import pregnancy_profile
+from pregnancy_profile import PregnancyProfile
+from profile_store import VersionedProfileStore
+from reference_data import MAX_WEEK, compile_week_table, load_reference_data
+
+
+class CountingWrites:
+    """Counts profile commits to the versioned store."""
+
+    def __init__(self):
+        self.count = 0
+        self._original = VersionedProfileStore.commit
+
+    def __enter__(self):
+        original = self._original
+
+        def counting_commit(store, *args, **kwargs):
+            self.count += 1
+            return original(store, *args, **kwargs)
+        VersionedProfileStore.commit = counting_commit
+        return self
+
+    def __exit__(self, *exc):
+        VersionedProfileStore.commit = self._original
+
+
+def test_transaction_batches_writes():
+    """Test that a transaction commits several mutations in one write."""
+    print("🧪 Testing profile transactions...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_file = os.path.join(tmp, "profile.json")
+        profile = PregnancyProfile(profile_file=profile_file)
+
+        with CountingWrites() as writes:
+            with profile.transaction():
+                for allergy in ["Nuts", "shellfish", "dairy", "nuts"]:
+                    profile.add_allergy(allergy)
+                profile.set_due_date("2026-03-01")
+            assert writes.count == 1
+
+        saved = PregnancyProfile(profile_file=profile_file).profile
+        assert saved["allergies"] == ["nuts", "shellfish", "dairy"]
+        assert saved["due_date"] == "2026-03-01"
+        assert not [name for name in os.listdir(profile.store.store_dir) if name.endswith(".tmp")]
+
+    print("✅ Profile transaction tests passed!\n")
+
+
+def test_debounced_writes_coalesce():
+    """Test that mutations on the event loop coalesce into one write."""
+    print("🧪 Testing debounced profile writes...")
+
+    async def run(profile_file: str) -> tuple:
+        profile = PregnancyProfile(profile_file=profile_file, debounce_seconds=0.05)
+        with CountingWrites() as writes:
+            profile.add_allergy("nuts")
+            profile.add_allergy("eggs")
+            profile.add_food_preference("spicy")
+            assert writes.count == 0
+            await asyncio.sleep(0.2)
+            count_after_window = writes.count
+
+            # A forced flush writes pending changes immediately
+            profile.add_allergy("fish")
+            await profile.flush_async()
+            return count_after_window, writes.count
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_file = os.path.join(tmp, "profile.json")
+        count_after_window, total = asyncio.run(run(profile_file))
+        assert count_after_window == 1
+        assert total == 2
+
+        saved = PregnancyProfile(profile_file=profile_file).profile
+        assert saved["allergies"] == ["nuts", "eggs", "fish"]
+        assert saved["food_preferences"] == ["spicy"]
+
+    print("✅ Debounced write tests passed!\n")
+
+
+def test_week_info_table():
+    """Test that week info comes from the shared week table."""
+    print("🧪 Testing week info lookup...")
+
+    table = compile_week_table({"weeks": {
+        "1-13": {"trimester": 1, "baby_size": "lime", "key_developments": [], "common_symptoms": [], "tips": []},
+        "14-40": {"trimester": 2, "baby_size": "melon", "key_developments": [], "common_symptoms": [], "tips": []},
+    }})
+    assert len(table) == MAX_WEEK + 1
+    assert table[0] is None and table[41] is None
+    assert table[13]["baby_size"] == "lime" and table[13]["week"] == 13
+    assert table[14]["trimester"] == 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile = PregnancyProfile(profile_file=os.path.join(tmp, "profile.json"))
+        assert profile.get_week_info() is None
+
+        profile.profile["current_week"] = 20
+        info = profile.get_week_info()
+        assert info["week"] == 20 and info["trimester"] == 2
+        # Records are shared and read-only, not rebuilt per call
+        assert profile.get_week_info() is info
+        try:
+            info["week"] = 21
+            assert False, "week records should be read-only"
+        except TypeError:
+            pass
+
+        profile.profile["current_week"] = 99
+        assert profile.get_week_info() is None
+
+    # Reference data does not depend on the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            reference_data = load_reference_data()
+        finally:
+            os.chdir(cwd)
+    assert reference_data.week_table[20] is not None
+    assert reference_data.food_catalog is not None and len(reference_data.food_catalog) > 0
+
+    print("✅ Week info tests passed!\n")
+
+
+def test_derived_week():
+    """Test that week and trimester follow the calendar without rewrites."""
+    print("🧪 Testing derived week and trimester...")
+
+    original_today, original_week = pregnancy_profile._today, pregnancy_profile.week_from_due_date
+    today = [date(2026, 1, 5)]
+    calls = []
+
+    def counting_week(*args):
+        calls.append(args)
+        return original_week(*args)
+
+    pregnancy_profile._today = lambda: today[0]
+    pregnancy_profile.week_from_due_date = counting_week
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            profile = PregnancyProfile(profile_file=os.path.join(tmp, "profile.json"))
+            assert profile.current_week is None
+            profile.set_due_date("2026-06-15")
+            assert (profile.current_week, profile.trimester) == (17, 2)
+            assert profile.get_week_info()["week"] == 17
+
+            # Memoized per (due date, day)
+            calls.clear()
+            for _ in range(100):
+                assert profile.trimester == 2
+            assert len(calls) == 0
+
+            # Weeks later the derived values move on, with no profile write
+            with CountingWrites() as writes:
+                today[0] = date(2026, 3, 30)
+                assert (profile.current_week, profile.trimester) == (29, 3)
+                assert profile.get_week_info()["trimester"] == 3
+                assert writes.count == 0
+            assert len(calls) == 1
+
+            # Clamped to 1..42
+            today[0] = date(2025, 1, 1)
+            assert profile.current_week == 1
+            today[0] = date(2026, 12, 1)
+            assert profile.current_week == 42
+    finally:
+        pregnancy_profile._today, pregnancy_profile.week_from_due_date = original_today, original_week
+
+    print("✅ Derived week tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Pregnancy Profile Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_transaction_batches_writes()
+        test_debounced_writes_coalesce()
+        test_week_info_table()
+        test_derived_week()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,181 @@
+"""
+Test script for the versioned profile store
+Run this to verify concurrent profile writers never lose changes
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from pregnancy_profile import PregnancyProfile
+from profile_store import VersionedProfileStore, apply_ops
+
+
+def test_compare_and_swap():
+    """Test that a stale commit is rebased onto the newer version."""
+    print("🧪 Testing compare-and-swap commits...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VersionedProfileStore(os.path.join(tmp, "versions"))
+        assert store.load() == (0, None)
+
+        base = {"allergies": [], "due_date": None}
+        version, profile = store.commit(0, base, [["add", "allergies", "nuts"]])
+        assert (version, profile["allergies"]) == (1, ["nuts"])
+
+        # Made against version 0, committed after version 1
+        version, profile = store.commit(0, base, [["add", "allergies", "dairy"], ["set", "due_date", "2026-05-01"]])
+        assert version == 2
+        assert profile == {"allergies": ["nuts", "dairy"], "due_date": "2026-05-01"}
+        assert base == {"allergies": [], "due_date": None}
+        assert store.load() == (2, profile)
+
+        # Re-adding commutes; the op log is kept with each version
+        assert apply_ops({"allergies": ["nuts"]}, [["add", "allergies", "nuts"]]) == {"allergies": ["nuts"]}
+        with open(os.path.join(tmp, "versions", "v000000002.json")) as f:
+            assert json.load(f)["ops"][0] == ["add", "allergies", "dairy"]
+
+    print("✅ Compare-and-swap tests passed!\n")
+
+
+def test_corrupt_newest_version():
+    """Test that a commit never reuses the number of an unreadable version."""
+    print("🧪 Testing commits after a corrupt version...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VersionedProfileStore(os.path.join(tmp, "versions"))
+        store.commit(0, {"allergies": []}, [["add", "allergies", "nuts"]])
+        store.commit(1, {"allergies": ["nuts"]}, [["add", "allergies", "eggs"]])
+        with open(os.path.join(tmp, "versions", "v000000002.json"), "w") as f:
+            f.write('{"version": 2, "prof')
+
+        # Reads fall back to version 1, the next commit goes after version 2
+        assert store.load() == (1, {"allergies": ["nuts"]})
+        version, profile = store.commit(1, {"allergies": ["nuts"]}, [["add", "allergies", "fish"]])
+        assert (version, profile) == (3, {"allergies": ["nuts", "fish"]})
+        assert store.load() == (3, profile)
+
+    print("✅ Corrupt version tests passed!\n")
+
+
+def test_concurrent_writers():
+    """Test that racing writers never drop each other's changes."""
+    print("🧪 Testing concurrent profile writers...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = os.path.join(tmp, "versions")
+
+        def writer(name: str):
+            # Each thread stands in for another worker process with its own store
+            store = VersionedProfileStore(store_dir, keep_versions=4)
+            version, profile = 0, {"allergies": []}
+            for i in range(10):
+                version, profile = store.commit(version, profile, [["add", "allergies", f"{name}-{i}"]])
+
+        threads = [threading.Thread(target=writer, args=(f"w{n}",)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        version, profile = VersionedProfileStore(store_dir).load()
+        assert version == 60
+        assert sorted(profile["allergies"]) == sorted(f"w{n}-{i}" for n in range(6) for i in range(10))
+        assert len(os.listdir(store_dir)) <= 4 + 6
+
+    print("✅ Concurrent writer tests passed!\n")
+
+
+def test_profiles_merge_across_sessions():
+    """Test two sessions of one user editing different fields at once."""
+    print("🧪 Testing profile merges across sessions...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_file = os.path.join(tmp, "profile.json")
+        with open(profile_file, "w") as f:
+            json.dump({"due_date": None, "allergies": ["eggs"], "food_preferences": []}, f)
+
+        phone = PregnancyProfile(profile_file=profile_file)
+        laptop = PregnancyProfile(profile_file=profile_file)
+        assert phone.profile["allergies"] == ["eggs"]
+
+        phone.add_allergy("nuts")
+        laptop.set_due_date("2026-06-15")
+
+        # The laptop's commit merged the phone's allergy, and its engines must rebuild
+        assert laptop.profile["allergies"] == ["eggs", "nuts"]
+        assert laptop.allergy_version == 1
+
+        saved = PregnancyProfile(profile_file=profile_file).profile
+        assert saved["allergies"] == ["eggs", "nuts"]
+        assert saved["due_date"] == "2026-06-15"
+
+    print("✅ Profile merge tests passed!\n")
+
+
+def test_background_save_retries():
+    """Test that a failed debounced save is logged and retried, not dropped."""
+    print("🧪 Testing background save retries...")
+
+    async def run(profile_file: str):
+        profile = PregnancyProfile(profile_file=profile_file, debounce_seconds=0.02)
+        commit = profile.store.commit
+        calls = []
+
+        def flaky_commit(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return commit(*args)
+
+        profile.store.commit = flaky_commit
+        profile.add_allergy("nuts")
+        await asyncio.sleep(0.03)
+        await profile.wait_for_flush()
+        assert len(calls) == 1 and profile._dirty
+
+        await asyncio.sleep(0.05)
+        await profile.wait_for_flush()
+        assert len(calls) == 2 and not profile._dirty and profile._flush_task is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profile_file = os.path.join(tmp, "profile.json")
+        asyncio.run(run(profile_file))
+        assert PregnancyProfile(profile_file=profile_file).profile["allergies"] == ["nuts"]
+
+    print("✅ Background save retry tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Profile Store Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_compare_and_swap()
+        test_corrupt_newest_version()
+        test_concurrent_writers()
+        test_profiles_merge_across_sessions()
+        test_background_save_retries()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,278 @@
+"""
+Test script for the symptom analyzer
+Run this to verify symptom and emergency matching work correctly
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from fuzzy_index import FuzzyIndex, bounded_edit_distance, consonant_key
+from keyword_matcher import KeywordMatcher
+from semantic_index import SemanticIndex
+from reference_data import load_reference_data
+from symptom_analyzer import SymptomAnalyzer, is_negated
+
+GUIDE = {
+    "emergency_keywords": ["bleeding", "heavy bleeding", "blood", "severe headache", "can't breathe"],
+    "common_symptoms": {
+        "trimester_1": [
+            {"symptom": "nausea", "response": "nausea response"},
+            {"symptom": "fatigue", "descriptions": "tired, exhausted, worn out", "response": "fatigue response"}
+        ],
+        "trimester_2": [
+            {"symptom": "back pain", "response": "back pain response"},
+            {"symptom": "headache", "response": "headache response"},
+            {"symptom": "heartburn", "aliases": ["acid reflux"], "response": "heartburn response"}
+        ]
+    },
+    "escalation_message": "call your doctor"
+}
+
+
+def test_keyword_matcher():
+    """Test one-pass matching with word boundaries."""
+    print("🧪 Testing keyword matcher...")
+
+    matcher = KeywordMatcher(["he", "she", "his", "hers", "ty"])
+    keywords = [m.keyword for m in matcher.find_all("she said hers was his")]
+    assert keywords == ["she", "he", "hers", "his"]
+    assert matcher.find_all("empty pretty") == []
+    assert [m.keyword for m in matcher.find_all("ty!")] == ["ty"]
+
+    strict = KeywordMatcher(["ok"], require_end_boundary=True)
+    assert strict.find_all("okay, book") == []
+    assert len(strict.find_all("ok then")) == 1
+
+    print("✅ Keyword matcher tests passed!\n")
+
+
+def test_fuzzy_index():
+    """Test typo- and split-tolerant phrase lookup."""
+    print("🧪 Testing fuzzy index...")
+
+    assert bounded_edit_distance("nausia", "nausea", 1) == 1
+    assert bounded_edit_distance("kitten", "sitting", 2) is None
+    assert bounded_edit_distance("same", "same", 0) == 0
+
+    index = FuzzyIndex(["nausea", "heartburn", "back pain", "constipation", "leg cramps"])
+    assert [m.phrase for m in index.search("I have nausia")] == ["nausea"]
+    assert index.search("bad heart burn tonight")[0].phrase == "heartburn"
+    assert index.search("my backpain is worse")[0].phrase == "back pain"
+    assert index.search("constipashun")[0].phrase == "constipation"
+    assert index.search("my leg is fine and I feel great") == []
+
+    assert consonant_key("nausia") == consonant_key("nausea")
+    assert consonant_key("constipashun") == consonant_key("constipation")
+    strict = FuzzyIndex(["swelling", "back pain"], word_key=consonant_key)
+    assert strict.search("it is smelling weird") == []
+    assert strict.search("I packed my backpack") == []
+    assert strict.search("my feet are sweling")[0].phrase == "swelling"
+    assert strict.search("my backpain is worse")[0].phrase == "back pain"
+
+    print("✅ Fuzzy index tests passed!\n")
+
+
+def test_semantic_matching():
+    """Test free-text descriptions that never name the symptom."""
+    print("🧪 Testing semantic symptom matching...")
+
+    analyzer = SymptomAnalyzer(GUIDE)
+    assert analyzer.analyze_symptom("I'm so worn out lately", 1) == (False, "fatigue response")
+    assert [f.symptom for f in analyzer.analyze_symptoms("completely exhausted", 1)] == ["fatigue"]
+    assert analyzer.analyze_symptoms("the baby kicked a lot", 1) == []
+    # No guess once an emergency is found, nor when the user says all is fine
+    assert [f.symptom for f in analyzer.analyze_symptoms("exhausted and bleeding", 1)] == ["bleeding"]
+    assert analyzer.analyze_symptoms("I feel great", 1) == []
+    assert analyzer.analyze_symptom("a bit worn out but I feel great", 1) == (False, "fatigue response")
+    assert analyzer.analyze_symptom("worn out, not doing well", 1) == (False, "fatigue response")
+
+    analyzer = SymptomAnalyzer(load_reference_data().symptoms_guide)
+    assert analyzer.analyze_symptoms("I was sleeping well", 3) == []
+    assert [f.symptom for f in analyzer.analyze_symptoms("I'm not sleeping well", 3)] == ["trouble sleeping"]
+    # A symptom mentioned next to "fine" or "good" is still a symptom
+    for text in [
+        "my ankles look puffy, otherwise I feel fine",
+        "I feel good but my ankles are really puffy",
+        "my ankles look puffy but the baby is moving well",
+    ]:
+        assert [f.symptom for f in analyzer.analyze_symptoms(text, 3)] == ["swelling"], text
+        assert analyzer.analyze_symptom(text, 3)[1].startswith("Some swelling"), text
+    assert [f.symptom for f in analyzer.analyze_symptoms("sick to my stomach but otherwise good", 1)] == ["nausea"]
+
+    index = SemanticIndex([("puffy ankles swollen feet", "swelling"), ("burning chest acid", "heartburn")])
+    assert [m.payload for m in index.search("my ankles look puffy")] == ["swelling"]
+    assert index.search("what a lovely day") == []
+
+    print("✅ Semantic symptom matching tests passed!\n")
+
+
+def test_everyday_words():
+    """Test everyday words a letter or two from a symptom name are not reported."""
+    print("🧪 Testing everyday words near symptom names...")
+
+    analyzer = SymptomAnalyzer(load_reference_data().symptoms_guide)
+    everyday = [
+        "I was sweating today", "welding", "spilling the milk", "backpack", "consolation",
+        "constellation", "everything is smelling weird", "I am dwelling on it", "I'm selling my car",
+        "telling you", "yelling at the kids", "the house feels welcoming", "I went walking",
+        "spelling bee", "the heat was sweltering", "it's a constant thing", "my cousin called",
+        "feeling happy", "cooking dinner", "we're moving house", "dining out", "hearing things",
+        "the heating is broken", "starting a new job", "I smiled", "shopping for shoes",
+    ]
+    for text in everyday:
+        for trimester in (1, 2, 3):
+            assert analyzer.analyze_symptoms(text, trimester) == [], f"Should not report '{text}'"
+
+    # Misspelled, misheard or split names still match
+    for text, trimester, symptom in [
+        ("my feet are sweling", 3, "swelling"), ("swellling hands", 3, "swelling"),
+        ("bad nausia", 1, "nausea"), ("heartbern tonight", 2, "heartburn"), ("heart burn", 2, "heartburn"),
+        ("constipashun", 2, "constipation"), ("backpain", 2, "back pain"), ("insomnea", 3, "trouble sleeping"),
+        ("leg crmps", 2, "leg cramps"), ("braxton hiks", 3, "braxton hicks"),
+    ]:
+        assert [f.symptom for f in analyzer.analyze_symptoms(text, trimester)] == [symptom], text
+
+    print("✅ Everyday word tests passed!\n")
+
+
+def test_guide_descriptions():
+    """Test that every description in the guide finds its own symptom."""
+    print("🧪 Testing guide descriptions...")
+
+    guide = load_reference_data().symptoms_guide
+    analyzer = SymptomAnalyzer(guide)
+    for trimester_key, symptoms in guide["common_symptoms"].items():
+        trimester = int(trimester_key.rsplit("_", 1)[-1])
+        for info in symptoms:
+            for description in info.get("descriptions", "").split(","):
+                # Checked on the semantic pass: "practice contractions" escalates first
+                match = analyzer._semantic_match(description, trimester)
+                assert match is not None and match["symptom"] == info["symptom"], description
+    assert [f.symptom for f in analyzer.analyze_symptoms("so queasy", 1)] == ["nausea"]
+
+    print("✅ Guide description tests passed!\n")
+
+
+def test_emergency_detection():
+    """Test emergency keywords are always escalated."""
+    print("🧪 Testing emergency detection...")
+
+    analyzer = SymptomAnalyzer(GUIDE)
+    for text in ["I have HEAVY  bleeding", "bloody discharge", "I can’t breathe", "nausea and bleeding"]:
+        is_emergency, response = analyzer.analyze_symptom(text, 1)
+        assert is_emergency, f"Should escalate '{text}'"
+        assert response == "call your doctor"
+
+    print("✅ Emergency detection tests passed!\n")
+
+
+def test_common_symptoms():
+    """Test trimester-specific common symptom responses."""
+    print("🧪 Testing common symptoms...")
+
+    analyzer = SymptomAnalyzer(GUIDE)
+    assert analyzer.analyze_symptom("Nausea in the morning", 1) == (False, "nausea response")
+    assert analyzer.analyze_symptom("headaches and back pain", 2) == (False, "back pain response")
+    assert analyzer.analyze_symptom("so much nausia", 1) == (False, "nausea response")
+    assert analyzer.analyze_symptom("heart burn after dinner", 2) == (False, "heartburn response")
+    assert analyzer.analyze_symptom("acid reflux", 2) == (False, "heartburn response")
+    # Emergency keywords are never matched fuzzily
+    assert analyzer.analyze_symptom("bleding", 1)[0] is False
+    assert analyzer.symptom_matchers["trimester_1"].find_all("unfatigued") == []
+    is_emergency, response = analyzer.analyze_symptom("my toes are cold", 1)
+    assert not is_emergency and "Every pregnancy is unique" in response
+
+    print("✅ Common symptom tests passed!\n")
+
+
+def test_batch_analysis():
+    """Test that one call reports every symptom in an utterance."""
+    print("🧪 Testing batch symptom analysis...")
+
+    analyzer = SymptomAnalyzer(GUIDE)
+    findings = analyzer.analyze_symptoms("headaches, back pain and heart burn, and more back pain", 2)
+    assert [(f.symptom, f.severity) for f in findings] == [
+        ("headache", "common"), ("back pain", "common"), ("heartburn", "common")
+    ]
+    assert findings[2].response == "heartburn response"
+
+    findings = analyzer.analyze_symptoms("nausea and heavy bleeding", 1)
+    assert [(f.symptom, f.is_emergency) for f in findings] == [("heavy bleeding", True), ("nausea", False)]
+    assert findings[0].response == "call your doctor"
+
+    assert analyzer.analyze_symptoms("a severe headache", 2)[0].symptom == "severe headache"
+    assert len(analyzer.analyze_symptoms("a severe headache", 2)) == 1
+    assert analyzer.analyze_symptoms("I feel fine", 1) == []
+
+    print("✅ Batch symptom analysis tests passed!\n")
+
+
+def test_streaming_emergency_scanner():
+    """Test emergency keywords are caught in interim transcripts, once per utterance."""
+    print("🧪 Testing streaming emergency scanner...")
+
+    scanner = SymptomAnalyzer(GUIDE).create_emergency_scanner()
+    assert scanner.update("I have") == []
+    assert scanner.update("I have a severe head") == []
+    assert [m.keyword for m in scanner.update("I have a severe headache")] == ["severe headache"]
+    # Re-sent and revised interim text does not report the same hit again
+    assert scanner.update("I have a severe headache and") == []
+    assert [m.keyword for m in scanner.update("I have a severe headache, blood")] == ["blood"]
+
+    scanner.reset()
+    assert [m.keyword for m in scanner.update("bleeding")] == ["bleeding"]
+    assert scanner.update("bleeding") == []
+    scanner.reset()
+    assert scanner.update("unbleeding text") == []
+
+    # Denied keywords are dropped before the fast path fires
+    for text, live in [
+        ("no bleeding or contractions, all good", []),
+        ("I don't have any heavy bleeding", []),
+        ("without bleeding", []),
+        ("no, I'm bleeding", ["bleeding"]),
+        ("it won't stop bleeding", ["bleeding"]),
+        ("no pain but there is blood", ["blood"]),
+        ("I have no idea why I'm bleeding", ["bleeding"]),
+    ]:
+        scanner.reset()
+        hits = scanner.update(text)
+        assert [m.keyword for m in hits if not is_negated(text, m)] == live, text
+
+    print("✅ Streaming emergency scanner tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running Symptom Analyzer Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_keyword_matcher()
+        test_fuzzy_index()
+        test_emergency_detection()
+        test_common_symptoms()
+        test_semantic_matching()
+        test_everyday_words()
+        test_guide_descriptions()
+        test_batch_analysis()
+        test_streaming_emergency_scanner()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,91 @@
+"""
+Test script for the TTS audio cache
+Run this to verify cached phrases round-trip and old entries are evicted
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from tts_cache import TTSAudioCache, cache_key
+
+
+def _pcm(seconds: float, sample_rate: int = 8000) -> bytes:
+    return b"\x01\x00" * int(seconds * sample_rate)
+
+
+def test_round_trip():
+    """Test that stored audio comes back unchanged and survives a restart."""
+    print("🧪 Testing TTS cache round trip...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSAudioCache("anisha", "Conversation", cache_dir=tmp)
+        assert cache.get("Hello") is None
+
+        cache.put("Hello", _pcm(0.5), sample_rate=8000)
+        audio = cache.get("Hello")
+        assert audio.pcm == _pcm(0.5)
+        assert audio.sample_rate == 8000 and audio.num_channels == 1
+        assert abs(audio.duration - 0.5) < 0.01
+
+        reopened = TTSAudioCache("anisha", "Conversation", cache_dir=tmp)
+        assert "Hello" in reopened
+        other_voice = TTSAudioCache("natalie", "Conversation", cache_dir=tmp)
+        assert "Hello" not in other_voice
+        assert cache_key("anisha", "Conversation", "Hello") != cache_key("anisha", "Promo", "Hello")
+
+        assert cache.get_summary()["hits"] == 1
+        assert cache.get_summary()["misses"] == 1
+
+    print("✅ Round trip tests passed!\n")
+
+
+def test_lru_eviction():
+    """Test that the least recently used phrases are evicted first."""
+    print("🧪 Testing TTS cache LRU eviction...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSAudioCache("anisha", "Conversation", cache_dir=tmp, max_entries=2)
+        cache.put("one", _pcm(0.1), sample_rate=8000)
+        cache.put("two", _pcm(0.1), sample_rate=8000)
+        assert cache.get("one") is not None  # "two" is now least recently used
+        cache.put("three", _pcm(0.1), sample_rate=8000)
+
+        assert "one" in cache and "three" in cache
+        assert "two" not in cache
+        assert len(os.listdir(tmp)) == 2
+
+        size_limited = TTSAudioCache("anisha", "Conversation", cache_dir=tmp, max_bytes=3000)
+        size_limited.put("long", _pcm(1.0, 1000), sample_rate=1000)
+        assert len(size_limited) == 1 and "long" in size_limited
+
+    print("✅ LRU eviction tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running TTS Cache Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_round_trip()
+        test_lru_eviction()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,198 @@
+"""
+Test script for per-user sharded storage
+Run this to verify concurrent sessions do not share or lose data
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from async_storage import AsyncJournalStore, run_io
+from user_storage import acquire_user_shard, release_user_shard, session_user_id, shard_key
+
+
+def test_shard_keys():
+    """Test that shard keys are filesystem-safe and distinct."""
+    print("🧪 Testing shard keys...")
+
+    assert shard_key("voice_assistant_user_42").startswith("voice_assistant_user_42-")
+    assert "/" not in shard_key("../../etc/passwd")
+    assert shard_key("User A") != shard_key("user-a")
+
+    print("✅ Shard key tests passed!\n")
+
+
+def test_concurrent_sessions_are_isolated():
+    """Test many concurrent sessions writing to their own shards."""
+    print("🧪 Testing concurrent sharded sessions...")
+
+    async def session(root: str, user_id: str, saves: int):
+        shard = acquire_user_shard(user_id, root_dir=root)
+        await run_io(shard.open)
+        journal = AsyncJournalStore(shard.journal_store)
+        for i in range(saves):
+            entry = {"datetime": f"2025-01-01T10:00:{i:02d}", "pregnancy_tasks": [f"{user_id} {i}"]}
+            async with shard.lock:
+                await journal.append(entry)
+            shard.profile.add_allergy(f"allergy {i}")
+        await release_user_shard(shard)
+
+    async def run(root: str):
+        # Two sessions for user-0 run at the same time and share one shard
+        await asyncio.gather(
+            *(session(root, f"user-{n % 4}", saves=5) for n in range(8))
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+
+        for n in range(4):
+            shard = acquire_user_shard(f"user-{n}", root_dir=tmp).open()
+            entries = shard.journal_store.load_all()
+            assert len(entries) == 10
+            assert all(e["pregnancy_tasks"][0].startswith(f"user-{n} ") for e in entries)
+            assert len(shard.profile.profile["allergies"]) == 5
+            asyncio.run(release_user_shard(shard))
+
+    print("✅ Concurrent sharded session tests passed!\n")
+
+
+def test_sessions_follow_the_user():
+    """Test that sessions of one user in different rooms share their data."""
+    print("🧪 Testing per-user storage across rooms...")
+
+    async def session(root: str, room_name: str, identity: str, attributes: dict) -> tuple:
+        # The room name plays no part in where the data lives
+        shard = acquire_user_shard(session_user_id(identity, attributes), root_dir=root)
+        await run_io(shard.open)
+        seen = (list(shard.profile.profile["allergies"]), len(shard.journal_store.load_all()))
+        shard.profile.add_allergy(f"allergy from {room_name}")
+        await AsyncJournalStore(shard.journal_store).append({
+            "datetime": "2025-01-01T10:00:00", "pregnancy_tasks": [room_name]
+        })
+        await release_user_shard(shard)
+        return seen
+
+    with tempfile.TemporaryDirectory() as tmp:
+        identity = "voice_assistant_user_3f6c2a9e-1111"
+        assert asyncio.run(session(tmp, "voice_assistant_room_17", identity, {})) == ([], 0)
+        assert asyncio.run(session(tmp, "voice_assistant_room_4242", identity, {})) == (
+            ["allergy from voice_assistant_room_17"], 1
+        )
+        # Another user drawing the same room name gets their own data
+        assert asyncio.run(session(tmp, "voice_assistant_room_17", "voice_assistant_user_other", {})) == ([], 0)
+        # An explicit user_id attribute wins over the identity
+        assert session_user_id("anonymous-1", {"user_id": identity}) == identity
+
+    print("✅ Per-user storage tests passed!\n")
+
+
+def test_legacy_data_is_claimed_once():
+    """Test that pre-sharding global files only move into the named owner's shard."""
+    print("🧪 Testing legacy data takeover...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "profile.json"), "w") as f:
+            json.dump({"due_date": "2026-06-15", "allergies": ["nuts"]}, f)
+        with open(os.path.join(tmp, "pregnancy_journal.json"), "w") as f:
+            json.dump([{"datetime": "2025-01-01T10:00:00", "pregnancy_tasks": ["walk"]}], f)
+        with open(os.path.join(tmp, "closure_tasks.json"), "w") as f:
+            json.dump([{"timestamp": "2025-01-01T10:00:00", "task": "Drink water"}], f)
+
+        previous_owner = os.environ.pop("LEGACY_USER_ID", None)
+        try:
+            # Without a named owner, the first browser to connect gets nothing
+            shard = acquire_user_shard("stranger", root_dir=tmp).open()
+            assert shard.profile.profile["allergies"] == []
+            asyncio.run(release_user_shard(shard))
+            assert os.path.exists(os.path.join(tmp, "profile.json"))
+
+            os.environ["LEGACY_USER_ID"] = "owner"
+            shard = acquire_user_shard("other-stranger", root_dir=tmp).open()
+            assert shard.profile.profile["allergies"] == []
+            asyncio.run(release_user_shard(shard))
+
+            shard = acquire_user_shard("owner", root_dir=tmp).open()
+            assert shard.profile.profile["allergies"] == ["nuts"]
+            assert shard.journal_store.latest_tasks() == ["walk"]
+            assert [entry["task"] for entry in shard.closure_log.iter_entries()] == ["Drink water"]
+            asyncio.run(release_user_shard(shard))
+            assert not os.path.exists(os.path.join(tmp, "profile.json"))
+
+            # Claimed once: nobody inherits legacy files that reappear
+            with open(os.path.join(tmp, "profile.json"), "w") as f:
+                json.dump({"allergies": ["eggs"]}, f)
+            os.environ["LEGACY_USER_ID"] = "second-user"
+            shard = acquire_user_shard("second-user", root_dir=tmp).open()
+            assert shard.profile.profile["allergies"] == []
+            asyncio.run(release_user_shard(shard))
+        finally:
+            os.environ.pop("LEGACY_USER_ID", None)
+            if previous_owner is not None:
+                os.environ["LEGACY_USER_ID"] = previous_owner
+
+    print("✅ Legacy data takeover tests passed!\n")
+
+
+def test_release_waits_for_background_save():
+    """Test that closing a shard does not race a debounced profile save."""
+    print("🧪 Testing shard release during a profile save...")
+
+    async def session(root_dir: str):
+        shard = acquire_user_shard("user-1", root_dir=root_dir).open()
+        shard.profile.debounce_seconds = 0.01
+        commit = shard.profile.store.commit
+
+        def slow_commit(*args):
+            time.sleep(0.1)
+            return commit(*args)
+
+        shard.profile.store.commit = slow_commit
+        shard.profile.add_allergy("nuts")
+        await asyncio.sleep(0.03)
+        # The debounced save has taken the change and is still committing
+        assert shard.profile._flush_task is not None and not shard.profile._dirty
+        await release_user_shard(shard)
+        return shard.data_dir
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = asyncio.run(session(tmp))
+        versions = os.listdir(os.path.join(data_dir, "profile_versions"))
+        assert [name for name in versions if name.endswith(".json")] == ["v000000001.json"]
+
+    print("✅ Shard release tests passed!\n")
+
+
+def run_all_tests():
+    """Run all tests."""
+    print("=" * 60)
+    print("🚀 Running User Storage Tests")
+    print("=" * 60 + "\n")
+
+    try:
+        test_shard_keys()
+        test_concurrent_sessions_are_isolated()
+        test_sessions_follow_the_user()
+        test_legacy_data_is_claimed_once()
+        test_release_waits_for_background_save()
+
+        print("=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_all_tests()
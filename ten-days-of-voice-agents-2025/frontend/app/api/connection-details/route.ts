@@ -33,9 +33,13 @@ export async function POST(req: Request) {
     const body = await req.json();
     const agentName: string = body?.room_config?.agents?.[0]?.agent_name;
 
-    // Generate participant token
+    // Generate participant token. The identity must be stable across sessions:
+    // the agent keys the user's profile and journal on it. user_id is whatever
+    // the browser sends and is NOT authenticated: anyone who knows or guesses
+    // an id gets that user's data. Put real auth in front of this for production.
     const participantName = 'user';
-    const participantIdentity = `voice_assistant_user_${Math.floor(Math.random() * 10_000)}`;
+    const userId = parseUserId(body?.user_id) ?? crypto.randomUUID();
+    const participantIdentity = `voice_assistant_user_${userId}`;
     const roomName = `voice_assistant_room_${Math.floor(Math.random() * 10_000)}`;
 
     const participantToken = await createParticipantToken(
@@ -63,6 +67,13 @@ export async function POST(req: Request) {
   }
 }
 
+function parseUserId(value: unknown): string | undefined {
+  if (typeof value !== 'string') {
+    return undefined;
+  }
+  return /^[A-Za-z0-9_-]{8,64}$/.test(value) ? value : undefined;
+}
+
 function createParticipantToken(
   userInfo: AccessTokenOptions,
   roomName: string,
@@ -3,6 +3,18 @@ import { Room, RoomEvent, TokenSource, RoomOptions } from 'livekit-client';
 import { AppConfig } from '@/app-config';
 import { toastAlert } from '@/components/livekit/alert-toast';
 
+const USER_ID_KEY = 'pregnancy-companion-user-id';
+
+// Stable per-browser user id, so the agent finds the same profile and journal every session
+function getUserId(): string {
+  let userId = window.localStorage.getItem(USER_ID_KEY);
+  if (!userId) {
+    userId = crypto.randomUUID();
+    window.localStorage.setItem(USER_ID_KEY, userId);
+  }
+  return userId;
+}
+
 export function useRoom(appConfig: AppConfig) {
   const aborted = useRef(false);
   const retryCount = useRef(0);
@@ -96,6 +108,7 @@ export function useRoom(appConfig: AppConfig) {
               'X-Sandbox-Id': appConfig.sandboxId ?? '',
             },
             body: JSON.stringify({
+              user_id: getUserId(),
               room_config: appConfig.agentName
                 ? {
                     agents: [{ agent_name: appConfig.agentName }],